@@ -25,6 +25,9 @@ a = Analysis(
         'PyPDF2._writer',
         # PyMuPDF相关
         'fitz',
+        # fontTools（PyMuPDF 的 subset_fonts 字体子集化依赖）
+        'fontTools',
+        'fontTools.subset',
         # matplotlib相关（用于信用分可视化）
         'matplotlib',
         'matplotlib.backends',
@@ -42,6 +45,20 @@ a = Analysis(
         'certifi',
         # 自定义模块
         'credit_score_visualizer',
+        'huawei_ocr',
+        'pdf_pipeline',
+        'pdf_batch',
+        'pdf_config',
+        'pdf_rules',
+        'text_matcher',
+        'pdf_text_index',
+        'spatial_index',
+        'pdf_image_resources',
+        'pdf_text_writer',
+        'pdf_output',
+        'pdf_journal',
+        'pdf_cache',
+        'pdf_ocr_dispatch',
         # PIL相关（某些情况下需要）
         'PIL',
         'PIL._tkinter_finder',
@@ -1,3 +1,4 @@
+import os
 import matplotlib
 # 使用 Agg 后端（非 GUI 后端，可以在后台线程中使用，适合生成图片文件）
 matplotlib.use('Agg')
@@ -20,7 +21,7 @@ def create_credit_score_visualization(score=1206, update_date=None, output_path=
     参数:
         score: 信用分数 (0-2000)
         update_date: 更新日期，可以是datetime对象或字符串，格式为"YYYY年MM月DD日"
-        output_path: 输出PNG文件路径
+        output_path: 输出PNG文件路径，或可写入的文件对象（如 io.BytesIO，图片只在内存中生成，不写入磁盘）
     """
     # 设置图形大小和DPI
     fig, ax = plt.subplots(figsize=(18, 7), dpi=150)
@@ -170,10 +171,11 @@ def create_credit_score_visualization(score=1206, update_date=None, output_path=
     
     # 保存图片（透明背景）
     plt.tight_layout()
-    plt.savefig(output_path, dpi=150, bbox_inches='tight', transparent=True, facecolor='none', edgecolor='none')
+    plt.savefig(output_path, format='png', dpi=150, bbox_inches='tight', transparent=True, facecolor='none', edgecolor='none')
     plt.close()
     
-    print(f"信用评分可视化已保存到: {output_path}")
+    if isinstance(output_path, (str, os.PathLike)):
+        print(f"信用评分可视化已保存到: {output_path}")
 
 
 if __name__ == '__main__':
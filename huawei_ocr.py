@@ -0,0 +1,201 @@
+"""
+华为云 IAM / OCR 接口封装
+不依赖 PyQt5，供 GUI 和流水线共同使用
+
+所有请求共用一个进程级的 requests.Session（见 get_session）：
+连接池保持长连接，同一进程中的后续请求不再重复 DNS 查询和 TCP+TLS 握手；
+连接失败、超时和服务端暂时性错误（429 / 5xx）按带随机抖动的指数退避有限次重试
+（OCR识别和获取Token重复发送结果相同，可以安全重试），连接超时和读取超时分开设置。
+"""
+import os
+import json
+import time
+import base64
+import random
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+# 连接超时（秒）：网络不通时尽快失败并重试
+CONNECT_TIMEOUT = 5
+# 读取超时（秒）：获取Token / OCR识别（识别大图片需要更长时间）
+TOKEN_READ_TIMEOUT = 10
+OCR_READ_TIMEOUT = 30
+
+# 重试次数（不含第一次请求）和退避时间（秒）
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+# 需要重试的HTTP状态码（限流和服务端暂时性错误）
+RETRY_STATUS = frozenset((429, 500, 502, 503, 504))
+
+# 连接池大小：同一主机的最大并发连接数（并发OCR请求共用）
+POOL_MAXSIZE = 16
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    返回进程级共享的 requests.Session（线程安全，多个线程可同时使用）
+    进程池的工作进程（fork）不能复用父进程的连接，按进程ID各自创建。
+    """
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                session = requests.Session()
+                # 重试由 _post 自行处理（带随机抖动，且兼容各版本的 urllib3）
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_MAXSIZE, max_retries=0)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session, _session_pid = session, pid
+    return _session
+
+
+def _retry_delay(attempt, response=None):
+    """第 attempt 次重试前的等待时间：服务端给出 Retry-After 时按其等待，否则为带随机抖动的指数退避"""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), BACKOFF_MAX)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def _post(url, headers, data, read_timeout, retries=MAX_RETRIES):
+    """
+    通过共享连接池发送 POST 请求
+    连接错误、超时和 RETRY_STATUS 中的状态码最多重试 retries 次；
+    最后一次仍然失败时返回该响应（或抛出最后一次的异常），由调用方按原逻辑处理。
+    """
+    session = get_session()
+    for attempt in range(retries + 1):
+        response = None
+        try:
+            response = session.post(url, headers=headers, data=data, timeout=(CONNECT_TIMEOUT, read_timeout))
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt >= retries:
+                raise
+            reason = type(e).__name__
+        else:
+            if response.status_code not in RETRY_STATUS or attempt >= retries:
+                return response
+            reason = f"HTTP {response.status_code}"
+        delay = _retry_delay(attempt, response)
+        print(f"  - 华为云请求失败（{reason}），{delay:.1f} 秒后重试（第{attempt + 1}/{retries}次）")
+        time.sleep(delay)
+
+
+def get_huawei_token(username, domain, password, project_name="cn-north-4"):
+    """
+    获取华为云Token
+    
+    参数:
+        username: IAM用户名
+        domain: 账号名
+        password: 密码
+        project_name: 项目名称，默认为cn-north-4
+    
+    返回:
+        token: 如果成功返回token字符串，失败返回None
+    """
+    print(username)
+    print(domain)
+    print(password)
+    print(project_name)
+    url = f"https://iam.{project_name}.myhuaweicloud.com/v3/auth/tokens"
+    
+    payload = json.dumps({
+        "auth": {
+            "identity": {
+                "methods": ["password"],
+                "password": {
+                    "user": {
+                        "name": username,
+                        "password": password,
+                        "domain": {
+                            "name": domain
+                        }
+                    }
+                }
+            },
+            "scope": {
+                "project": {
+                    "name": project_name
+                }
+            }
+        }
+    })
+    
+    headers = {
+        'Content-Type': 'application/json'
+    }
+    
+    try:
+        response = _post(url, headers, payload, TOKEN_READ_TIMEOUT)
+        if response.status_code == 201:
+            token = response.headers.get("X-Subject-Token")
+            if token:
+                print(f"✓ 成功获取华为云Token（有效期24小时）")
+                return token
+            else:
+                print(f"✗ 获取Token失败: 响应头中未找到X-Subject-Token")
+                return None
+        else:
+            print(f"✗ 获取Token失败: HTTP {response.status_code}, {response.text}")
+            return None
+    except Exception as e:
+        print(f"✗ 获取Token时发生错误: {e}")
+        return None
+
+
+def call_huawei_ocr_api(image_bytes, token, project_id, region="cn-north-4"):
+    """
+    调用华为云OCR API进行文字识别
+    
+    参数:
+        image_bytes: 图片的字节数据
+        token: 华为云Token
+        project_id: 项目ID
+        region: 区域名称，默认为cn-north-4
+    
+    返回:
+        result: 如果成功返回识别结果字典，失败返回None
+    """
+    # 将图片转换为base64编码
+    image_base64 = base64.b64encode(image_bytes).decode('utf-8')
+    
+    # 构建请求URL
+    endpoint = f"ocr.{region}.myhuaweicloud.com"
+    url = f"https://{endpoint}/v2/{project_id}/ocr/general-text"
+    
+    # 构建请求体
+    payload = json.dumps({
+        "image": image_base64,
+        "quick_mode": False,
+        "detect_direction": False
+    })
+    
+    # 构建请求头
+    headers = {
+        'X-Auth-Token': token,
+        'Content-Type': 'application/json'
+    }
+    
+    try:
+        response = _post(url, headers, payload, OCR_READ_TIMEOUT)
+        if response.status_code == 200:
+            result = response.json()
+            print(f"✓ OCR识别成功")
+            return result
+        else:
+            print(f"✗ OCR识别失败: HTTP {response.status_code}, {response.text}")
+            return None
+    except Exception as e:
+        print(f"✗ OCR识别时发生错误: {e}")
+        import traceback
+        print(traceback.format_exc())
+        return None
@@ -0,0 +1,617 @@
+"""
+PDF批量处理
+负责单个文件的完整处理流程（页面选择 + 编辑流水线 + 保存），
+以及多个文件在进程池中的并行调度。
+
+本模块不依赖 PyQt5：GUI 线程通过回调函数接收状态和进度，
+工作进程中的状态信息先缓存在列表里，文件处理完成后再统一回传。
+"""
+import os
+import hashlib
+import contextlib
+import concurrent.futures
+from datetime import datetime
+import fitz  # PyMuPDF
+from pdf_pipeline import (
+    get_cached_font,
+    PDFEditPipeline,
+    map_input_file,
+    remove_first_and_last_pages_in_doc,
+    document_to_bytes,
+    write_output_file,
+    compare_save_profiles,
+    format_save_profile_report,
+    make_document_code,
+    prefetch_credit_score_ocr,
+    replace_credit_score_image_in_doc,
+)
+from pdf_rules import load_rules, compile_rules, rules_fingerprint
+from pdf_output import OutputWriter
+from pdf_journal import BatchJournal, settings_fingerprint
+from pdf_cache import DEFAULT_CACHE_MB, content_key, default_cache_dir, get_cache
+from pdf_ocr_dispatch import DEFAULT_MAX_IN_FLIGHT, get_dispatcher
+
+
+# 批处理设置（普通字典，便于传给工作进程）：
+#   image_output_dir: 提取图片的保存目录，为空时不保存（图片只在内存中处理）
+#   update_date:      可视化图片中显示的更新日期
+#   region_code:      地区编码，为空时跳过页眉文档编码
+#   huawei_token:     华为云Token，为空时跳过OCR
+#   huawei_project_id / huawei_project: 华为云项目ID / 区域
+#   ocr_max_in_flight: 每个进程同时在途的OCR请求数（后台发送，与编辑重叠，见 pdf_ocr_dispatch），0 表示同步调用
+#   shard_pages:      大文档按页分片并行处理时每个分片的页数，0 表示不分片（默认）；
+#                     分片输出与不分片时渲染一致（文字、画面、文档编码相同），但对象布局和文件大小不同
+#   subset_fonts:     保存时对嵌入的字体做子集化（只保留用到的字形）
+#   save_profile:     保存配置名称（fast / standard / compact，见 pdf_pipeline.SAVE_PROFILES）
+#   save_report:      保存前输出各保存配置的耗时和输出大小对比
+#   fsync_outputs:    每批结束时把输出文件刷到磁盘（fsync），见 pdf_output.OutputWriter
+#   resume_batches:   在输出目录中记录批处理日志，重新运行时跳过已完成的文件（见 pdf_journal）
+#   result_cache:     内容缓存（见 pdf_cache，默认关闭）：相同输入和设置直接复用之前的输出，OCR结果和信用分图片也按内容复用；
+#                     复用的输出中的文档编码（随机生成）与之前那次输出相同
+#   stage_cache:      阶段缓存（需要同时启用 result_cache，见 PDFEditPipeline）：每条编辑规则作为单独的阶段，
+#                     保存每个阶段的输出，修改某条规则或资源文件后只重新执行该规则及其后的阶段；
+#                     每个文件要多保存几次，默认关闭
+#   result_cache_dir / result_cache_mb: 缓存目录（为空时为用户缓存目录，见 pdf_cache.default_cache_dir）/ 缓存大小上限（MB）
+#   settings_fingerprint: 影响输出结果的设置的指纹（由 run_batch 设置，见 batch_fingerprint）
+#   shard_workers:    分片并行使用的进程数（由 run_batch 在串行处理文件时设置）
+#   rule_plan:        编译后的编辑规则（pdf_rules.RulePlan），由 run_batch 每批编译一次
+
+
+def make_batch_settings(config, image_output_dir="", update_date=None, region_code=None, huawei_token=None):
+    """根据配置文件内容和本次批处理参数生成设置字典"""
+    return {
+        "image_output_dir": image_output_dir,
+        "update_date": update_date,
+        "region_code": region_code,
+        "huawei_token": huawei_token,
+        "huawei_project_id": config.get("huawei_project_id", ""),
+        "huawei_project": config.get("huawei_project", "cn-north-4"),
+        "ocr_max_in_flight": int(config.get("ocr_max_in_flight", DEFAULT_MAX_IN_FLIGHT) or 0),
+        "shard_pages": int(config.get("shard_pages", 0) or 0),
+        "subset_fonts": bool(config.get("subset_fonts", True)),
+        "save_profile": config.get("save_profile", "standard"),
+        "save_report": bool(config.get("save_report", False)),
+        "fsync_outputs": bool(config.get("fsync_outputs", False)),
+        "resume_batches": bool(config.get("resume_batches", True)),
+        "result_cache": bool(config.get("result_cache", False)),
+        "stage_cache": bool(config.get("stage_cache", False)),
+        "result_cache_dir": config.get("result_cache_dir", ""),
+        "result_cache_mb": int(config.get("result_cache_mb", DEFAULT_CACHE_MB) or DEFAULT_CACHE_MB),
+    }
+
+
+def open_result_cache(settings):
+    """按批处理设置返回内容缓存（pdf_cache.ContentCache），未启用时返回 None"""
+    if not settings.get("result_cache"):
+        return None
+    cache_dir = settings.get("result_cache_dir") or default_cache_dir()
+    return get_cache(cache_dir, settings.get("result_cache_mb", DEFAULT_CACHE_MB))
+
+
+def open_stage_cache(settings):
+    """阶段缓存（与结果缓存共用目录），未启用时返回 None；缓存的阶段输出已做字体子集化，不做子集化保存时不使用"""
+    if not settings.get("stage_cache") or not settings.get("subset_fonts", True):
+        return None
+    return open_result_cache(settings)
+
+
+def stage_input_key(sha256):
+    """阶段缓存的起点：输入内容哈希 + 删除首尾页"""
+    return content_key(sha256, "remove_first_and_last_pages")
+
+
+def open_ocr_dispatcher(settings):
+    """按批处理设置返回本进程的OCR请求线程池（pdf_ocr_dispatch.OCRDispatcher），不需要OCR或未启用时返回 None"""
+    max_in_flight = int(settings.get("ocr_max_in_flight", DEFAULT_MAX_IN_FLIGHT) or 0)
+    if max_in_flight <= 0 or not settings.get("huawei_token") or not settings.get("huawei_project_id"):
+        return None
+    return get_dispatcher(max_in_flight)
+
+
+def resolve_worker_count(worker_count, total_files):
+    """
+    计算实际使用的工作进程数
+    worker_count 为 0 或空时按CPU核数自动选择，且不超过文件数量
+    """
+    try:
+        worker_count = int(worker_count or 0)
+    except (TypeError, ValueError):
+        worker_count = 0
+    if worker_count <= 0:
+        worker_count = os.cpu_count() or 1
+    return max(1, min(worker_count, total_files))
+
+
+def plan_output_paths(pdf_files, output_dir, employee_id=None, employee_name=None, writer=None):
+    """
+    在派发任务前按输入顺序为每个文件预留输出路径
+    这样并行处理时输出文件名与串行处理完全一致，不受完成顺序影响。
+
+    参数:
+        writer: 输出目录的名称索引（pdf_output.OutputWriter），为空时新建
+    """
+    writer = writer or OutputWriter(output_dir)
+    prefix = make_output_prefix(employee_id, employee_name)
+    output_paths = []
+    for pdf_path in pdf_files:
+        base_name = os.path.splitext(os.path.basename(pdf_path))[0]
+        output_paths.append(writer.reserve(base_name, prefix))
+    return output_paths
+
+
+def make_output_prefix(employee_id=None, employee_name=None):
+    """输出文件名前缀：工号-姓名_"""
+    if employee_id and employee_name:
+        return f"{employee_id}-{employee_name}_"
+    return ""
+
+
+def build_default_pipeline(base_name, settings, status_callback=None):
+    """按批处理设置构建单个文件的编辑流水线"""
+    emit = status_callback or print
+    pipeline = PDFEditPipeline()
+
+    # 编辑规则（替换标题、覆盖联系电话/企查查、替换和添加 logo、页眉文档编码、二级标题等）
+    # 来自规则文件 pdf_edit_rules.json，所有规则在每页的一次遍历中完成；
+    # 启用阶段缓存时每条规则作为一个阶段，修改某条规则只重新执行该规则及其后的阶段
+    rule_plan = settings.get("rule_plan") or _WORKER_STATE.get("rule_plan")
+    if rule_plan is None:
+        rule_plan = compile_rules(load_rules(), settings.get("region_code"), emit)
+    if rule_plan.rules:
+        # 文档编码在这里生成一次，分片并行时各分片、各规则阶段使用同一个编码
+        region_code = rule_plan.region_code
+        document_code = make_document_code(region_code) if region_code else None
+        if open_stage_cache(settings) is None:
+            plans = [("apply_edit_rules", rule_plan)]
+        else:
+            plans = [(f"apply_edit_rules[{index + 1}: {plan.rules[0]['name']}]", plan)
+                     for index, plan in enumerate(rule_plan.split())]
+        for name, plan in plans:
+            pipeline.add_stage(
+                name, plan.run, plan.messages, "  - 执行编辑规则时出错",
+                per_page=True, fingerprint=plan.fingerprint, document_code=document_code)
+
+    # 提取图片（即使未选择图片输出目录也执行，用于OCR和替换page2_img2）
+    # 未选择图片输出目录时提取的图片只在内存中使用，不写入磁盘
+    # 需要把提取的图片保存到磁盘时，该阶段每次都执行（不从阶段缓存恢复）
+    image_output_dir = settings.get("image_output_dir")
+    pdf_image_dir = os.path.join(image_output_dir, base_name) if image_output_dir else None
+    image_fingerprint = None if pdf_image_dir else settings_fingerprint({
+        "update_date": effective_update_date(settings),
+        "ocr": bool(settings.get("huawei_token")),
+        "region": settings.get("huawei_project", "cn-north-4"),
+    })
+    pipeline.add_stage(
+        "replace_credit_score_image", replace_credit_score_image_in_doc,
+        None, f"✗ 提取图片错误 {base_name}",
+        fingerprint=image_fingerprint, volatile=bool(settings.get("huawei_token")),
+        base_name=base_name,
+        image_dir=pdf_image_dir,
+        update_date=settings.get("update_date"),
+        token=settings.get("huawei_token"),
+        project_id=settings.get("huawei_project_id", ""),
+        region=settings.get("huawei_project", "cn-north-4"),
+        status_callback=emit,
+        cache=open_result_cache(settings),
+        ocr_dispatcher=open_ocr_dispatcher(settings))
+
+    return pipeline
+
+
+def process_pdf_bytes(pdf_bytes, pdf_name, output_name, settings, status_callback=None, stage_outcomes=None,
+                      source_sha256=None):
+    """
+    在内存中处理一份PDF：从字节串打开，删除第一页和最后一页，执行编辑流水线，按保存配置输出为字节串
+    整个过程不写入任何中间文件（信用分图片也在内存中生成）。
+
+    参数:
+        pdf_bytes: 输入PDF的内容（bytes，或 map_input_file 返回的内存映射缓冲区）
+        pdf_name / output_name: 输入、输出文件名（用于状态信息和图片文件名）
+        stage_outcomes: 可选的字典，填入各编辑阶段的执行结果（见 PDFEditPipeline.outcomes）
+        source_sha256: 输入内容的 SHA-256（已计算时传入，用于阶段缓存）
+
+    返回:
+        输出PDF的内容；页数不足被跳过时返回 None
+    """
+    emit = status_callback or print
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        total_pages = len(doc)
+
+        # 检查页数
+        if total_pages <= 2:
+            emit(f"跳过 {pdf_name}: 页数不足（只有{total_pages}页）")
+            return None
+
+        # 所有编辑步骤作为流水线阶段作用于同一个内存文档，最后只保存一次
+        base_name = os.path.splitext(pdf_name)[0]
+        pipeline = build_default_pipeline(base_name, settings, emit)
+
+        # 阶段缓存：从最后一个输入和参数都没有改变的阶段的输出继续
+        cache = open_stage_cache(settings)
+        input_key, start = None, 0
+        if cache is not None:
+            input_key = stage_input_key(source_sha256 or hashlib.sha256(pdf_bytes).hexdigest())
+            data, start = pipeline.restore(cache, input_key)
+            if data is not None:
+                doc.close()
+                doc = fitz.open(stream=data, filetype="pdf")
+                emit(f"  - 复用缓存的阶段输出，跳过: {'、'.join(s.name for s in pipeline.stages[:start])}")
+
+        if start == 0:
+            # 删除第一页和最后一页，文档直接交给后续编辑阶段
+            remove_first_and_last_pages_in_doc(doc)
+        emit(f"✓ PDF处理完成: {pdf_name} -> {output_name}")
+        # OCR请求先在后台发出，执行编辑规则期间等待网络
+        prefetch_ocr(pipeline, doc, settings, cache, input_key, start)
+
+        shard_pages = int(settings.get("shard_pages") or 0)
+        shard_workers = int(settings.get("shard_workers") or 1)
+        if shard_pages > 0 and shard_workers > 1 and len(doc) > shard_pages:
+            # 大文档：逐页阶段按页分片，在多个进程中并行执行
+            doc, _ = pipeline.run_sharded(doc, shard_pages, shard_workers, emit, start, cache, input_key)
+        else:
+            pipeline.run(doc, emit, start=start, cache=cache, input_key=input_key)
+        if stage_outcomes is not None:
+            stage_outcomes.update(pipeline.outcomes)
+        subset_fonts = settings.get("subset_fonts", True)
+        if settings.get("save_report"):
+            emit(f"保存配置对比（{output_name}）:")
+            emit(format_save_profile_report(compare_save_profiles(doc, subset_fonts)))
+        return document_to_bytes(doc, subset_fonts, settings.get("save_profile", "standard"))
+    finally:
+        doc.close()
+
+
+@contextlib.contextmanager
+def open_input_file(pdf_path):
+    """以内存映射方式打开输入文件（见 map_input_file）并计算内容哈希，返回 (缓冲区, sha256)"""
+    with map_input_file(pdf_path) as pdf_buffer:
+        yield pdf_buffer, hashlib.sha256(pdf_buffer).hexdigest()
+
+
+def process_pdf_file(pdf_path, output_path, settings, status_callback=None, record=None, source=None):
+    """
+    处理单个PDF文件：删除第一页和最后一页，执行编辑流水线，保存到 output_path
+    输入文件以内存映射方式只读取一次（见 map_input_file），编辑在内存中完成（见 process_pdf_bytes），
+    输出文件只写入一次。
+
+    参数:
+        record: 可选的字典，填入批处理日志需要的信息: sha256（输入内容哈希）、stages（各阶段的执行结果）
+        source: 可选，已经打开的 open_input_file 结果 (缓冲区, sha256)（提前提交OCR请求时已映射），
+                不再重新映射和计算哈希
+
+    返回:
+        result: "ok" / "skipped" / "error"
+    """
+    emit = status_callback or print
+    record = record if record is not None else {}
+    stages = record.setdefault("stages", {})
+    try:
+        emit(f"正在处理: {os.path.basename(pdf_path)}")
+
+        cache, key = None, None
+        with (contextlib.nullcontext(source) if source else open_input_file(pdf_path)) as (pdf_buffer, sha256):
+            record["sha256"] = sha256
+            key = result_cache_key(record["sha256"], settings)
+            if key:
+                cache = open_result_cache(settings)
+            data = cache.get("result", key) if cache is not None else None
+            if data is not None:
+                emit(f"✓ 命中结果缓存（相同文件和设置已处理过，沿用之前输出的文档编码）: "
+                     f"{os.path.basename(pdf_path)} -> {os.path.basename(output_path)}")
+                stages["result_cache"] = "hit"
+            else:
+                data = process_pdf_bytes(
+                    pdf_buffer, os.path.basename(pdf_path), os.path.basename(output_path), settings, emit, stages,
+                    record["sha256"]
+                )
+                # 有阶段出错或OCR暂时失败时不缓存，下次重新处理
+                complete = all(outcome in ("ok", "cached") for outcome in stages.values())
+                if data is not None and cache is not None and complete:
+                    cache.put("result", key, data)
+        if data is None:
+            return "skipped"
+        write_output_file(output_path, data)
+        return "ok"
+
+    except Exception as e:
+        emit(f"✗ 错误 {os.path.basename(pdf_path)}: {str(e)}")
+        import traceback
+        print(f"错误详情: {traceback.format_exc()}")
+        return "error"
+
+
+def prefetch_ocr(pipeline, doc, settings, cache=None, input_key=None, start=0):
+    """
+    信用分阶段还需要执行时，提前提交该文档的OCR请求
+    该阶段的输出已在阶段缓存中（或已从缓存恢复）时不提交，避免多余的OCR调用。
+    """
+    dispatcher = open_ocr_dispatcher(settings)
+    if dispatcher is None:
+        return False
+    names = [stage.name for stage in pipeline.stages]
+    if "replace_credit_score_image" not in names:
+        return False
+    index = names.index("replace_credit_score_image")
+    if index < start:
+        return False
+    if cache is not None and input_key:
+        stage_key = pipeline.stage_keys(input_key)[index]
+        if stage_key and cache.contains("stage", stage_key):
+            return False
+    return prefetch_credit_score_ocr(
+        doc, settings.get("huawei_token"), settings.get("huawei_project_id"),
+        settings.get("huawei_project", "cn-north-4"), dispatcher, open_result_cache(settings))
+
+
+def prefetch_file_ocr(pdf_path, source, settings):
+    """
+    提前提交一个还没开始处理的文件的OCR请求（串行处理时由 run_batch 调用）
+    source 为 open_input_file 的结果 (缓冲区, sha256)，随后处理该文件时原样交给 process_pdf_file，
+    文件只映射和计算哈希一次。只删除首尾页并取出信用分图片，不执行任何编辑；结果缓存中已有输出时不提交。
+    """
+    if open_ocr_dispatcher(settings) is None:
+        return False
+    pdf_buffer, sha256 = source
+    try:
+        cache = open_result_cache(settings)
+        key = result_cache_key(sha256, settings)
+        if cache is not None and key and cache.contains("result", key):
+            return False
+        doc = fitz.open(stream=pdf_buffer, filetype="pdf")
+        try:
+            if len(doc) <= 2:
+                return False
+            remove_first_and_last_pages_in_doc(doc)
+            base_name = os.path.splitext(os.path.basename(pdf_path))[0]
+            pipeline = build_default_pipeline(base_name, settings, lambda message: None)
+            stage_cache = open_stage_cache(settings)
+            input_key = stage_input_key(sha256) if stage_cache is not None else None
+            return prefetch_ocr(pipeline, doc, settings, stage_cache, input_key)
+        finally:
+            doc.close()
+    except Exception as e:
+        print(f"提前提交OCR请求失败 {os.path.basename(pdf_path)}: {e}")
+        return False
+
+
+def result_cache_key(sha256, settings):
+    """
+    整份输出的缓存键：输入内容哈希 + 设置指纹 + 实际使用的更新日期（未指定时为今天）
+    没有设置指纹（未经 run_batch 或监控模式调用）、或需要把提取的图片保存到磁盘时返回 None，不使用结果缓存。
+    """
+    fingerprint = settings.get("settings_fingerprint")
+    if not settings.get("result_cache") or not fingerprint or settings.get("image_output_dir"):
+        return None
+    return content_key(sha256, fingerprint, effective_update_date(settings))
+
+
+def effective_update_date(settings):
+    """可视化图片中实际使用的更新日期（未指定时为今天），格式 YYYY-MM-DD"""
+    update_date = settings.get("update_date") or datetime.now()
+    if hasattr(update_date, "strftime"):
+        update_date = update_date.strftime("%Y-%m-%d")
+    return str(update_date)
+
+
+def run_pdf_file_job(pdf_path, output_path, settings):
+    """工作进程入口：缓存状态信息，处理完成后连同结果和日志信息一起返回给主进程"""
+    messages = []
+    record = {}
+    result = process_pdf_file(pdf_path, output_path, settings, messages.append, record)
+    return result, messages, record
+
+
+# 工作进程中常驻的对象（由 warm_up_worker 设置）: rule_plan
+_WORKER_STATE = {}
+
+
+def warm_up_worker(rule_plan=None):
+    """
+    工作进程初始化：预先加载 matplotlib（信用分绘图），保存本批编译好的规则（包括已解码、预缩放的 logo），
+    并把规则使用的字体读入进程级字体缓存（get_cached_font），
+    让每个文件的处理时间只包含真正的编辑工作，而不是冷启动时间。
+    规则只在这里传给每个工作进程一次，之后的任务不再携带规则（见 worker_settings）。
+    """
+    try:
+        import credit_score_visualizer  # noqa: F401  会导入 matplotlib 并设置中文字体
+        import matplotlib.font_manager
+        _ = matplotlib.font_manager.fontManager
+    except Exception as e:
+        print(f"预加载 matplotlib 失败: {e}")
+    if rule_plan is None:
+        return
+    _WORKER_STATE["rule_plan"] = rule_plan
+    for font_file in rule_plan.font_files:
+        try:
+            get_cached_font(font_file)
+        except Exception as e:
+            print(f"预加载字体 {font_file} 失败: {e}")
+
+
+def wait_for_workers(barrier, timeout=None):
+    """
+    预热任务：在屏障处等待，直到所有预热任务都已到达（见 pdf_watch.HotFolderWatcher.run_forever）
+    每个预热任务都会占住一个工作进程，所以 N 个任务一定分别在 N 个已完成初始化（warm_up_worker）的进程中执行。
+    返回本进程的进程ID
+    """
+    barrier.wait(timeout)
+    return os.getpid()
+
+
+def worker_settings(settings):
+    """发给工作进程的任务设置：规则已在 warm_up_worker 中传入，任务中不再重复携带"""
+    return dict(settings, rule_plan=None, shard_workers=1)
+
+
+def run_batch(pdf_files, output_dir, settings, employee_id=None, employee_name=None, worker_count=1,
+              status_callback=None, progress_callback=None):
+    """
+    批量处理PDF文件
+
+    参数:
+        pdf_files: 输入PDF路径列表
+        output_dir: 输出目录
+        settings: 批处理设置字典（见模块开头说明）
+        employee_id / employee_name: 用于输出文件名前缀
+        worker_count: 工作进程数，1 表示在当前线程串行处理，0 表示按CPU核数自动选择
+                      文件数少于进程数时（例如只有一个几百页的大文件），
+                      多余的进程用于大文档的按页分片处理（需设置 shard_pages）
+        status_callback: 状态信息回调
+        progress_callback: 进度回调（0-100）
+
+    返回:
+        results: {pdf_path: "ok" / "skipped" / "error"}
+    """
+    emit = status_callback or print
+    report_progress = progress_callback or (lambda value: None)
+    total_files = len(pdf_files)
+    results = {}
+    if total_files == 0:
+        return results
+
+    # 编辑规则每个批次只编译一次，随设置一起传给各个文件（包括工作进程）
+    settings = dict(settings)
+    rules_config = load_rules()
+    if settings.get("rule_plan") is None:
+        settings["rule_plan"] = compile_rules(rules_config, settings.get("region_code"), emit)
+
+    # 设置指纹：批处理日志和结果缓存据此判断之前的结果是否仍然有效
+    settings["settings_fingerprint"] = batch_fingerprint(
+        settings, rules_config, make_output_prefix(employee_id, employee_name))
+
+    # 批处理日志：跳过上次已经完成的文件，只处理新文件和失败的文件
+    journal = None
+    if settings.get("resume_batches", True):
+        journal = BatchJournal(output_dir, settings["settings_fingerprint"])
+    pending = []
+    for pdf_path in pdf_files:
+        entry = journal.completed(pdf_path) if journal else None
+        if entry:
+            results[pdf_path] = entry["result"]
+            target = os.path.basename(entry["output"]) if entry.get("output") else entry["result"]
+            emit(f"已完成（批处理日志），跳过: {os.path.basename(pdf_path)} -> {target}")
+        else:
+            pending.append(pdf_path)
+    if len(pending) < total_files:
+        emit(f"批处理日志: {total_files - len(pending)} 个文件已完成，本次处理 {len(pending)} 个")
+    completed = total_files - len(pending)
+    if not pending:
+        report_progress(100)
+        return results
+
+    writer = OutputWriter(output_dir, settings.get("fsync_outputs", False))
+    output_paths = plan_output_paths(pending, output_dir, employee_id, employee_name, writer)
+    workers = resolve_worker_count(worker_count, len(pending))
+
+    def finish_file(pdf_path, output_path, result, record):
+        nonlocal completed
+        results[pdf_path] = result
+        if journal:
+            journal.record(pdf_path, result, output_path, record.get("sha256"), record.get("stages"))
+        completed += 1
+        # 更新进度（即使出错也要更新进度）
+        report_progress(int(completed / total_files * 100))
+
+    try:
+        if workers <= 1:
+            # 文件级不并行时，把进程用于单个大文档内部的分片并行
+            if settings.get("shard_pages"):
+                try:
+                    requested = int(worker_count or 0)
+                except (TypeError, ValueError):
+                    requested = 0
+                settings["shard_workers"] = requested if requested > 0 else (os.cpu_count() or 1)
+            # 当前文件编辑期间，后续几个文件的OCR请求已在后台等待网络；
+            # 提前映射的文件保持映射到处理完该文件为止（路径 -> (ExitStack, (缓冲区, sha256))）
+            prefetched = {}
+            lookahead = int(settings.get("ocr_max_in_flight", DEFAULT_MAX_IN_FLIGHT) or 0)
+            if open_ocr_dispatcher(settings) is None:
+                lookahead = 0
+            try:
+                for index, (pdf_path, output_path) in enumerate(zip(pending, output_paths)):
+                    for ahead_path in pending[index + 1:index + 1 + lookahead]:
+                        if ahead_path not in prefetched:
+                            stack = contextlib.ExitStack()
+                            try:
+                                source = stack.enter_context(open_input_file(ahead_path))
+                            except Exception as e:
+                                stack.close()
+                                source = None
+                                print(f"提前提交OCR请求失败 {os.path.basename(ahead_path)}: {e}")
+                            prefetched[ahead_path] = (stack, source)
+                            if source is not None:
+                                prefetch_file_ocr(ahead_path, source, settings)
+                    stack, source = prefetched.pop(pdf_path, (None, None))
+                    try:
+                        record = {}
+                        result = process_pdf_file(pdf_path, output_path, settings, emit, record, source)
+                    finally:
+                        if stack is not None:
+                            stack.close()
+                    finish_file(pdf_path, output_path, result, record)
+            finally:
+                for stack, _ in prefetched.values():
+                    stack.close()
+        else:
+            emit(f"使用 {workers} 个进程并行处理 {len(pending)} 个文件")
+            with concurrent.futures.ProcessPoolExecutor(
+                    max_workers=workers, initializer=warm_up_worker, initargs=(settings["rule_plan"],)) as executor:
+                task_settings = worker_settings(settings)
+                futures = {
+                    executor.submit(run_pdf_file_job, pdf_path, output_path, task_settings):
+                        (pdf_path, output_path)
+                    for pdf_path, output_path in zip(pending, output_paths)
+                }
+                for future in concurrent.futures.as_completed(futures):
+                    pdf_path, output_path = futures[future]
+                    try:
+                        result, messages, record = future.result()
+                        for message in messages:
+                            emit(message)
+                    except Exception as e:
+                        # 工作进程异常退出等情况
+                        result, record = "error", {}
+                        emit(f"✗ 错误 {os.path.basename(pdf_path)}: {str(e)}")
+                    finish_file(pdf_path, output_path, result, record)
+    finally:
+        if journal:
+            journal.close()
+    _finish_outputs(writer, pending, output_paths, results, emit)
+    return results
+
+
+def batch_fingerprint(settings, rules_config, prefix=""):
+    """
+    影响输出结果的批处理设置的指纹（用于批处理日志和结果缓存，设置改变后之前的结果不再有效）
+    包含规则引用的 logo 图片和字体文件的内容（见 pdf_rules.rules_fingerprint）以及是否执行OCR，
+    替换资源文件或获取到Token后之前的结果都不再复用。
+    更新日期使用实际画在信用分图片中的日期（未指定时为今天，见 effective_update_date），
+    第二天续跑同一批文件时，之前完成的文件（图片中是前一天的日期）会重新处理。
+    """
+    rule_plan = settings.get("rule_plan")
+    return settings_fingerprint({
+        "rules": rules_config,
+        "rules_fingerprint": (rule_plan.fingerprint if rule_plan is not None
+                              else rules_fingerprint(rules_config, settings.get("region_code"))),
+        "region_code": settings.get("region_code"),
+        "update_date": effective_update_date(settings),
+        "ocr": bool(settings.get("huawei_token")),
+        "image_output_dir": settings.get("image_output_dir"),
+        "save_profile": settings.get("save_profile", "standard"),
+        "subset_fonts": settings.get("subset_fonts", True),
+        "prefix": prefix,
+    })
+
+
+def _finish_outputs(writer, pdf_files, output_paths, results, emit):
+    """批次结束：释放没有生成输出的文件名，需要时把本批的输出文件统一刷到磁盘"""
+    written = []
+    for pdf_path, output_path in zip(pdf_files, output_paths):
+        if results.get(pdf_path) == "ok":
+            written.append(output_path)
+        else:
+            writer.release(output_path)
+    if writer.sync(written):
+        emit(f"已将 {len(written)} 个输出文件写入磁盘（fsync）")
@@ -0,0 +1,214 @@
+"""
+PDF批量处理命令行入口（无界面）
+复用与GUI相同的编辑流水线，但完全不导入 PyQt5，适合在 Linux 服务器或容器中运行。
+
+使用方法:
+    python pdf_batch_cli.py <输入目录/文件/通配符>... -o <输出目录>
+        [--employee-id 工号] [--employee-name 姓名] [--region-code 地区编码]
+        [--update-date YYYY-MM-DD] [--jobs N] [--shard-pages N] [--image-output-dir 目录] [--no-ocr]
+        [--save-profile fast|standard|compact] [--save-report] [--fsync] [--no-resume] [--cache | --no-cache] [--stage-cache]
+        [--ocr-in-flight N]
+
+    常驻监控模式（处理持续放入输入目录的PDF）:
+    python pdf_batch_cli.py --watch <输入目录> -o <输出目录> [--jobs N]
+
+未指定的工号、姓名、地区编码会从 pdf_processor_config.json 中读取。
+"""
+import os
+import sys
+import glob
+import argparse
+from datetime import datetime
+
+
+def _setup_matplotlib_cache():
+    """设置 matplotlib 缓存目录到应用目录（必须在导入 matplotlib 之前调用）"""
+    try:
+        from pdf_pipeline import get_base_dir
+        cache_dir = os.path.join(get_base_dir(), '.matplotlib')
+        os.makedirs(cache_dir, exist_ok=True)
+        os.environ.setdefault('MPLCONFIGDIR', cache_dir)
+    except Exception:
+        pass
+
+
+def collect_pdf_files(inputs):
+    """
+    展开输入参数为PDF文件列表
+    支持目录（取目录下所有 .pdf 文件）、通配符和单个文件，结果去重并保持顺序
+    """
+    pdf_files = []
+    seen = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            candidates = sorted(
+                os.path.join(item, name) for name in os.listdir(item)
+                if name.lower().endswith(".pdf")
+            )
+        elif glob.has_magic(item):
+            candidates = sorted(glob.glob(item))
+        else:
+            candidates = [item]
+        for path in candidates:
+            path = os.path.normpath(path)
+            if path not in seen and os.path.isfile(path):
+                seen.add(path)
+                pdf_files.append(path)
+            elif not os.path.exists(path):
+                print(f"警告: 输入文件不存在: {path}")
+    return pdf_files
+
+
+def parse_update_date(value):
+    """解析 --update-date 参数（YYYY-MM-DD）"""
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"日期格式应为 YYYY-MM-DD: {value}")
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="PDF页面修改工具（命令行批处理）")
+    parser.add_argument("inputs", nargs="+", help="输入PDF文件、目录或通配符")
+    parser.add_argument("-o", "--output-dir", required=True, help="输出目录")
+    parser.add_argument("--image-output-dir", default="", help="提取图片的保存目录（默认不保存，图片只在内存中处理）")
+    parser.add_argument("--employee-id", help="工号（默认读取配置文件）")
+    parser.add_argument("--employee-name", help="姓名（默认读取配置文件）")
+    parser.add_argument("--region-code", help="地区编码（默认读取配置文件）")
+    parser.add_argument("--update-date", type=parse_update_date, default=None,
+                        help="信用分图片中的更新日期，格式 YYYY-MM-DD（默认今天）")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="并行进程数，0 表示按CPU核数自动选择（默认读取配置文件）")
+    parser.add_argument("--shard-pages", type=int, default=None,
+                        help="单个大文档超过该页数时按页分片并行处理，0 表示不分片（默认读取配置文件）")
+    parser.add_argument("--save-profile", choices=["fast", "standard", "compact"], default=None,
+                        help="保存配置：fast 最快、compact 输出最小（默认读取配置文件，为 standard）")
+    parser.add_argument("--save-report", action="store_true",
+                        help="保存每个文件前输出各保存配置的耗时和输出大小对比")
+    parser.add_argument("--fsync", action="store_true",
+                        help="每批结束时把输出文件刷到磁盘（fsync，默认读取配置文件）")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="忽略输出目录中的批处理日志，重新处理所有文件")
+    parser.add_argument("--cache", action="store_true",
+                        help="使用结果缓存：重复的文件直接复用之前的输出（包括文档编码），OCR结果和信用分图片也按内容复用"
+                             "（默认读取配置文件，为关闭）")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="不使用结果缓存（输出、OCR结果和信用分图片都重新生成）")
+    parser.add_argument("--stage-cache", action="store_true",
+                        help="缓存每条编辑规则的输出，修改规则后只重新执行受影响的规则（默认读取配置文件）")
+    parser.add_argument("--ocr-in-flight", type=int, default=None,
+                        help="每个进程同时在途的OCR请求数，0 表示同步调用（默认读取配置文件）")
+    parser.add_argument("--no-ocr", action="store_true", help="不获取华为云Token，跳过OCR和信用分图片替换")
+    parser.add_argument("--watch", action="store_true",
+                        help="常驻监控模式：持续处理放入输入目录的新PDF，原文件处理后移到 processed/ 或 failed/")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="监控模式的轮询间隔（秒，默认2）")
+    parser.add_argument("--settle-seconds", type=float, default=3.0,
+                        help="监控模式下文件保持不变多久后才开始处理（秒，默认3）")
+    return parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    _setup_matplotlib_cache()
+
+    from pdf_config import load_config
+    from pdf_batch import run_batch, make_batch_settings
+    from huawei_ocr import get_huawei_token
+
+    config = load_config()
+    employee_id = args.employee_id if args.employee_id is not None else config.get("employee_id", "")
+    employee_name = args.employee_name if args.employee_name is not None else config.get("employee_name", "")
+    region_code = args.region_code if args.region_code is not None else config.get("region_code", "")
+    worker_count = args.jobs if args.jobs is not None else config.get("worker_count", 0)
+    if args.shard_pages is not None:
+        config["shard_pages"] = args.shard_pages
+    if args.save_profile is not None:
+        config["save_profile"] = args.save_profile
+    if args.save_report:
+        config["save_report"] = True
+    if args.fsync:
+        config["fsync_outputs"] = True
+    if args.no_resume:
+        config["resume_batches"] = False
+    if args.cache:
+        config["result_cache"] = True
+    if args.stage_cache:
+        # 阶段缓存与结果缓存共用缓存目录
+        config["result_cache"] = True
+        config["stage_cache"] = True
+    if args.no_cache:
+        config["result_cache"] = False
+    if args.ocr_in_flight is not None:
+        config["ocr_max_in_flight"] = args.ocr_in_flight
+
+    if args.watch and (len(args.inputs) != 1 or os.path.isfile(args.inputs[0])):
+        print("错误: 监控模式需要且只能指定一个输入目录")
+        return 2
+
+    output_dir = os.path.normpath(args.output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    image_output_dir = os.path.normpath(args.image_output_dir) if args.image_output_dir else ""
+    if image_output_dir:
+        os.makedirs(image_output_dir, exist_ok=True)
+
+    # 获取华为云Token（用于OCR识别信用分）
+    token_provider = None
+    if not args.no_ocr:
+        username = config.get("huawei_username", "")
+        domain = config.get("huawei_domain", "")
+        password = config.get("huawei_password", "")
+        if username and domain and password:
+            def token_provider():
+                return get_huawei_token(username, domain, password, config.get("huawei_project", "cn-north-4"))
+        else:
+            print("提示: 未配置华为云账号信息，Token获取已跳过")
+
+    if args.watch:
+        from pdf_watch import HotFolderWatcher
+        # 监控模式下不指定日期时，每个文件使用处理当天的日期（由流水线取当前时间）
+        settings = make_batch_settings(config, image_output_dir, args.update_date, region_code)
+        watcher = HotFolderWatcher(
+            args.inputs[0],
+            output_dir,
+            settings,
+            employee_id=employee_id,
+            employee_name=employee_name,
+            worker_count=worker_count,
+            poll_interval=args.poll_interval,
+            settle_seconds=args.settle_seconds,
+            token_provider=token_provider,
+        )
+        watcher.run_forever()
+        return 0
+
+    pdf_files = collect_pdf_files(args.inputs)
+    if not pdf_files:
+        print("错误: 未找到任何PDF文件")
+        return 2
+
+    settings = make_batch_settings(
+        config,
+        image_output_dir,
+        args.update_date or datetime.now(),
+        region_code,
+        token_provider() if token_provider else None,
+    )
+    results = run_batch(
+        pdf_files,
+        output_dir,
+        settings,
+        employee_id=employee_id,
+        employee_name=employee_name,
+        worker_count=worker_count,
+        progress_callback=lambda value: print(f"进度: {value}%"),
+    )
+
+    ok_count = sum(1 for r in results.values() if r == "ok")
+    skipped_count = sum(1 for r in results.values() if r == "skipped")
+    error_count = sum(1 for r in results.values() if r == "error")
+    print(f"\n✓ 处理完成: 成功 {ok_count} 个，跳过 {skipped_count} 个，失败 {error_count} 个")
+    return 1 if error_count else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
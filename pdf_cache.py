@@ -0,0 +1,166 @@
+"""
+内容寻址的结果缓存
+同一份信用报告经常被重复提交，操作人员也经常在同一批中选中同一个文件两次。
+缓存以内容哈希为键保存在磁盘上，命中时直接复用之前的结果，而不是重新处理：
+  - result: 整份输出PDF，键为输入文件内容哈希 + 影响输出的批处理设置（更新日期、文件名前缀、地区编码、规则等）
+  - ocr:    华为云OCR识别结果，键为图片内容哈希
+  - chart:  信用分可视化图片，键为分数 + 更新日期
+
+缓存目录有总大小上限，超过上限时按最近使用时间（LRU，命中时更新文件修改时间）删除最久未用的条目，
+适合放在笔记本电脑的磁盘上。多个工作进程可以同时读写同一个缓存目录：
+每个条目先写入临时文件再改名，读取时条目被其他进程删除只会当作未命中。
+默认目录在当前用户的缓存目录下（见 default_cache_dir），而不是程序目录（打包后的程序目录可能只读）。
+
+注意: 页眉文档编码（地区编码-六位随机数）每次处理时随机生成，不属于缓存键。
+命中 result 缓存时输出的是之前那次处理的结果，其中的文档编码也与之前的输出相同。
+
+本模块只依赖标准库。
+"""
+import os
+import sys
+import time
+import hashlib
+
+# 默认的缓存大小上限（MB）
+DEFAULT_CACHE_MB = 512
+
+# 用户缓存目录下的子目录名
+CACHE_DIR_NAME = "PDFProcessor"
+
+
+def default_cache_dir():
+    """
+    当前用户的缓存目录:
+        Windows: %LOCALAPPDATA%\\PDFProcessor\\result_cache
+        macOS:   ~/Library/Caches/PDFProcessor/result_cache
+        其他:    $XDG_CACHE_HOME（默认 ~/.cache）/PDFProcessor/result_cache
+    """
+    if sys.platform.startswith("win"):
+        base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), "AppData", "Local")
+    elif sys.platform == "darwin":
+        base = os.path.join(os.path.expanduser("~"), "Library", "Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, CACHE_DIR_NAME, "result_cache")
+
+
+def content_key(*parts):
+    """把若干部分（字节串或字符串）合成一个缓存键（SHA-256 十六进制）"""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        digest.update(hashlib.sha256(part).digest())
+    return digest.hexdigest()
+
+
+class ContentCache:
+    """
+    磁盘上的内容寻址缓存
+
+    参数:
+        cache_dir: 缓存目录
+        max_bytes: 缓存总大小上限（字节）
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_CACHE_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_bytes)
+        self._written = 0  # 本进程上次整理之后写入的字节数
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, namespace, key):
+        return os.path.join(self.cache_dir, namespace, key[:2], key)
+
+    def get(self, namespace, key):
+        """返回缓存的数据，未命中时返回 None"""
+        path = self._path(namespace, key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)  # 记录最近使用时间
+        except OSError:
+            pass
+        self.hits += 1
+        return data
+
+    def contains(self, namespace, key):
+        """条目是否存在（不读取数据，不计入命中统计）"""
+        return os.path.exists(self._path(namespace, key))
+
+    def put(self, namespace, key, data):
+        """写入缓存条目（数据大于缓存上限时不缓存）"""
+        if not data or len(data) > self.max_bytes:
+            return
+        path = self._path(namespace, key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"写入缓存失败: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        # 每写入上限的十分之一整理一次，而不是每次写入都扫描整个缓存目录
+        self._written += len(data)
+        if self._written >= self.max_bytes // 10:
+            self.trim()
+
+    def _entries(self):
+        entries = []
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def trim(self):
+        """总大小超过上限时删除最久未用的条目，直到降到上限的 90%，返回删除的条目数"""
+        self._written = 0
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return 0
+        target = self.max_bytes * 0.9
+        removed = 0
+        now = time.time()
+        for mtime, size, path in sorted(entries):
+            if total <= target:
+                break
+            # 其他进程正在写入的临时文件（一小时内）不删除
+            if path.endswith(".tmp") and now - mtime < 3600:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+
+# 进程级缓存对象：缓存目录 -> ContentCache
+_CACHES = {}
+
+
+def get_cache(cache_dir, max_mb=DEFAULT_CACHE_MB):
+    """返回该目录的缓存对象（同一进程内共用一个，写入量统计才准确）"""
+    cache = _CACHES.get(cache_dir)
+    if cache is None:
+        cache = ContentCache(cache_dir, max(1, int(max_mb)) * 1024 * 1024)
+        _CACHES[cache_dir] = cache
+    return cache
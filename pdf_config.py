@@ -0,0 +1,121 @@
+"""
+配置文件读写
+配置文件 pdf_processor_config.json 保存在程序目录下，GUI 和命令行入口共用。
+本模块不依赖 PyQt5。
+"""
+import os
+import json
+from pdf_pipeline import get_base_dir
+
+# 配置文件路径（保存在程序目录下）
+CONFIG_FILE = os.path.join(get_base_dir(), "pdf_processor_config.json")
+
+
+def load_config():
+    """加载配置文件"""
+    default_config = {
+        "output_dir": "",
+        "image_output_dir": "",
+        "huawei_username": "tckeke123cck",
+        "huawei_domain": "hid_46npa4c6rmavfjz",
+        "huawei_password": "cc961121",
+        "huawei_project": "cn-east-3",
+        "huawei_project_id":"17bd5a8f587e44718ce0a9981d1893ff",
+        "employee_id": "",
+        "employee_name": "",
+        "region_code": "",
+        "worker_count": 0,  # 并行处理的进程数，0 表示按CPU核数自动选择
+        "ocr_max_in_flight": 4,  # 每个进程同时在途的OCR请求数（后台发送，与PDF编辑重叠），0 表示同步调用
+        "shard_pages": 0,  # 超过该页数的单个大文档按页分片并行处理（输出与不分片时渲染一致，但不是逐字节相同），0 表示不分片（默认）
+        "subset_fonts": True,  # 保存时只嵌入用到的字形（中文字体完整嵌入会使输出文件增大数MB）
+        "save_profile": "standard",  # 保存配置: fast（最快）/ standard / compact（最小）
+        "fsync_outputs": False,  # 每批结束时把输出文件刷到磁盘（fsync），断电时不丢失已完成的文件
+        "resume_batches": True,  # 在输出目录记录批处理日志，重新运行同一批文件时跳过已完成的文件
+        "result_cache": False,  # 按内容缓存输出、OCR结果和信用分图片，重复提交的文件直接复用之前的结果（包括其中的文档编码）
+        "stage_cache": False,  # 另外缓存每条编辑规则的输出，修改规则后只重新执行受影响的规则（每个文件多保存几次，默认关闭）
+        "result_cache_dir": "",  # 缓存目录，为空时为当前用户的缓存目录（见 pdf_cache.default_cache_dir）
+        "result_cache_mb": 512  # 缓存大小上限（MB），超过时删除最久未用的条目
+    }
+    
+    if os.path.exists(CONFIG_FILE):
+        try:
+            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+                # 确保所有必需的字段都存在，如果不存在则使用默认值
+                for key, default_value in default_config.items():
+                    if key not in config:
+                        config[key] = default_value
+                # 如果配置文件缺少字段，自动保存更新后的配置
+                if any(key not in config for key in default_config.keys()):
+                    try:
+                        with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
+                            json.dump(config, f, ensure_ascii=False, indent=2)
+                    except:
+                        pass  # 如果保存失败，继续使用内存中的配置
+                return config
+        except Exception as e:
+            print(f"加载配置文件失败: {e}")
+            return default_config
+    else:
+        # 如果配置文件不存在，创建默认配置文件
+        try:
+            with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
+                json.dump(default_config, f, ensure_ascii=False, indent=2)
+        except:
+            pass
+        return default_config
+
+
+def save_config(output_dir="", image_output_dir="", huawei_username="", huawei_domain="", huawei_password="", huawei_project=""):
+    """保存配置文件（只更新这些字段，配置文件中的其他设置保持不变）"""
+    config = load_config()
+    config["output_dir"] = output_dir
+    config["image_output_dir"] = image_output_dir
+    # 如果只传了output_dir和image_output_dir，保留现有的华为云配置
+    if not (huawei_username == "" and huawei_domain == "" and huawei_password == ""):
+        config["huawei_username"] = huawei_username
+        config["huawei_domain"] = huawei_domain
+        config["huawei_password"] = huawei_password
+        config["huawei_project"] = huawei_project
+    try:
+        with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
+            json.dump(config, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        print(f"保存配置文件失败: {e}")
+
+
+def save_login_info(employee_id, employee_name, region_code):
+    """保存登录信息到配置文件"""
+    config = load_config()
+    config["employee_id"] = employee_id
+    config["employee_name"] = employee_name
+    config["region_code"] = region_code
+    try:
+        with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
+            json.dump(config, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        print(f"保存登录信息失败: {e}")
+
+
+def save_worker_count(worker_count):
+    """保存并行进程数到配置文件"""
+    config = load_config()
+    config["worker_count"] = worker_count
+    try:
+        with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
+            json.dump(config, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        print(f"保存并行进程数失败: {e}")
+
+
+def clear_login_info():
+    """清除登录信息"""
+    config = load_config()
+    config["employee_id"] = ""
+    config["employee_name"] = ""
+    config["region_code"] = ""
+    try:
+        with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
+            json.dump(config, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        print(f"清除登录信息失败: {e}")
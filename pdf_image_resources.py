@@ -0,0 +1,103 @@
+"""
+共享图片资源
+以前每页都调用 page.insert_image(..., filename=logo_path)，每次都要重新读取和解码 logo 文件。
+现在 logo 在每批处理开始时读取、解码一次，并按目标显示尺寸预先缩小（超过所需分辨率的像素没有意义），
+每份文档中只在第一次使用时插入图片数据，之后的页面直接引用同一个图片对象（xref）。
+
+用法:
+    logo = ImageResource(path, box=(64, 64))   # 每批一次
+    placed = {}                                # 每份文档一个
+    logo.insert(page, rect, placed)            # 每页
+
+显示尺寸要到页面上才知道时（例如按原 logo 区域放大替换），批处理开始时不指定 box，
+每页用 logo.fitted(rect) 取得按该尺寸预缩放的版本（同一尺寸只缩放一次）。
+
+本模块只依赖 PyMuPDF。
+"""
+import os
+import fitz  # PyMuPDF
+
+# 预缩放的目标分辨率（打印质量）
+DEFAULT_DPI = 300
+
+
+class ImageResource:
+    """
+    读取一次、可在多份文档中重复插入的图片
+
+    参数:
+        path: 图片文件路径
+        box:  可选，图片最大显示尺寸 (宽, 高)，单位为点；图片像素超过 box 在 dpi 下所需的像素时预先缩小
+        dpi:  预缩放的目标分辨率
+    """
+
+    def __init__(self, path, box=None, dpi=DEFAULT_DPI, data=None):
+        self.path = path
+        self.name = os.path.basename(path)
+        if data is None:
+            with open(path, "rb") as f:
+                data = f.read()
+        self.source = data  # 原图数据（fitted 从原图重新缩放）
+        self.stream = data
+        self.dpi = dpi
+        self.key = (os.path.abspath(path), box, dpi)
+        self._variants = {}  # 显示尺寸 -> 按该尺寸预缩放的 ImageResource
+
+        pix = fitz.Pixmap(self.stream)
+        self.width, self.height = pix.width, pix.height
+        if box:
+            self._prescale(pix, box, dpi)
+
+    def _prescale(self, pix, box, dpi):
+        # keep_proportion 插入时图片按比例放入 box，实际显示尺寸取决于较紧的一边
+        box_width, box_height = box
+        ratio = min(box_width / pix.width, box_height / pix.height)
+        needed_width = pix.width * ratio / 72 * dpi
+        needed_height = pix.height * ratio / 72 * dpi
+        if pix.width <= needed_width and pix.height <= needed_height:
+            return
+
+        width = max(1, int(round(needed_width)))
+        height = max(1, int(round(needed_height)))
+        scaled = fitz.Pixmap(pix, width, height)
+        # 有透明通道或原图不是 JPEG 时保存为 PNG（无损），JPEG 原图仍保存为 JPEG
+        if scaled.alpha or not self.stream.startswith(b"\xff\xd8"):
+            stream = scaled.tobytes("png")
+        else:
+            stream = scaled.tobytes("jpeg", jpg_quality=90)
+        if len(stream) < len(self.stream):
+            print(
+                f"图片 {self.name} 已预缩放: {pix.width}x{pix.height} -> {width}x{height}，"
+                f"{len(self.stream)} -> {len(stream)} 字节"
+            )
+            self.stream = stream
+            self.width, self.height = width, height
+
+    def fitted(self, rect):
+        """返回按 rect 的尺寸（在 dpi 下）预缩放的图片，同一尺寸只缩放一次"""
+        box = (round(rect.width, 1), round(rect.height, 1))
+        variant = self._variants.get(box)
+        if variant is None:
+            variant = ImageResource(self.path, box, self.dpi, self.source)
+            self._variants[box] = variant
+        return variant
+
+    def insert(self, page, rect, placed=None, keep_proportion=True):
+        """
+        在 page 的 rect 区域插入图片
+
+        参数:
+            placed: 同一份文档共用的字典（资源 -> xref）；文档中已经插入过该图片时直接引用原图片对象
+
+        返回:
+            xref: 图片对象的 xref
+        """
+        xref = placed.get(self.key) if placed is not None else None
+        if xref:
+            page.insert_image(rect, xref=xref, keep_proportion=keep_proportion)
+            return xref
+
+        xref = page.insert_image(rect, stream=self.stream, keep_proportion=keep_proportion)
+        if placed is not None:
+            placed[self.key] = xref
+        return xref
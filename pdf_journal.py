@@ -0,0 +1,135 @@
+"""
+批处理日志（断点续跑）
+以前程序崩溃或窗口被关闭时（例如处理到 600 个文件中的第 340 个），没有任何记录说明哪些文件已经完成，
+重新运行只能从头开始，而且因为 _processed_N 后缀逻辑，已完成的文件会再生成一份重复的输出。
+
+现在每批在输出目录中维护一个只追加的日志文件 .pdf_batch_journal.jsonl，
+每处理完一个文件追加一行，记录输入文件的路径、大小、修改时间、内容哈希、各阶段的执行结果和输出路径。
+重新运行同一批文件时，启动时读取一次日志建立索引，每个文件只需一次 stat 和一次字典查找即可判断是否已完成：
+已成功（或因页数不足被跳过）且输出文件仍然存在的文件直接跳过，失败的文件重新处理。
+
+日志按批处理设置的指纹区分：规则文件、地区编码、保存配置等改变后，旧记录不再视为完成。
+
+本模块只依赖标准库。
+"""
+import os
+import json
+import time
+import hashlib
+
+JOURNAL_NAME = ".pdf_batch_journal.jsonl"
+
+# 视为已完成的结果（失败的文件下次重新处理）
+DONE_RESULTS = ("ok", "skipped")
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """计算文件内容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def settings_fingerprint(values):
+    """把影响输出结果的设置（可 JSON 序列化的值）合成一个指纹"""
+    data = json.dumps(values, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:16]
+
+
+class BatchJournal:
+    """
+    输出目录中的批处理日志
+
+    参数:
+        output_dir: 输出目录（日志文件保存在其中）
+        fingerprint: 批处理设置的指纹（见 settings_fingerprint）
+    """
+
+    def __init__(self, output_dir, fingerprint=""):
+        self.path = os.path.join(output_dir, JOURNAL_NAME)
+        self.fingerprint = fingerprint
+        self._entries = {}  # 输入文件绝对路径 -> 最近一条记录
+        self._file = None
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # 崩溃时最后一行可能只写了一半
+                        continue
+                    if isinstance(entry, dict) and entry.get("input"):
+                        self._entries[entry["input"]] = entry
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"读取批处理日志失败: {e}")
+
+    @staticmethod
+    def _key(pdf_path):
+        return os.path.normcase(os.path.abspath(pdf_path))
+
+    def completed(self, pdf_path):
+        """
+        返回该文件在本批设置下已完成的记录，没有完成时返回 None
+        文件大小和修改时间与记录一致时直接认定为同一内容；不一致时才重新计算内容哈希比较。
+        """
+        entry = self._entries.get(self._key(pdf_path))
+        if entry is None or entry.get("result") not in DONE_RESULTS:
+            return None
+        if entry.get("fingerprint") != self.fingerprint:
+            return None
+        output_path = entry.get("output")
+        if entry["result"] == "ok" and not (output_path and os.path.exists(output_path)):
+            return None
+        try:
+            stat = os.stat(pdf_path)
+        except OSError:
+            return None
+        if stat.st_size != entry.get("size"):
+            return None
+        if stat.st_mtime_ns != entry.get("mtime_ns"):
+            try:
+                if file_sha256(pdf_path) != entry.get("sha256"):
+                    return None
+            except OSError:
+                return None
+        return entry
+
+    def record(self, pdf_path, result, output_path=None, sha256=None, stages=None):
+        """追加一条记录（每个文件处理完成后调用），立即写入日志文件"""
+        key = self._key(pdf_path)
+        try:
+            stat = os.stat(pdf_path)
+            size, mtime_ns = stat.st_size, stat.st_mtime_ns
+        except OSError:
+            size, mtime_ns = None, None
+        entry = {
+            "input": key,
+            "size": size,
+            "mtime_ns": mtime_ns,
+            "sha256": sha256,
+            "fingerprint": self.fingerprint,
+            "result": result,
+            "output": os.path.abspath(output_path) if result == "ok" and output_path else None,
+            "stages": stages or {},
+            "finished": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        self._entries[key] = entry
+        try:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._file.flush()
+        except OSError as e:
+            print(f"写入批处理日志失败: {e}")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
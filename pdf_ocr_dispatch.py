@@ -0,0 +1,121 @@
+"""
+并发OCR请求
+以前信用分阶段在执行到OCR时才同步调用 call_huawei_ocr_api，最长等待30秒后才能绘图、插入图片，
+等待网络期间没有任何编辑工作在进行，批处理总时间接近 CPU 时间与网络等待时间之和。
+
+OCRDispatcher 把OCR请求交给一个有上限的线程池在后台发送（同时在途的请求数可配置）：
+  - 每个文件在删除首尾页后立即提交自己的OCR请求，执行编辑规则期间请求已在等待网络；
+  - 串行处理时还会提前提交后续几个文件的OCR请求（见 pdf_batch.run_batch），当前文件编辑期间它们已在等待网络。
+信用分阶段执行到OCR时按图片内容取用已提交请求的结果；没有提前提交时现在提交并等待，结果与同步调用相同。
+多个工作进程时每个进程各有一个线程池。
+已完成但没有被取用的结果（文件出错、被跳过，或结果已从OCR缓存读取）只保留最近的若干个，不会无限累积。
+
+本模块不依赖 PyQt5。
+"""
+import os
+import json
+import threading
+import collections
+import concurrent.futures
+from huawei_ocr import call_huawei_ocr_api
+from pdf_cache import content_key
+
+# 默认同时在途的OCR请求数（每个进程）
+DEFAULT_MAX_IN_FLIGHT = 4
+
+
+def _recognize(image_bytes, token, project_id, region, cache, key):
+    ocr_result = call_huawei_ocr_api(image_bytes, token, project_id, region)
+    if ocr_result and cache is not None:
+        cache.put("ocr", key, json.dumps(ocr_result, ensure_ascii=False).encode("utf-8"))
+    return ocr_result
+
+
+class OCRDispatcher:
+    """
+    在后台线程池中发送OCR请求
+
+    参数:
+        max_in_flight: 同时在途的请求数上限（线程池大小），超过时后提交的请求排队；
+                       已完成但未取用的结果最多保留 max_in_flight 的 4 倍，超过时丢弃最早完成的
+    """
+
+    def __init__(self, max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.max_unclaimed = self.max_in_flight * 4
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = {}  # 图片内容键 -> Future（结果被取用或丢弃后删除）
+        self._finished = collections.deque()  # 已完成的请求的 (图片内容键, Future)，按完成顺序
+
+    def _submit(self, image_bytes, token, project_id, region, cache):
+        key = content_key(image_bytes)
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return key, future
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_in_flight, thread_name_prefix="ocr")
+            future = self._executor.submit(_recognize, image_bytes, token, project_id, region, cache, key)
+            self._pending[key] = future
+        # 在锁外注册：请求已经完成时回调会在当前线程中立即执行，回调中还要获取锁
+        future.add_done_callback(lambda done, key=key: self._on_done(key, done))
+        return key, future
+
+    def _on_done(self, key, future):
+        """请求完成后记录下来；未取用的结果超过上限时丢弃最早完成的"""
+        with self._lock:
+            if self._pending.get(key) is not future:
+                return
+            self._finished.append((key, future))
+            while len(self._finished) > self.max_unclaimed:
+                old_key, old_future = self._finished.popleft()
+                if self._pending.get(old_key) is old_future:
+                    del self._pending[old_key]
+
+    def submit(self, image_bytes, token, project_id, region="cn-north-4", cache=None):
+        """提交OCR请求，不等待结果（相同图片的请求已在途时不重复提交）"""
+        return self._submit(image_bytes, token, project_id, region, cache)[1]
+
+    def result(self, image_bytes, token, project_id, region="cn-north-4", cache=None):
+        """
+        返回图片的OCR识别结果，失败时返回 None
+        该图片的请求已提前提交时等待它完成，否则现在提交并等待。
+        """
+        key, future = self._submit(image_bytes, token, project_id, region, cache)
+        try:
+            return future.result()
+        finally:
+            self._forget(key, future)
+
+    def discard(self, image_bytes):
+        """不再需要该图片的结果（例如已从OCR缓存读取），丢弃提前提交的请求"""
+        key = content_key(image_bytes)
+        with self._lock:
+            future = self._pending.get(key)
+        if future is not None:
+            self._forget(key, future)
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+            try:
+                self._finished.remove((key, future))
+            except ValueError:
+                pass
+
+
+# 进程级对象：(进程ID, 在途上限) -> OCRDispatcher（fork 出的工作进程不能使用父进程的线程池）
+_DISPATCHERS = {}
+
+
+def get_dispatcher(max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+    """返回本进程共用的 OCRDispatcher"""
+    key = (os.getpid(), max(1, int(max_in_flight)))
+    dispatcher = _DISPATCHERS.get(key)
+    if dispatcher is None:
+        dispatcher = OCRDispatcher(key[1])
+        _DISPATCHERS[key] = dispatcher
+    return dispatcher
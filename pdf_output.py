@@ -0,0 +1,99 @@
+"""
+输出文件管理
+以前为每个输出文件生成不重名的路径时，依次用 os.path.exists 检查 _processed、_processed_1、_processed_2 ...，
+输出目录中已有几千个文件时每个文件要检查很多次；多个进程同时检查时还可能选中同一个名称。
+
+OutputWriter 在批次开始时扫描一次输出目录，之后在内存中的名称索引里查找空闲名称，
+名称由主进程（或监控进程）加锁预留后再派发给工作进程，不会有两个文件选中同一个名称。
+输出文件先写入临时文件再改名（见 pdf_pipeline.write_output_file），
+可选在每批结束时统一 fsync 一次，而不是每写一个文件就 fsync 一次。
+
+本模块只依赖标准库。
+"""
+import os
+import threading
+
+
+class OutputWriter:
+    """
+    输出目录的名称索引
+
+    参数:
+        output_dir: 输出目录
+        fsync: 为 True 时 sync() 把输出文件和目录刷到磁盘
+    """
+
+    def __init__(self, output_dir, fsync=False):
+        self.output_dir = os.path.normpath(output_dir)
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._names = None  # 输出目录中已存在或已预留的文件名（os.path.normcase 后）
+
+    def _index(self):
+        if self._names is None:
+            try:
+                with os.scandir(self.output_dir) as entries:
+                    self._names = {os.path.normcase(entry.name) for entry in entries}
+            except FileNotFoundError:
+                self._names = set()
+        return self._names
+
+    def _claim(self, name):
+        """名称空闲时预留并返回 True"""
+        key = os.path.normcase(name)
+        names = self._index()
+        if key in names:
+            return False
+        names.add(key)
+        # 扫描之后其他程序可能已写入同名文件：只检查选中的这一个名称
+        if os.path.exists(os.path.join(self.output_dir, name)):
+            return False
+        return True
+
+    def reserve(self, base_name, prefix=""):
+        """
+        预留输出路径 {prefix}{base_name}_processed.pdf
+        已存在或已被预留时依次尝试 _processed_1、_processed_2 ...
+        """
+        with self._lock:
+            name = f"{prefix}{base_name}_processed.pdf"
+            idx = 1
+            while not self._claim(name):
+                name = f"{prefix}{base_name}_processed_{idx}.pdf"
+                idx += 1
+        return os.path.join(self.output_dir, name)
+
+    def release(self, output_path):
+        """文件没有生成（跳过或失败）时释放预留的名称"""
+        if os.path.exists(output_path):
+            return
+        with self._lock:
+            self._index().discard(os.path.normcase(os.path.basename(output_path)))
+
+    def sync(self, paths):
+        """把已写入的输出文件和输出目录刷到磁盘（fsync 为 False 时不做任何事），返回刷新的文件数"""
+        if not self.fsync:
+            return 0
+        count = 0
+        for path in paths:
+            try:
+                # Windows 上 fsync 需要以写方式打开
+                fd = os.open(path, os.O_RDWR)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+                count += 1
+            except OSError as e:
+                print(f"fsync 失败 {os.path.basename(path)}: {e}")
+        # 改名操作记录在目录中，目录也需要刷新（Windows 不支持打开目录）
+        if count and hasattr(os, "O_DIRECTORY"):
+            try:
+                fd = os.open(self.output_dir, os.O_RDONLY | os.O_DIRECTORY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            except OSError as e:
+                print(f"fsync 输出目录失败: {e}")
+        return count
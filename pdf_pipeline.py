@@ -0,0 +1,1758 @@
+"""
+PDF编辑流水线
+将各个编辑步骤实现为作用于同一个内存中 fitz.Document 的阶段（stage），
+整份文档只打开一次、只保存一次，避免每个步骤都重新解析和重写整个文件。
+
+本模块不依赖 PyQt5，GUI 线程和其他入口都可以直接复用。
+"""
+import io
+import os
+import sys
+import re
+import mmap
+import json
+import contextlib
+from datetime import datetime
+import time
+import inspect
+import concurrent.futures
+import fitz  # PyMuPDF
+from huawei_ocr import call_huawei_ocr_api
+from text_matcher import TextMatcher
+from pdf_text_index import DocumentTextIndex
+from pdf_image_resources import ImageResource
+from pdf_text_writer import PageTextWriter, text_width
+from pdf_cache import content_key
+
+
+def get_resource_path(relative_path):
+    """
+    获取资源文件的绝对路径
+    支持PyInstaller打包后的环境
+    """
+    try:
+        # PyInstaller打包后的临时目录
+        base_path = sys._MEIPASS
+    except Exception:
+        # 开发环境，使用脚本所在目录
+        base_path = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_path, relative_path)
+
+
+def get_base_dir():
+    """
+    获取程序基础目录（用于保存配置文件等）
+    打包后返回exe所在目录，开发环境返回脚本所在目录
+    """
+    if getattr(sys, 'frozen', False):
+        # 打包后的exe环境
+        return os.path.dirname(sys.executable)
+    else:
+        # 开发环境
+        return os.path.dirname(os.path.abspath(__file__))
+
+
+# ======================== 流水线 ========================
+
+class PipelineStage:
+    """流水线中的一个编辑阶段"""
+
+    def __init__(self, name, func, success_message=None, error_message=None, per_page=False,
+                 fingerprint=None, volatile=False, **kwargs):
+        """
+        参数:
+            name: 阶段名称（用于日志）
+            func: 阶段函数，签名为 func(doc, **kwargs)，返回文档是否被修改
+            success_message: 阶段执行完成后发出的状态信息（单条或列表）
+            error_message: 阶段出错时的状态信息前缀
+            per_page: 是否为逐页独立的阶段（每页的处理结果只取决于该页本身），
+                      逐页阶段可以按页分片并行执行，函数需接受 page_offset 参数
+            fingerprint: 阶段的输入参数和资源的指纹（字符串），用于阶段缓存；为 None 时该阶段及其后的阶段不缓存
+            volatile: 阶段依赖外部服务（如OCR），没有修改文档时可能只是暂时失败，结果不缓存
+            kwargs: 调用阶段函数时传入的参数
+
+        阶段函数如果接受 text_index 参数，运行时会传入流水线共享的文档文本索引（见 pdf_text_index）。
+        """
+        self.name = name
+        self.func = func
+        self.success_message = success_message
+        self.error_message = error_message or f"执行 {name} 时出错"
+        self.per_page = per_page
+        self.fingerprint = fingerprint
+        self.volatile = volatile
+        self.kwargs = kwargs
+        try:
+            self.uses_text_index = "text_index" in inspect.signature(func).parameters
+        except (TypeError, ValueError):
+            self.uses_text_index = False
+
+    def success_messages(self):
+        """阶段完成后要发出的状态信息列表（success_message 可以是单条信息或信息列表）"""
+        if not self.success_message:
+            return []
+        if isinstance(self.success_message, (list, tuple)):
+            return list(self.success_message)
+        return [self.success_message]
+
+    def run(self, doc, page_offset=0, text_index=None):
+        kwargs = dict(self.kwargs)
+        if self.per_page and page_offset:
+            kwargs["page_offset"] = page_offset
+        if self.uses_text_index and text_index is not None:
+            kwargs["text_index"] = text_index
+        return self.func(doc, **kwargs)
+
+
+class PDFEditPipeline:
+    """
+    PDF编辑流水线
+    所有阶段依次作用于同一个 fitz.Document，最后统一保存一次。
+    单个阶段出错不会中断后续阶段（与原先逐个函数调用时的行为一致）。
+    每个阶段的执行结果记录在 outcomes 中:
+        "ok"         执行成功
+        "error"      执行出错
+        "incomplete" 依赖外部服务的阶段（volatile）没有修改文档，例如OCR暂时失败
+        "cached"     阶段输出来自阶段缓存，没有重新执行
+
+    阶段缓存（cache 参数，pdf_cache.ContentCache，默认不启用）: 每个阶段的缓存键由上一阶段的键、阶段名称和阶段指纹
+    依次串联而成，阶段成功后把当时的文档保存为该阶段的输出。重新运行时从最后一个命中的阶段继续
+    （见 restore），因此修改某个阶段的参数（如某条规则、logo 图片）只会重新执行该阶段及其后的阶段，
+    只修改保存配置时所有阶段都直接复用。最后一个阶段的输出就是整份输出（由结果缓存保存），不再单独保存。
+    """
+
+    def __init__(self, stages=None):
+        self.stages = list(stages) if stages else []
+        self.outcomes = {}  # 阶段名称 -> "ok" / "error" / "incomplete" / "cached"
+
+    def add_stage(self, name, func, success_message=None, error_message=None, per_page=False,
+                  fingerprint=None, volatile=False, **kwargs):
+        """添加一个阶段，返回流水线本身以便链式调用"""
+        self.stages.append(PipelineStage(
+            name, func, success_message, error_message, per_page, fingerprint, volatile, **kwargs))
+        return self
+
+    @property
+    def complete(self):
+        """所有阶段都成功（或来自缓存），结果可以缓存"""
+        return all(outcome in ("ok", "cached") for outcome in self.outcomes.values())
+
+    def stage_keys(self, input_key):
+        """各阶段输出的缓存键（没有指纹的阶段及其后的阶段为 None）"""
+        keys = []
+        key = input_key
+        for stage in self.stages:
+            if key is not None and stage.fingerprint is not None:
+                key = content_key(key, stage.name, stage.fingerprint)
+            else:
+                key = None
+            keys.append(key)
+        return keys
+
+    def restore(self, cache, input_key):
+        """
+        在阶段缓存中查找最后一个已缓存的阶段输出
+
+        返回:
+            (data, start): 该阶段输出的文档内容和已完成的阶段数；没有命中时为 (None, 0)
+        """
+        keys = self.stage_keys(input_key)
+        # 最后一个阶段的输出不保存（见 _store_stage）
+        for index in range(len(keys) - 2, -1, -1):
+            if keys[index] is None:
+                continue
+            data = cache.get("stage", keys[index])
+            if data is not None:
+                for stage in self.stages[:index + 1]:
+                    self.outcomes[stage.name] = "cached"
+                return data, index + 1
+        return None, 0
+
+    @staticmethod
+    def _store_stage(cache, key, doc):
+        """
+        把当前文档保存为阶段输出
+        规则插入的中文字体此时还是完整字体（数MB），在副本上先做字体子集化再保存（与最终保存时一致），
+        每个阶段输出只有几十到几百KB。
+        """
+        if cache is None or key is None:
+            return
+        try:
+            snapshot = fitz.open(stream=doc.tobytes(), filetype="pdf")
+            try:
+                _subset_fonts(snapshot)
+                cache.put("stage", key, snapshot.tobytes(garbage=3, deflate=True))
+            finally:
+                snapshot.close()
+        except Exception as e:
+            print(f"保存阶段缓存失败: {e}")
+
+    def run(self, doc, status_callback=None, text_index=None, start=0, cache=None, input_key=None):
+        """
+        在已打开的文档上依次执行所有阶段
+        所有阶段共用一个文档文本索引，每页的文本只在被修改后才重新提取。
+
+        参数:
+            start: 从第几个阶段开始执行（之前的阶段已从阶段缓存恢复，见 restore）
+            cache / input_key: 阶段缓存和输入文档的缓存键，为空时不缓存阶段输出
+
+        返回:
+            changed: 是否有任一阶段修改了文档
+        """
+        emit = status_callback or print
+        if text_index is None:
+            text_index = DocumentTextIndex(doc)
+        keys = self.stage_keys(input_key) if cache is not None else [None] * len(self.stages)
+        changed = False
+        failed = False
+        for index in range(start, len(self.stages)):
+            stage = self.stages[index]
+            try:
+                stage_changed = stage.run(doc, text_index=text_index)
+                if stage_changed:
+                    changed = True
+                self.outcomes[stage.name] = "incomplete" if stage.volatile and not stage_changed else "ok"
+                for message in stage.success_messages():
+                    emit(message)
+            except Exception as e:
+                self.outcomes[stage.name] = "error"
+                emit(f"{stage.error_message}: {e}")
+                import traceback
+                print(f"阶段 {stage.name} 错误详情: {traceback.format_exc()}")
+            # 之前的阶段没有成功时，之后的阶段输出也不缓存
+            failed = failed or self.outcomes[stage.name] != "ok"
+            if not failed and index < len(self.stages) - 1:
+                self._store_stage(cache, keys[index], doc)
+        return changed
+
+    def run_sharded(self, doc, shard_pages, max_workers, status_callback=None, start=0, cache=None, input_key=None):
+        """
+        按页分片并行执行逐页阶段（用于几百页的大文档）
+
+        连续的逐页阶段会被合并为一组：文档按 shard_pages 页切成多个分片，
+        每个分片在工作进程中依次执行这一组阶段，然后按原顺序合并回一个文档。
+        非逐页阶段（只处理特定页面或依赖整份文档的阶段）仍在主进程中按原顺序执行，
+        因此合并结果与串行执行 run() 的结果渲染一致：每页的文字和画面相同、文档编码相同，
+        但对象编号、对象布局和文件大小不同（合并后还会去掉各分片重复嵌入的图片和字体），不是逐字节相同。
+        start / cache / input_key 与 run() 相同，逐页阶段组整组完成后才保存阶段输出。
+
+        返回:
+            (doc, changed): 处理后的文档（可能是新的合并文档，原文档已关闭）和是否有修改
+        """
+        emit = status_callback or print
+        changed = False
+        text_index = DocumentTextIndex(doc)
+        keys = self.stage_keys(input_key) if cache is not None else [None] * len(self.stages)
+        failed = False
+        index = start
+        while index < len(self.stages):
+            stage = self.stages[index]
+            if not stage.per_page:
+                changed = self._run_subset([stage], doc, emit, text_index) or changed
+                failed = failed or self.outcomes[stage.name] != "ok"
+                if not failed and index < len(self.stages) - 1:
+                    self._store_stage(cache, keys[index], doc)
+                index += 1
+                continue
+
+            # 收集连续的逐页阶段
+            group = []
+            while index < len(self.stages) and self.stages[index].per_page:
+                group.append(self.stages[index])
+                index += 1
+            merged, group_changed = _run_stage_group_sharded(
+                doc, group, shard_pages, max_workers, emit, text_index, self.outcomes
+            )
+            changed = changed or group_changed
+            if merged is not doc:
+                # 分片合并后是一个新文档，文本索引需要重新建立
+                doc = merged
+                text_index = DocumentTextIndex(doc)
+            failed = failed or any(self.outcomes[s.name] != "ok" for s in group)
+            if not failed and index < len(self.stages):
+                self._store_stage(cache, keys[index - 1], doc)
+        return doc, changed
+
+    def _run_subset(self, stages, doc, emit, text_index):
+        pipeline = PDFEditPipeline(stages)
+        changed = pipeline.run(doc, emit, text_index)
+        self.outcomes.update(pipeline.outcomes)
+        return changed
+
+    def process_file(self, pdf_path, output_path=None, status_callback=None):
+        """
+        打开 pdf_path，执行所有阶段后保存到 output_path（默认覆盖原文件）
+
+        返回:
+            changed: 文档是否被修改
+        """
+        output_path = output_path or pdf_path
+        doc = open_pdf_document(pdf_path)
+        try:
+            changed = self.run(doc, status_callback)
+            if changed or output_path != pdf_path:
+                save_document(doc, output_path)
+                doc = None  # save_document 已关闭文档
+        finally:
+            if doc is not None:
+                doc.close()
+        return changed
+
+
+def _run_stages_on_shard(shard_bytes, page_offset, stages):
+    """工作进程入口：在一个分片上依次执行逐页阶段，返回分片字节、是否修改和各阶段的错误"""
+    doc = fitz.open(stream=shard_bytes, filetype="pdf")
+    text_index = DocumentTextIndex(doc, page_offset)
+    changed = False
+    errors = []
+    try:
+        for stage in stages:
+            try:
+                if stage.run(doc, page_offset, text_index):
+                    changed = True
+            except Exception as e:
+                errors.append((stage.name, f"{stage.error_message}: {e}"))
+        return doc.tobytes(deflate=True), changed, errors
+    finally:
+        doc.close()
+
+
+def _run_stage_group_sharded(doc, stages, shard_pages, max_workers, emit, text_index=None, outcomes=None):
+    """将文档切成分片并行执行一组逐页阶段，再按原顺序合并（outcomes: 可选，记录每个阶段的执行结果）"""
+    outcomes = outcomes if outcomes is not None else {}
+    total_pages = len(doc)
+    shard_pages = max(1, int(shard_pages))
+    ranges = [(start, min(start + shard_pages, total_pages)) for start in range(0, total_pages, shard_pages)]
+    workers = max(1, min(int(max_workers or 1), len(ranges)))
+    if workers <= 1:
+        pipeline = PDFEditPipeline(stages)
+        changed = pipeline.run(doc, emit, text_index)
+        outcomes.update(pipeline.outcomes)
+        return doc, changed
+
+    emit(f"  - 文档共 {total_pages} 页，分为 {len(ranges)} 个分片并行处理（{workers} 个进程）")
+    shard_inputs = []
+    for start, stop in ranges:
+        shard = fitz.open()
+        shard.insert_pdf(doc, from_page=start, to_page=stop - 1)
+        shard_inputs.append((shard.tobytes(), start))
+        shard.close()
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        outputs = list(executor.map(
+            _run_stages_on_shard,
+            [data for data, _ in shard_inputs],
+            [start for _, start in shard_inputs],
+            [stages] * len(shard_inputs),
+        ))
+
+    # 按原页码顺序合并分片，并保留文档级信息（元数据、书签）
+    merged = fitz.open()
+    changed = False
+    failed_stages = {}
+    for shard_bytes, shard_changed, errors in outputs:
+        shard = fitz.open(stream=shard_bytes, filetype="pdf")
+        merged.insert_pdf(shard)
+        shard.close()
+        changed = changed or shard_changed
+        for stage_name, message in errors:
+            failed_stages.setdefault(stage_name, message)
+    try:
+        merged.set_metadata(doc.metadata)
+        toc = doc.get_toc(simple=False)
+        if toc:
+            merged.set_toc(toc)
+    except Exception as e:
+        print(f"复制文档元数据或书签时出错: {e}")
+    doc.close()
+    merged = _deduplicate_shared_objects(merged)
+
+    for stage in stages:
+        outcomes[stage.name] = "error" if stage.name in failed_stages else "ok"
+        if stage.name in failed_stages:
+            emit(failed_stages[stage.name])
+        else:
+            for message in stage.success_messages():
+                emit(message)
+    return merged, changed
+
+
+def _deduplicate_shared_objects(doc, max_passes=5):
+    """
+    合并后去掉各分片各自嵌入的重复对象
+    每个分片都单独插入了 logo 图片和字体（每份文档只插入一次的优化只在分片内部有效），
+    insert_pdf 合并时全部保留。这里用 garbage=4 重写文档，内容相同的对象（包括图片和字体文件等数据流）合并为一个。
+    一次重写只能合并内容完全相同的对象：ICC 色彩配置合并后，引用它们的色彩空间、图片才变得相同，
+    因此重复重写直到对象数量不再减少，之后的字体子集化和保存与串行处理时相同。
+    """
+    try:
+        count = doc.xref_length()
+        for _ in range(max_passes):
+            data = doc.tobytes(garbage=4)
+            doc.close()
+            doc = fitz.open(stream=data, filetype="pdf")
+            if doc.xref_length() >= count:
+                break
+            count = doc.xref_length()
+    except Exception as e:
+        print(f"合并分片后去重失败: {e}")
+    return doc
+
+
+def open_pdf_document(pdf_path):
+    """
+    读取文件字节并在内存中打开为 fitz.Document
+    后续的页面选择和所有编辑阶段都作用于这个内存文档，不再经过中间文件。
+    """
+    with open(pdf_path, "rb") as f:
+        data = f.read()
+    return fitz.open(stream=data, filetype="pdf")
+
+
+@contextlib.contextmanager
+def map_input_file(pdf_path):
+    """
+    以只读内存映射方式打开输入文件，返回可直接交给 fitz.open(stream=...) 的缓冲区（memoryview，零拷贝）
+
+    文件内容不再整体读入进程内存，而是由操作系统按需读入页面缓存，每个文件只读取一次；
+    进程池中的多个工作进程映射的是同一份页面缓存，而不是各自复制一份。
+    缓冲区只在 with 块内有效：PyMuPDF 直接读取映射的内存而不复制，用它打开的文档必须在 with 块结束前关闭，
+    否则之后再访问该文档会使进程崩溃（分片处理合并出的新文档不引用原缓冲区，不受影响）。
+    空文件无法映射，返回 b""。
+
+    用法:
+        with map_input_file(pdf_path) as buffer:
+            doc = fitz.open(stream=buffer, filetype="pdf")
+            ...
+            doc.close()
+    """
+    with open(pdf_path, "rb") as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            mapped = None  # 空文件
+    if mapped is None:
+        yield b""
+        return
+
+    # 映射建立后文件句柄即可关闭
+    view = memoryview(mapped)
+    try:
+        yield view
+    finally:
+        try:
+            view.release()
+            mapped.close()
+        except BufferError:
+            # 缓冲区仍被导出（例如调用方又创建了 memoryview），由垃圾回收释放映射
+            print(f"警告: {os.path.basename(pdf_path)} 的内存映射仍在使用，延后释放")
+
+
+def remove_first_and_last_pages_in_doc(doc):
+    """
+    页面选择阶段：直接在内存文档上删除第一页和最后一页
+
+    返回:
+        changed: 页数不足（不超过2页）时不做处理并返回 False
+    """
+    total_pages = len(doc)
+    if total_pages <= 2:
+        return False
+    # 保留除第一页和最后一页外的所有页面
+    doc.select(list(range(1, total_pages - 1)))
+    return True
+
+
+# 保存配置（save_document 的 profile 参数，批处理设置 save_profile）:
+#   fast:     最少重写：不合并内容流、不做垃圾回收
+#   standard: 字体子集化，合并每页的内容流，丢弃不再使用的对象并压缩对象编号（默认）
+#   compact:  在 standard 的基础上合并重复的对象和数据流，压缩图片和字体数据流，使用对象流（xref 表也被压缩）
+SAVE_PROFILES = {
+    "fast": {
+        "subset_fonts": True,
+        "options": {"deflate": True},
+    },
+    "standard": {
+        "subset_fonts": True,
+        "options": {"deflate": True, "clean": True, "garbage": 2},
+    },
+    "compact": {
+        "subset_fonts": True,
+        "options": {
+            "deflate": True, "deflate_images": True, "deflate_fonts": True,
+            "clean": True, "garbage": 4, "use_objstms": 1,
+        },
+    },
+}
+DEFAULT_SAVE_PROFILE = "standard"
+
+
+def get_save_profile(profile):
+    """返回保存配置，名称未知时使用默认配置"""
+    if profile not in SAVE_PROFILES:
+        if profile:
+            print(f"未知的保存配置 {profile!r}，使用 {DEFAULT_SAVE_PROFILE}")
+        profile = DEFAULT_SAVE_PROFILE
+    return SAVE_PROFILES[profile]
+
+
+def _subset_fonts(doc):
+    try:
+        doc.subset_fonts()
+    except Exception as e:
+        print(f"字体子集化失败，保存完整字体: {e}")
+
+
+def save_document(doc, output_path, subset_fonts=True, profile=DEFAULT_SAVE_PROFILE):
+    """
+    保存文档并关闭
+    不能直接覆盖保存到原文件（PyMuPDF 要求 incremental 模式），
+    这里先在内存中保存为字节串，再一次写入目标文件（见 write_output_file）。
+
+    参数:
+        subset_fonts: 为 False 时不做字体子集化（即使保存配置要求）。子集化只保留实际用到的字形
+                      （完整的中文字体文件有数MB，子集通常只有几十KB）
+        profile: 保存配置名称，见 SAVE_PROFILES
+    """
+    data = document_to_bytes(doc, subset_fonts, profile)
+    doc.close()
+    write_output_file(output_path, data)
+
+
+def document_to_bytes(doc, subset_fonts=True, profile=DEFAULT_SAVE_PROFILE):
+    """按保存配置把文档保存为字节串（在内存中完成，不写入磁盘，也不关闭文档）"""
+    settings = get_save_profile(profile)
+    if settings["subset_fonts"] and subset_fonts:
+        _subset_fonts(doc)
+    return doc.tobytes(**settings["options"])
+
+
+def write_output_file(output_path, data):
+    """
+    把输出数据一次写入 output_path
+    先写入同目录下的临时文件再替换目标文件，写入中断时不会留下不完整的输出文件。
+    """
+    tmp_path = output_path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, output_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            try:
+                os.remove(tmp_path)
+            except:
+                pass
+        raise
+
+
+def compare_save_profiles(doc, subset_fonts=True):
+    """
+    保存配置对比报告：在文档的内存副本上依次按每种保存配置保存（不修改 doc，也不写入磁盘）
+
+    返回:
+        [(配置名称, 耗时秒数, 输出字节数)]，按 SAVE_PROFILES 的顺序排列
+    """
+    source = doc.tobytes()
+    report = []
+    for name, settings in SAVE_PROFILES.items():
+        copy = fitz.open(stream=source, filetype="pdf")
+        try:
+            start = time.perf_counter()
+            size = len(document_to_bytes(copy, subset_fonts, name))
+            report.append((name, time.perf_counter() - start, size))
+        finally:
+            copy.close()
+    return report
+
+
+def format_save_profile_report(report):
+    """把 compare_save_profiles 的结果格式化为多行文本（节省的字节数相对于 fast 配置）"""
+    baseline = report[0][2] if report else 0
+    lines = []
+    for name, seconds, size in report:
+        saved = baseline - size
+        percent = saved * 100.0 / baseline if baseline else 0.0
+        lines.append(f"  {name:<8} 耗时 {seconds * 1000:8.1f} ms  大小 {size:>10,} 字节  节省 {saved:>10,} 字节 ({percent:.1f}%)")
+    return "\n".join(lines)
+
+
+def _edit_pdf_file(pdf_path, func, *args, **kwargs):
+    """打开文件、执行单个阶段函数，如有修改则保存回原文件"""
+    doc = fitz.open(pdf_path)
+    try:
+        changed = func(doc, *args, **kwargs)
+        if changed:
+            save_document(doc, pdf_path)
+            doc = None
+    finally:
+        if doc is not None:
+            doc.close()
+    return changed
+
+
+# 进程级字体缓存：字体文件 -> (字体数据, fitz.Font)
+# 每个进程（包括工作进程）只从磁盘读取和解析一次，之后所有文档共用；找不到或无法解析时为 None
+_FONT_CACHE = {}
+
+
+def get_cached_font(font_file):
+    """
+    返回 (字体数据, fitz.Font)，找不到字体文件时返回 None
+    解析失败时抛出异常（同样会被缓存，不会每份文档重试）
+    """
+    if font_file not in _FONT_CACHE:
+        font_path = get_resource_path(font_file)
+        entry = None
+        if os.path.exists(font_path):
+            try:
+                with open(font_path, "rb") as f:
+                    buffer = f.read()
+                entry = (buffer, fitz.Font(fontbuffer=buffer))
+            except Exception as e:
+                entry = e
+        _FONT_CACHE[font_file] = entry
+    entry = _FONT_CACHE[font_file]
+    if isinstance(entry, Exception):
+        raise entry
+    return entry
+
+
+def _load_font_to_doc(doc, font_file, font_name, page=None):
+    """
+    将字体插入到文档（每份文档只需要插入一次，字体数据来自进程级缓存）
+    page 为空时插入到第一页，否则直接插入到要使用该字体的页面
+    找不到字体文件或加载失败时回退到内置中文字体 china-s
+    """
+    try:
+        cached = get_cached_font(font_file)
+        if cached is not None:
+            if page is None:
+                if len(doc) == 0:
+                    return None
+                page = doc[0]
+            font_xref = page.insert_font(fontname=font_name, fontbuffer=cached[0])
+            print(f"成功加载字体: {font_file}, 字体名称: {font_name}, xref: {font_xref}")
+            return font_name  # 使用字体名称字符串，与insert_font中的名称保持一致
+        print(f"警告: 未找到字体文件 {font_file}，将使用默认字体")
+        print(f"提示: 请将字体文件 {font_file} 放在项目目录: {os.path.dirname(get_resource_path(font_file))}")
+    except Exception as e:
+        print(f"加载字体时出错: {e}，将使用默认字体")
+    return "china-s"  # 回退到内置中文字体
+
+
+def _insert_font_to_page(page, page_index, font_file, font_name):
+    """
+    如果使用了自定义字体，需要在目标页面上插入字体
+    文档中已嵌入同一字体时 PyMuPDF 复用原来的字体对象，只在页面资源中添加引用
+    """
+    if font_name and font_name != "china-s":
+        try:
+            cached = get_cached_font(font_file)
+            if cached is not None:
+                page.insert_font(fontname=font_name, fontbuffer=cached[0])
+        except Exception as e:
+            print(f"在页面 {page_index + 1} 插入字体时出错: {e}")
+
+
+# ======================== 单页编辑操作 ========================
+# 以下函数只处理一页，文本块由调用方传入（通常来自共享的文档文本索引 pdf_text_index），
+# 同一页上的多个编辑操作不需要各自重新提取文本。
+
+def cover_text_blocks_in_page(page, page_index, blocks, matcher, key="cover", keep_keys=(), block_hits=None,
+                              writer=None):
+    """
+    用白色矩形覆盖本页中命中指定模式的文本块
+
+    参数:
+        page: fitz.Page
+        page_index: 页面在原文档中的索引（用于日志）
+        blocks: page.get_text("blocks") 的结果
+        matcher: text_matcher.TextMatcher，包含所有覆盖模式和例外关键词
+        key: 需要覆盖的模式所属的 key
+        keep_keys: 命中这些 key 的文本块在本页不覆盖
+        block_hits: 每个文本块的扫描结果（与 blocks 一一对应）；
+                    多条规则共用同一个匹配器时由调用方传入，每个文本块只扫描一次
+        writer: 可选，本页的 PageTextWriter；传入时覆盖矩形由调用方统一写入，
+                否则本页所有覆盖矩形在函数结束时一次写入
+
+    返回:
+        count: 覆盖的文本块数量
+    """
+    if block_hits is None:
+        block_hits = [matcher.scan(b[4]) if len(b) >= 5 else {} for b in blocks]
+
+    page_writer = writer or PageTextWriter(page)
+    count = 0
+    for b, hits in zip(blocks, block_hits):
+        if key not in hits:
+            continue
+        x0, y0, x1, y1, text = b[0], b[1], b[2], b[3], b[4]
+
+        kept = next((hits[keep_key][0] for keep_key in keep_keys if keep_key in hits), None)
+        if kept:
+            print(f"跳过页面 {page_index + 1} 中包含 '{kept}' 的文本块（第{page_index + 1}页不覆盖）: '{text.strip()[:50]}'...")
+            continue  # 跳过这个文本块，继续处理下一个文本块
+
+        # 在该区域画白色填充矩形，覆盖原有文本
+        page_writer.draw_rect(fitz.Rect(x0, y0, x1, y1))
+        count += 1
+        pattern, kind = hits[key]
+        if kind == "prefix":
+            print(f"覆盖页面 {page_index + 1} 中文本块: '{text.strip()[:50]}'...")
+        else:
+            print(f"覆盖页面 {page_index + 1} 中包含 '{pattern}' 的文本块: '{text.strip()[:50]}'...")
+    if writer is None:
+        page_writer.commit()
+    return count
+
+
+def replace_text_starting_with_in_page(page, page_index, blocks, target_prefix, new_text, font_name="china-s",
+                                       font_size: float = 12, block_adjust=(21, 2, -400, 2), writer=None):
+    """
+    替换本页第一个以 target_prefix 开头的文本块：先用白色矩形覆盖，再在原位置插入新文本
+
+    参数:
+        font_name: 已加载到文档中的字体名称
+        block_adjust: 文本块坐标修正 (dx0, dy0, dx1, dy1)，用于对准原报告中标题文字的实际位置
+        writer: 可选，本页的 PageTextWriter；传入时覆盖矩形和文字由调用方统一写入，否则立即写入
+
+    返回:
+        found, changed: 是否找到目标文本块、是否成功替换
+    """
+    dx0, dy0, dx1, dy1 = block_adjust
+    page_writer = writer or PageTextWriter(page)
+    found = False
+    for b in blocks:
+        if len(b) < 5:
+            continue
+        x0, y0, x1, y1, text = b[0] + dx0, b[1] + dy0, b[2] + dx1, b[3] + dy1, b[4]
+
+        # 查找以目标前缀开头的文本块
+        if not (isinstance(text, str) and text.strip().startswith(target_prefix)):
+            continue
+        found = True
+
+        # 步骤1: 用白色矩形覆盖原文本块
+        expanded_rect = fitz.Rect(
+            max(0, x0 - 2),
+            max(0, y0 - 2),
+            x1 + 2,
+            y1 + 2
+        )
+        page_writer.draw_rect(expanded_rect)
+
+        # 步骤2: 在原位置插入新文本
+        try:
+            # 计算文本插入位置（使用原文本块的基线位置）
+            # insert_text 的 y 坐标是基线位置，需要加上字体大小
+            insert_point = (x0, y0 + font_size)
+
+            # 插入新文本
+            page_writer.insert_text(
+                insert_point,
+                new_text,
+                fontsize=font_size,
+                fontname=font_name if font_name else "china-s",
+                color=(0, 0, 0)  # 黑色
+            )
+            if writer is None:
+                page_writer.commit()
+            print(f"第1页（页面 {page_index + 1}）已替换文本 '{text.strip()[:30]}...' 为 '{new_text}'，位置: ({x0:.1f}, {y0:.1f})")
+            return True, True  # 只处理第一个匹配的文本块
+        except Exception as e:
+            print(f"插入文本时出错: {e}")
+            import traceback
+            print(traceback.format_exc())
+    if writer is None:
+        page_writer.commit()  # 插入文本失败时仍然写入覆盖矩形
+    return found, False
+
+
+def _check_text_clearance(text_index, page_index, rect, what, anchor=None, below=None, above=None):
+    """
+    插入文字前检查它是否会压住原有文字，有时给出警告（不改变插入位置）
+    通过文本索引的空间查询完成，只检查 rect 附近的网格单元:
+        below / above: 给出时检查锚点文本块下方（上方）最近的文本块是否进入 rect，否则检查与 rect 相交的文本块
+    """
+    if text_index is None:
+        return
+    try:
+        if below is not None:
+            found = text_index.nearest_blocks(
+                page_index, (rect.x0, below), predicate=lambda b: b is not anchor and b[1] >= below)
+            hits = [block for _, block in found if block[1] < rect.y1 and block[0] < rect.x1 and block[2] > rect.x0]
+        elif above is not None:
+            found = text_index.nearest_blocks(
+                page_index, (rect.x0, above), predicate=lambda b: b is not anchor and b[3] <= above)
+            hits = [block for _, block in found if block[3] > rect.y0 and block[0] < rect.x1 and block[2] > rect.x0]
+        else:
+            hits = text_index.query_blocks(page_index, rect, anchor)
+    except Exception as e:
+        print(f"检查{what}位置时出错: {e}")
+        return
+    if hits:
+        print(f"警告: 页面 {page_index + 1} 的{what}与原有文字重叠: '{hits[0][4].strip()[:20]}'")
+
+
+def add_subtitle_after_text_in_page(page, page_index, blocks, target_text, subtitle, font_name="china-s",
+                                    font_size: float = 12, spacing: float = 5, writer=None, text_index=None):
+    """
+    在本页第一个包含 target_text 的文本块下方添加二级标题
+    writer: 可选，本页的 PageTextWriter；传入时文字由调用方统一写入，否则立即写入
+    text_index: 可选，文档文本索引；传入时用最近邻查询检查二级标题是否压住目标文本块下方的文字
+
+    返回:
+        changed: 是否成功添加
+    """
+    for b in blocks:
+        if len(b) < 5:
+            continue
+        x0, y0, x1, y1, text = b[0], b[1], b[2], b[3], b[4]
+
+        # 查找包含目标文本的块
+        if not (isinstance(text, str) and target_text in text):
+            continue
+
+        # 计算插入位置：在目标文本块下方
+        insert_x = x0  # 保持左对齐
+        insert_y = y1 + spacing  # 在文本块下方，加上间距
+
+        # 插入文本
+        try:
+            # 使用 insert_textbox 方法插入文本（支持中文和长文本）
+            # 计算文本框的宽度（使用页面宽度或原文本块的宽度）
+            page_rect = page.rect
+            textbox_width = min(page_rect.width - insert_x - 10, (x1 - x0) * 2)  # 至少留10像素边距
+
+            # 创建文本框矩形
+            textbox_rect = fitz.Rect(insert_x, insert_y, insert_x + textbox_width, insert_y + font_size * 2)
+            _check_text_clearance(text_index, page_index, textbox_rect, "二级标题", anchor=b, below=y1)
+
+            # 使用 insert_textbox 插入文本（自动换行，支持中文）
+            # 参数：矩形区域, 文本内容, fontsize, fontname, color, align
+            page_writer = writer or PageTextWriter(page)
+            rc = page_writer.insert_textbox(
+                textbox_rect,
+                subtitle,
+                fontsize=font_size,
+                fontname=font_name if font_name else "china-s",  # 使用加载的字体名称
+                color=(0, 0, 0),  # 黑色
+                align=0  # 左对齐
+            )
+
+            if rc >= 0:  # 成功插入
+                if writer is None:
+                    page_writer.commit()
+                print(f"页面 {page_index + 1} 在 '{target_text}' 下方添加了 '{subtitle}'，位置: ({insert_x:.1f}, {insert_y:.1f})")
+                return True
+
+            print(f"警告: 文本可能超出文本框范围，返回码: {rc}")
+            # 如果失败，尝试使用更大的文本框
+            textbox_rect = fitz.Rect(insert_x, insert_y, page_rect.width - 10, insert_y + font_size * 3)
+            rc = page_writer.insert_textbox(
+                textbox_rect,
+                subtitle,
+                fontsize=font_size,
+                fontname=font_name if font_name else "china-s",
+                color=(0, 0, 0),
+                align=0
+            )
+            if rc >= 0:
+                if writer is None:
+                    page_writer.commit()
+                print(f"页面 {page_index + 1} 在 '{target_text}' 下方添加了 '{subtitle}'（使用扩展文本框）")
+                return True
+            return False  # 只处理第一个匹配的文本块
+        except Exception as e:
+            print(f"插入文本时出错: {e}")
+            import traceback
+            print(traceback.format_exc())
+    return False
+
+
+def _as_image_resource(logo, box=None):
+    """logo 可以是图片路径或已加载的 ImageResource"""
+    if isinstance(logo, ImageResource):
+        return logo
+    return ImageResource(logo, box)
+
+
+def replace_top_left_logo_in_page(page, page_index, logo_path, max_x: float = 100, max_y: float = 100, scale: float = 1.2,
+                                  image_rects=None, placed=None, writer=None, text_index=None):
+    """
+    将本页左上角区域内（x0 < max_x 且 y0 < max_y）的图片替换为 logo_path，新图片放大 scale 倍
+
+    参数:
+        logo_path: logo 图片路径或 ImageResource（批量处理时每批只加载一次），
+                   按放大后的实际区域预缩放（见 ImageResource.fitted）
+        image_rects: 可选，候选图片位置 [(xref, fitz.Rect)]；
+                     不传时从 text_index 的图片空间索引中查询左上角区域，两者都没有时用一次 get_image_info 获取本页所有图片位置
+        placed: 可选，同一份文档共用的 {资源: xref} 字典，文档中只插入一次图片数据
+        writer: 可选，本页的 PageTextWriter；覆盖矩形加入其中，在插入新 logo 之前一起写入
+
+    返回:
+        changed: 是否有 logo 被替换
+    """
+    if image_rects is None and text_index is not None:
+        image_rects = text_index.query_images(page_index, (float("-inf"), float("-inf"), max_x, max_y))
+    if image_rects is None:
+        image_rects = [
+            (info["xref"], fitz.Rect(info["bbox"]))
+            for info in page.get_image_info(xrefs=True)
+            if info.get("xref")
+        ]
+
+    changed = False
+    replaced = set()
+    logo = None
+    for xref, rect in image_rects:
+        # 每个图片对象只替换一次（同一图片在左上角绘制多次时只处理第一处）
+        if xref in replaced:
+            continue
+        # 左上角区域判定
+        if rect.x0 < max_x and rect.y0 < max_y:
+            replaced.add(xref)
+            # 步骤1: 先尝试删除图片对象（如果可能）
+            try:
+                page.delete_image(xref)
+            except:
+                pass  # 如果删除失败，继续用覆盖方式
+
+            # 步骤2: 用白色矩形完全覆盖原logo区域（确保删除原logo）
+            # 稍微扩大覆盖范围，确保完全覆盖
+            expanded_rect = fitz.Rect(
+                max(0, rect.x0 - 2),
+                max(0, rect.y0 - 2),
+                rect.x1 + 2,
+                rect.y1 + 2
+            )
+            # 覆盖矩形必须在新 logo 之前写入页面，否则会盖住新 logo
+            page_writer = writer or PageTextWriter(page)
+            page_writer.draw_rect(expanded_rect)
+            page_writer.commit()
+
+            # 步骤3: 计算放大后的区域（保持左上角位置不变）
+            enlarged_width = (rect.x1 - rect.x0) * scale
+            enlarged_height = (rect.y1 - rect.y0) * scale
+
+            # 创建放大后的矩形（左上角位置不变，右下角扩展）
+            enlarged_rect = fitz.Rect(
+                rect.x0,
+                rect.y0,
+                rect.x0 + enlarged_width,
+                rect.y0 + enlarged_height
+            )
+
+            # 在放大后的区域插入新的 logo 图片
+            if logo is None:
+                logo = _as_image_resource(logo_path)
+            logo.fitted(enlarged_rect).insert(page, enlarged_rect, placed)
+            changed = True
+            print(
+                f"页面 {page_index + 1} 左上角 logo 已删除并替换为 {logo.name}（放大10%），"
+                f"原区域: ({rect.x0:.1f}, {rect.y0:.1f}) - ({rect.x1:.1f}, {rect.y1:.1f}), "
+                f"新区域: ({enlarged_rect.x0:.1f}, {enlarged_rect.y0:.1f}) - ({enlarged_rect.x1:.1f}, {enlarged_rect.y1:.1f})"
+            )
+    return changed
+
+
+def add_top_right_logo_in_page(page, page_index, logo_path, margin_x: float = 10, margin_y: float = 0,
+                               logo_width: float = 80, logo_height: float = 80, scale: float = 0.8, placed=None):
+    """
+    在本页右上角插入 logo_path，尺寸为 (logo_width, logo_height) 乘以 scale
+    logo_path 可以是图片路径或 ImageResource；placed 见 replace_top_left_logo_in_page
+
+    返回:
+        changed: 是否添加了 logo
+    """
+    # 获取页面尺寸
+    page_width = page.rect.width
+
+    # 计算右上角位置（logo缩小10%）
+    scaled_logo_width = logo_width * scale
+    scaled_logo_height = logo_height * scale
+
+    # x0: 页面宽度 - 右边距 - 缩小后的logo宽度
+    # y0: 上边距
+    # x1: 页面宽度 - 右边距
+    # y1: 上边距 + 缩小后的logo高度
+    x0 = page_width - margin_x - scaled_logo_width
+    y0 = margin_y
+    x1 = page_width - margin_x
+    y1 = margin_y + scaled_logo_height
+
+    # 在右上角插入logo
+    logo = _as_image_resource(logo_path, (scaled_logo_width, scaled_logo_height))
+    logo.insert(page, fitz.Rect(x0, y0, x1, y1), placed)
+    print(
+        f"页面 {page_index + 1} 右上角已添加 {logo.name}（缩小10%），位置: "
+        f"({x0:.1f}, {y0:.1f}) - ({x1:.1f}, {y1:.1f}), 尺寸: {scaled_logo_width:.1f} x {scaled_logo_height:.1f}"
+    )
+    return True
+
+
+def add_header_document_code_in_page(page, page_index, document_code, font_size: float = 8, margin_top: float = 20,
+                                     margin_right: float = 75, color=(0.7, 0.7, 0.7), writer=None, text_index=None):
+    """
+    在本页页眉右侧添加文档编码（右对齐，浅灰色小字号）
+    writer: 可选，本页的 PageTextWriter；传入时文字由调用方统一写入，否则立即写入
+    text_index: 可选，文档文本索引；传入时用区域查询检查文档编码是否压住页眉中原有的文字
+
+    返回:
+        changed: 是否添加了文档编码
+    """
+    page_rect = page.rect
+
+    # 计算文本位置（右对齐）
+    # 文本框右边界距离右边缘margin_right
+    textbox_right = page_rect.width - margin_right
+    textbox_top = margin_top
+    # 文本框宽度：文字的精确宽度（按字体缓存字符宽度）再留一个字号的余量，避免换行
+    textbox_left = max(0, textbox_right - text_width(document_code, font_size, "china-s") - font_size)
+    textbox_bottom = textbox_top + font_size * 2  # 给足够的高度
+
+    try:
+        # 创建文本框矩形（右对齐）
+        textbox_rect = fitz.Rect(
+            textbox_left,
+            textbox_top,
+            textbox_right,
+            textbox_bottom
+        )
+        _check_text_clearance(text_index, page_index, textbox_rect, "文档编码")
+
+        # 使用insert_textbox插入文本，右对齐（align=2）
+        page_writer = writer or PageTextWriter(page)
+        rc = page_writer.insert_textbox(
+            textbox_rect,
+            document_code,
+            fontsize=font_size,
+            fontname="china-s",  # 使用中文字体支持
+            color=tuple(color),
+            align=2  # 2表示右对齐
+        )
+
+        if rc >= 0:
+            if writer is None:
+                page_writer.commit()
+            print(f"页面 {page_index + 1} 已添加文档编码: {document_code}")
+            return True
+        print(f"警告: 页面 {page_index + 1} 添加文档编码失败，返回码: {rc}")
+
+    except Exception as e:
+        print(f"页面 {page_index + 1} 添加文档编码时出错: {e}")
+    return False
+
+
+# ======================== 编辑阶段 ========================
+
+def remove_tel_blocks_from_doc(doc, prefix: str = "联系电话", page_offset: int = 0, text_index=None):
+    """
+    在文档中删除（通过白色覆盖）以指定前缀开头的文本块。
+    使用 PyMuPDF 的文本块信息，找到以 prefix 开头的块并画白色矩形覆盖。
+
+    返回:
+        changed: 是否有文本块被覆盖
+    """
+    changed = False
+    matcher = TextMatcher().add(prefix, "cover", "prefix")
+    text_index = text_index or DocumentTextIndex(doc, page_offset)
+
+    for page_index, page in enumerate(doc, page_offset):
+        # 文本块 (x0, y0, x1, y1, text, block_no, ...)，其中 text 为该块的全部文本
+        # 覆盖只画白色矩形，不改变可提取的文字，文本索引不需要失效
+        if cover_text_blocks_in_page(page, page_index, text_index.blocks(page_index), matcher):
+            changed = True
+
+    if changed:
+        print(f"已从PDF中删除以 '{prefix}' 开头的文本块")
+    else:
+        print(f"未在PDF中找到以 '{prefix}' 开头的文本块")
+    return changed
+
+
+def remove_keyword_blocks_from_doc(doc, keywords: list, page_offset: int = 0, text_index=None):
+    """
+    在文档中删除（通过白色覆盖）包含指定关键词的文本块。
+    使用 PyMuPDF 的文本块信息，找到包含关键词的块并画白色矩形覆盖。
+
+    参数:
+        doc: 已打开的 fitz.Document
+        keywords: 关键词列表，文本块中包含任一关键词即会被删除
+        page_offset: 文档第一页在原文档中的页码索引（分片处理时使用）
+        text_index: 共享的文档文本索引，为空时新建
+
+    返回:
+        changed: 是否有文本块被覆盖
+    """
+    removed_count = 0
+    # 所有关键词编译成一个匹配器，每个文本块只扫描一次
+    matcher = TextMatcher().add_many(keywords, "cover").add("企查分", "keep")
+    text_index = text_index or DocumentTextIndex(doc, page_offset)
+
+    for page_index, page in enumerate(doc, page_offset):
+        # 第1页（索引为0）不覆盖包含"企查分"的文本块
+        keep_keys = ("keep",) if page_index == 0 else ()
+        removed_count += cover_text_blocks_in_page(
+            page, page_index, text_index.blocks(page_index), matcher, keep_keys=keep_keys
+        )
+
+    changed = removed_count > 0
+    if changed:
+        print(f"已从PDF中删除包含关键词 {keywords} 的文本块，共 {removed_count} 个")
+    else:
+        print(f"未在PDF中找到包含关键词 {keywords} 的文本块")
+    return changed
+
+
+def add_subtitle_after_text_in_doc(doc, target_text: str, subtitle: str, font_size: float = 12, spacing: float = 5,
+                                   text_index=None):
+    """
+    在文档第2页指定文本块下方添加二级标题
+
+    参数:
+        doc: 已打开的 fitz.Document
+        target_text: 目标文本（要查找的文本块）
+        subtitle: 要添加的二级标题文本
+        font_size: 字体大小，默认12
+        spacing: 与目标文本的间距，默认5
+
+    返回:
+        changed: 是否成功添加
+    """
+    changed = False
+
+    # 只处理第2页（索引为1）
+    if len(doc) > 1:
+        page_index = 1
+        page = doc[page_index]
+        # 尝试加载字体文件（优先从项目目录读取 HYQiHeiClassic-70S.ttf），直接插入到目标页面
+        font_name = _load_font_to_doc(doc, "HYQiHeiClassic-70S.ttf", "HYQiHeiClassic", page)
+        text_index = text_index or DocumentTextIndex(doc)
+        changed = add_subtitle_after_text_in_page(
+            page, page_index, text_index.blocks(page_index), target_text, subtitle, font_name, font_size, spacing,
+            text_index=text_index
+        )
+        if changed:
+            text_index.invalidate(page_index)
+
+    if changed:
+        print(f"已添加二级标题: {subtitle}")
+    else:
+        print(f"未在PDF中找到文本 '{target_text}'，未添加二级标题")
+    return changed
+
+
+def add_subtitle_above_text_in_page1_in_doc(doc, target_text: str, subtitle: str, font_size: float = 12, spacing: float = 5,
+                                            text_index=None):
+    """
+    在删除页面后的第1页（索引0）指定文本块上方添加二级标题，使用 HYQiHeiClassic-55S.ttf 字体
+
+    参数:
+        doc: 已打开的 fitz.Document
+        target_text: 目标文本（要查找的文本块）
+        subtitle: 要添加的二级标题文本
+        font_size: 字体大小，默认12
+        spacing: 与目标文本的间距，默认5
+
+    返回:
+        changed: 是否成功添加
+    """
+    changed = False
+
+    # 只处理第1页（索引为0），这是删除第一页和最后一页后的第1页
+    if len(doc) > 0:
+        page = doc[0]
+        page_index = 0
+
+        # 尝试加载字体文件（优先从项目目录读取 HYQiHeiClassic-55S.ttf），直接插入到目标页面
+        font_name = _load_font_to_doc(doc, "HYQiHeiClassic-55S.ttf", "HYQiHeiClassic55S", page)
+
+        # 获取文本块
+        text_index = text_index or DocumentTextIndex(doc)
+        blocks = text_index.blocks(page_index)
+        page_writer = PageTextWriter(page)
+        found_target = False
+        for b in blocks:
+            if len(b) < 5:
+                continue
+            x0, y0, x1, y1, text = b[0], b[1], b[2], b[3], b[4]
+
+            # 查找包含目标文本的块
+            if isinstance(text, str) and target_text in text:
+                found_target = True
+                print(f"[调试] 找到目标文本块: '{text.strip()}'")
+                # 计算插入位置：在目标文本块上方
+                insert_x = x0  # 保持左对齐
+                page_rect = page.rect
+
+                # 计算文本框高度（估算，留一些余量）
+                estimated_height = font_size * 1.5
+
+                # 在目标文本块上方插入，y坐标 = 目标文本块的顶部 - 间距 - 文本框高度
+                insert_y = y0 - spacing - estimated_height
+
+                # 确保不会超出页面顶部边界
+                if insert_y < 0:
+                    insert_y = max(0, y0 - spacing)
+                    estimated_height = y0 - spacing - insert_y
+
+                # 插入文本
+                try:
+                    # 使用 insert_textbox 方法插入文本（支持中文和长文本）
+                    # 计算文本框的宽度（使用页面宽度或原文本块的宽度）
+                    textbox_width = min(page_rect.width - insert_x - 10, (x1 - x0) * 2)  # 至少留10像素边距
+
+                    # 创建文本框矩形
+                    textbox_rect = fitz.Rect(insert_x, insert_y, insert_x + textbox_width, insert_y + estimated_height)
+                    _check_text_clearance(text_index, page_index, textbox_rect, "二级标题", anchor=b, above=y0)
+
+                    # 使用 insert_textbox 插入文本（自动换行，支持中文）
+                    # 参数：矩形区域, 文本内容, fontsize, fontname, color, align
+                    rc = page_writer.insert_textbox(
+                        textbox_rect,
+                        subtitle,
+                        fontsize=font_size,
+                        fontname=font_name if font_name else "china-s",  # 使用加载的字体名称
+                        color=(0, 0, 0),  # 黑色
+                        align=0  # 左对齐
+                    )
+
+                    if rc >= 0:  # 成功插入
+                        changed = True
+                        print(f"第1页（页面 {page_index + 1}）在 '{target_text}' 上方添加了 '{subtitle}'，位置: ({insert_x:.1f}, {insert_y:.1f})")
+                    else:
+                        print(f"警告: 文本可能超出文本框范围，返回码: {rc}")
+                        # 如果失败，尝试使用更大的文本框
+                        textbox_rect = fitz.Rect(insert_x, insert_y, page_rect.width - 10, insert_y + font_size * 3)
+                        rc = page_writer.insert_textbox(
+                            textbox_rect,
+                            subtitle,
+                            fontsize=font_size,
+                            fontname=font_name if font_name else "china-s",
+                            color=(0, 0, 0),
+                            align=0
+                        )
+                        if rc >= 0:
+                            changed = True
+                            print(f"第1页（页面 {page_index + 1}）在 '{target_text}' 上方添加了 '{subtitle}'（使用扩展文本框）")
+
+                    break  # 只处理第一个匹配的文本块
+                except Exception as e:
+                    print(f"插入文本时出错: {e}")
+                    import traceback
+                    print(traceback.format_exc())
+
+        if not found_target:
+            print(f"[调试] 警告: 在第1页未找到包含 '{target_text}' 的文本块")
+        page_writer.commit()
+        if changed:
+            text_index.invalidate(page_index)
+
+    if changed:
+        print(f"已在第1页添加二级标题: {subtitle}")
+    else:
+        print(f"未在第1页找到文本 '{target_text}'，未添加二级标题")
+    return changed
+
+
+def replace_text_starting_with_in_doc(doc, target_prefix: str, new_text: str, font_size: float = 12, text_index=None):
+    """
+    在删除页面后的第1页（索引0）替换以指定前缀开头的文本块，使用 HYQiHeiClassic-55S.ttf 字体
+
+    参数:
+        doc: 已打开的 fitz.Document
+        target_prefix: 目标文本前缀（要查找的文本块以此开头）
+        new_text: 要替换的新文本
+        font_size: 字体大小，默认12
+
+    返回:
+        changed: 是否成功替换
+    """
+    changed = False
+
+    # 只处理第1页（索引为0），这是删除第一页和最后一页后的第1页
+    if len(doc) > 0:
+        page = doc[0]
+        page_index = 0
+
+        # 尝试加载字体文件（优先从项目目录读取 HYQiHeiClassic-55S.ttf），直接插入到目标页面
+        font_name = _load_font_to_doc(doc, "HYQiHeiClassic-55S.ttf", "HYQiHeiClassic55S", page)
+
+        text_index = text_index or DocumentTextIndex(doc)
+        found_target, changed = replace_text_starting_with_in_page(
+            page, page_index, text_index.blocks(page_index), target_prefix, new_text, font_name, font_size
+        )
+        if changed:
+            text_index.invalidate(page_index)
+        if not found_target:
+            print(f"[调试] 警告: 在第1页未找到以 '{target_prefix}' 开头的文本块")
+
+    if changed:
+        print(f"已替换文本: {target_prefix} -> {new_text}")
+    else:
+        print(f"未在第1页找到以 '{target_prefix}' 开头的文本块，未替换文本")
+    return changed
+
+
+def replace_top_left_logo_in_doc(doc, logo_path: str, max_x: float = 100, max_y: float = 100, page_offset: int = 0,
+                                 text_index=None):
+    """
+    将每页左上角区域内的图片替换为指定的 logo 图片（newlogo.png）。
+    逻辑：
+      1. 每页的图片位置建立一次空间索引（见 pdf_text_index）
+      2. 从索引中查询左上角区域内的 Rect（x0 < max_x 且 y0 < max_y）
+      3. 先用白色矩形覆盖原logo区域（删除原logo）
+      4. 然后在同一区域插入新的 logo 图片
+
+    返回:
+        changed: 是否有 logo 被替换
+    """
+    if not os.path.exists(logo_path):
+        print(f"错误: logo 文件不存在: {logo_path}")
+        return False
+
+    changed = False
+    # logo 只读取一次，文档中每种尺寸只插入一次图片数据
+    logo = ImageResource(logo_path)
+    placed = {}
+    text_index = text_index or DocumentTextIndex(doc, page_offset)
+
+    for page_index, page in enumerate(doc, page_offset):
+        if replace_top_left_logo_in_page(page, page_index, logo, max_x, max_y, placed=placed, text_index=text_index):
+            changed = True
+            text_index.invalidate_images(page_index)
+
+    if changed:
+        print(f"已完成左上角 logo 替换")
+    else:
+        print(f"未在 PDF 中检测到左上角图片（x < {max_x}, y < {max_y}），未进行 logo 替换")
+    return changed
+
+
+def add_top_right_logo_in_doc(doc, logo_path: str, margin_x: float = 10, margin_y: float = 0, logo_width: float = 80, logo_height: float = 80,
+                              page_offset: int = 0):
+    """
+    在每页右上角添加指定的 logo 图片（newlogo2.jpeg）。
+    逻辑：
+      1. 获取每页的页面尺寸
+      2. 计算右上角位置（页面宽度 - margin_x - logo_width, margin_y）
+      3. 在该位置插入新的 logo 图片
+
+    参数:
+        doc: 已打开的 fitz.Document
+        logo_path: logo图片路径
+        margin_x: 距离右边缘的边距（默认20）
+        margin_y: 距离上边缘的边距（默认20）
+        logo_width: logo宽度（默认80）
+        logo_height: logo高度（默认80）
+        page_offset: 文档第一页在原文档中的页码索引（分片处理时使用）
+
+    返回:
+        changed: 是否添加了 logo
+    """
+    if not os.path.exists(logo_path):
+        print(f"错误: logo 文件不存在: {logo_path}")
+        return False
+
+    changed = False
+    # logo 只读取一次，文档中只插入一次图片数据
+    logo = ImageResource(logo_path, (logo_width * 0.8, logo_height * 0.8))
+    placed = {}
+
+    for page_index, page in enumerate(doc, page_offset):
+        if add_top_right_logo_in_page(page, page_index, logo, margin_x, margin_y, logo_width, logo_height, placed=placed):
+            changed = True
+
+    if changed:
+        print(f"已完成右上角 logo 添加")
+    else:
+        print(f"未成功添加右上角 logo")
+    return changed
+
+
+def make_document_code(region_code: str):
+    """生成文档编码：地区编码-六位随机整数"""
+    import random
+
+    # 生成随机六位整数
+    random_int = random.randint(100000, 999999)
+    return f"{region_code}-{random_int}"
+
+
+def add_header_document_code_in_doc(doc, region_code: str, document_code: str = None, page_offset: int = 0,
+                                    text_index=None):
+    """
+    在文档每页的页眉右侧位置添加文档编码
+
+    参数:
+        doc: 已打开的 fitz.Document
+        region_code: 地区编码
+        document_code: 文档编码，为空时随机生成（地区编码-六位随机数）
+        page_offset: 文档第一页在原文档中的页码索引（分片处理时使用）
+        text_index: 共享的文档文本索引，添加了编码的页面会在索引中失效
+
+    返回:
+        changed: 是否添加了文档编码
+    """
+    # 同一份文档的所有页面（包括分片并行处理时的各个分片）必须使用同一个编码
+    if not document_code:
+        document_code = make_document_code(region_code)
+
+    changed = False
+
+    # 遍历每一页
+    for page_index, page in enumerate(doc, page_offset):
+        if add_header_document_code_in_page(page, page_index, document_code, text_index=text_index):
+            changed = True
+            if text_index is not None:
+                text_index.invalidate(page_index)
+
+    if changed:
+        print(f"已完成页眉文档编码添加: {document_code}")
+    else:
+        print(f"未成功添加页眉文档编码")
+    return changed
+
+
+# 信用分图片的位置：删除首尾页后的第2页（0-based 索引为1）的第2张图片（page2_img2）
+CREDIT_SCORE_PAGE = 1
+CREDIT_SCORE_IMAGE = 1
+
+
+def prefetch_credit_score_ocr(doc, token, project_id, region="cn-north-4", dispatcher=None, cache=None):
+    """
+    提前提交 page2_img2 的OCR请求（不等待结果，见 pdf_ocr_dispatch）
+    随后的编辑阶段执行期间请求在后台等待网络，replace_credit_score_image_in_doc 按图片内容取用结果。
+
+    返回:
+        submitted: 是否提交了请求（缺少Token或项目ID、没有目标图片、已有缓存结果时不提交）
+    """
+    if dispatcher is None or not token or not project_id or len(doc) <= CREDIT_SCORE_PAGE:
+        return False
+    image_list = doc[CREDIT_SCORE_PAGE].get_images(full=True)
+    if len(image_list) <= CREDIT_SCORE_IMAGE:
+        return False
+    image_bytes = doc.extract_image(image_list[CREDIT_SCORE_IMAGE][0])["image"]
+    if cache is not None and cache.contains("ocr", content_key(image_bytes)):
+        return False
+    dispatcher.submit(image_bytes, token, project_id, region, cache)
+    return True
+
+
+def replace_credit_score_image_in_doc(doc, base_name, image_dir, update_date, token=None, project_id=None,
+                                      region="cn-north-4", status_callback=None, cache=None, ocr_dispatcher=None):
+    """
+    提取 page2_img2（第2页的第2张图片），调用华为云OCR识别信用分，
+    并用信用分可视化图片替换文档中的原图片。
+
+    参数:
+        doc: 已打开的 fitz.Document
+        base_name: 原PDF文件名（不含扩展名），用于生成图片文件名
+        image_dir: 保存提取图片的目录，为空时不保存（图片只在内存中处理）；
+                   信用分可视化图片始终在内存中生成并直接插入，不写入磁盘
+        update_date: 可视化图片中显示的更新日期
+        token: 华为云Token，为空时跳过OCR
+        project_id: 华为云项目ID，为空时跳过OCR
+        region: 华为云区域名称
+        status_callback: 状态信息回调（默认 print）
+        cache: 可选的内容缓存（pdf_cache.ContentCache）：相同图片的OCR结果、相同分数和日期的可视化图片直接复用
+        ocr_dispatcher: 可选的 pdf_ocr_dispatch.OCRDispatcher，取用提前提交的OCR请求的结果（见 prefetch_credit_score_ocr）
+
+    返回:
+        changed: 是否替换了图片
+    """
+    emit = status_callback or print
+    changed = False
+    if image_dir:
+        os.makedirs(image_dir, exist_ok=True)
+
+    img_count = 0
+    image_info_list = []
+
+    # 仅提取 page2_img2（即第2页的第2张图片，1-based）
+    target_page_index = CREDIT_SCORE_PAGE   # 第2页，0-based 索引为1
+    target_img_index = CREDIT_SCORE_IMAGE   # 第2张图片，enumerate 从0开始
+
+    if len(doc) <= target_page_index:
+        emit(f"✓ 提取图片完成: {base_name} -> 共 0 张图片")
+        return False
+
+    page = doc[target_page_index]
+    image_list = page.get_images(full=True)
+
+    for img_index, img in enumerate(image_list):
+        # 只处理目标图片，其它图片跳过
+        if img_index != target_img_index:
+            continue
+
+        xref = img[0]
+        base_image = doc.extract_image(xref)
+        image_bytes = base_image["image"]
+        image_ext = base_image["ext"]
+
+        img_count += 1
+        # 生成图片文件名：PDF名_页码_图片索引.扩展名（保持原命名规则）
+        img_filename = f"{base_name}_page{target_page_index+1}_img{img_index+1}.{image_ext}"
+        img_path = os.path.normpath(os.path.join(image_dir, img_filename)) if image_dir else None
+
+        # 保存图片（OCR 直接使用内存中的图片数据）
+        if img_path:
+            with open(img_path, "wb") as f:
+                f.write(image_bytes)
+
+        # 记录图片信息
+        image_info = {
+            'index': img_count,
+            'pdf_name': base_name,
+            'page': target_page_index + 1,
+            'img_in_page': img_index + 1,
+            'filename': img_filename,
+            'path': img_path,
+            'ext': image_ext
+        }
+        image_info_list.append(image_info)
+
+        # 在控制台输出图片下标信息
+        print(f"[图片下标: {img_count}] PDF: {base_name}, 页码: {target_page_index+1}, "
+              f"页面内图片索引: {img_index+1}, 文件名: {img_filename}, "
+              f"扩展名: {image_ext}")
+
+        # 调用华为云OCR API识别图片文字
+        if not token:
+            emit("  - Token未获取，跳过OCR识别")
+            continue
+        if not project_id:
+            emit("  - 未配置项目ID，跳过OCR识别")
+            continue
+
+        ocr_key = content_key(image_bytes) if cache is not None else None
+        cached = cache.get("ocr", ocr_key) if cache is not None else None
+        if cached is not None:
+            emit("  - 使用缓存的OCR识别结果（相同图片已识别过）")
+            ocr_result = json.loads(cached.decode("utf-8"))
+            if ocr_dispatcher is not None:
+                # 提前提交的请求已经完成并写入了缓存，丢弃它的结果
+                ocr_dispatcher.discard(image_bytes)
+        elif ocr_dispatcher is not None:
+            # 请求通常已在编辑规则执行前提交，这里只等待剩余的网络时间
+            emit("  - 正在等待华为云OCR API识别结果...")
+            ocr_result = ocr_dispatcher.result(image_bytes, token, project_id, region, cache)
+        else:
+            emit("  - 正在调用华为云OCR API识别图片文字...")
+            ocr_result = call_huawei_ocr_api(image_bytes, token, project_id, region)
+            if ocr_result and cache is not None:
+                cache.put("ocr", ocr_key, json.dumps(ocr_result, ensure_ascii=False).encode("utf-8"))
+        if not ocr_result:
+            emit("  - OCR识别失败")
+            continue
+
+        # 提取识别结果
+        words_block_list = ocr_result.get("result", {}).get("words_block_list", [])
+        if not words_block_list:
+            emit("  - OCR识别成功，但未识别到文字")
+            print("OCR识别成功，但未识别到文字")
+            continue
+
+        recognized_text = "\n".join([block.get("words", "") for block in words_block_list])
+        emit(f"  - OCR识别成功，识别到 {len(words_block_list)} 个文字块")
+        print(f"\n=== OCR识别结果 ===")
+        print(f"识别到的文字块数量: {len(words_block_list)}")
+        print(f"识别内容:\n{recognized_text}\n")
+
+        # 提取倒数第三个文字块作为信用分
+        if len(words_block_list) < 3:
+            print(f"警告: 文字块数量不足3个，无法提取倒数第三个")
+            emit("  - 警告: 文字块数量不足，无法提取信用分")
+            continue
+
+        third_last_text = words_block_list[-3].get("words", "")
+        print(f"倒数第三个文字块: {third_last_text}")
+
+        # 尝试从文字中提取数字
+        numbers = re.findall(r'\d+', third_last_text)
+        if not numbers:
+            print(f"警告: 倒数第三个文字块中未找到数字: {third_last_text}")
+            emit(f"  - 警告: 未能在倒数第三个文字块中找到数字")
+            continue
+
+        credit_score = int(numbers[0])  # 取第一个数字
+        print(f"提取的信用分: {credit_score}")
+        emit(f"  - 提取到信用分: {credit_score}")
+
+        # 创建信用分可视化图片并替换PDF中的图片
+        try:
+            emit(f"  - 正在创建信用分可视化图片（分数: {credit_score}）...")
+            rects = page.get_image_rects(xref)
+            if not rects:
+                emit("  - 警告: 无法获取图片位置，跳过替换")
+                continue
+
+            target_img_rect = _credit_score_target_rect(page, rects[0])
+
+            # 可视化图片绘制到内存缓冲区，不经过临时文件；相同分数和日期的图片从缓存中复用
+            date_text = _chart_date_text(update_date)
+            chart_key = content_key("chart", str(credit_score), date_text) if cache is not None else None
+            chart_bytes = cache.get("chart", chart_key) if cache is not None else None
+            if chart_bytes is None:
+                # 延迟导入（会导入 matplotlib），只有真正需要绘图时才加载
+                import credit_score_visualizer
+                chart = io.BytesIO()
+                credit_score_visualizer.create_credit_score_visualization(
+                    score=credit_score,
+                    update_date=date_text,
+                    output_path=chart
+                )
+                chart_bytes = chart.getvalue()
+                if cache is not None:
+                    cache.put("chart", chart_key, chart_bytes)
+
+            emit("  - 信用分可视化图片创建成功，正在替换PDF中的图片...")
+
+            # 替换PDF中的图片
+            # 先删除原图片
+            try:
+                page.delete_image(xref)
+            except:
+                pass
+
+            # 在原位置插入新图片（放大）
+            page.insert_image(target_img_rect, stream=chart_bytes, keep_proportion=True)
+            changed = True
+
+            emit(f"  - ✓ 已成功替换PDF中的page2_img2为信用分可视化图片")
+            print(f"✓ 已成功替换PDF中的page2_img2为信用分可视化图片（分数: {credit_score}）")
+        except Exception as e:
+            emit(f"  - ✗ 替换图片时出错: {str(e)}")
+            print(f"✗ 替换图片时出错: {str(e)}")
+            import traceback
+            print(traceback.format_exc())
+
+    # 更新状态
+    emit(f"✓ 提取图片完成: {base_name} -> 共 {img_count} 张图片")
+    print(f"\n=== {base_name} 图片提取完成 ===")
+    print(f"共提取 {img_count} 张图片")
+    print(f"保存目录: {image_dir}\n" if image_dir else "未设置图片输出目录，图片未保存\n")
+    return changed
+
+
+def _chart_date_text(update_date):
+    """可视化图片中显示的日期文字（与 credit_score_visualizer 的格式一致，未指定时为今天）"""
+    if update_date is None:
+        update_date = datetime.now()
+    if isinstance(update_date, str):
+        return update_date
+    return update_date.strftime('%Y年%m月%d日')
+
+
+def _credit_score_target_rect(page, original_rect):
+    """根据原图片位置计算信用分可视化图片的插入位置（放大并水平居中）"""
+    # 获取页面尺寸
+    page_rect = page.rect
+    page_width = page_rect.width
+    page_height = page_rect.height
+
+    # 计算放大后的尺寸（原尺寸的3.3倍）
+    original_width = original_rect.x1 - original_rect.x0
+    original_height = original_rect.y1 - original_rect.y0
+    scale_factor = 3.3
+    enlarged_width = original_width * scale_factor
+    enlarged_height = original_height * scale_factor
+
+    # 计算原图片的中心点（用于保持y坐标），并向下移动一段距离
+    vertical_offset = 15
+    center_y = (original_rect.y0 + original_rect.y1) / 2 + vertical_offset
+
+    # 在页面上水平居中：x坐标 = (页面宽度 - 图片宽度) / 2
+    center_x = page_width / 2
+
+    # 以页面中心为x坐标，原图片中心为y坐标（向下偏移），计算放大后的矩形
+    target_img_rect = fitz.Rect(
+        center_x - enlarged_width / 2,
+        center_y - enlarged_height / 2,
+        center_x + enlarged_width / 2,
+        center_y + enlarged_height / 2
+    )
+
+    # 打印调试信息
+    print(f"页面尺寸: {page_width:.1f} x {page_height:.1f}")
+    print(f"原图片位置: ({original_rect.x0:.1f}, {original_rect.y0:.1f}) - ({original_rect.x1:.1f}, {original_rect.y1:.1f})")
+    print(f"原图片尺寸: {original_width:.1f} x {original_height:.1f}")
+    print(f"放大后尺寸: {enlarged_width:.1f} x {enlarged_height:.1f}")
+    print(f"页面中心x: {center_x:.1f}, 原图片中心y: {center_y:.1f}")
+    print(f"新图片位置: ({target_img_rect.x0:.1f}, {target_img_rect.y0:.1f}) - ({target_img_rect.x1:.1f}, {target_img_rect.y1:.1f})")
+    return target_img_rect
+
+
+# ======================== 按文件路径调用的兼容接口 ========================
+# 以下函数保持原有签名：打开文件、执行对应阶段、有修改时保存回原文件。
+# 批量处理请使用 PDFEditPipeline，以便整份文档只打开和保存一次。
+
+def remove_tel_blocks_from_pdf(pdf_path: str, prefix: str = "联系电话"):
+    """从 PDF 文件中删除（通过白色覆盖）以指定前缀开头的文本块"""
+    if not os.path.exists(pdf_path):
+        print(f"错误: PDF文件不存在: {pdf_path}")
+        return
+    _edit_pdf_file(pdf_path, remove_tel_blocks_from_doc, prefix=prefix)
+
+
+def remove_keyword_blocks_from_pdf(pdf_path: str, keywords: list):
+    """从 PDF 文件中删除（通过白色覆盖）包含指定关键词的文本块"""
+    if not os.path.exists(pdf_path):
+        print(f"错误: PDF文件不存在: {pdf_path}")
+        return
+    _edit_pdf_file(pdf_path, remove_keyword_blocks_from_doc, keywords=keywords)
+
+
+def add_subtitle_after_text(pdf_path: str, target_text: str, subtitle: str, font_size: float = 12, spacing: float = 5):
+    """在 PDF 文件第2页指定文本块下方添加二级标题"""
+    if not os.path.exists(pdf_path):
+        print(f"错误: PDF文件不存在: {pdf_path}")
+        return
+    _edit_pdf_file(pdf_path, add_subtitle_after_text_in_doc, target_text=target_text, subtitle=subtitle,
+                   font_size=font_size, spacing=spacing)
+
+
+def add_subtitle_above_text_in_page1(pdf_path: str, target_text: str, subtitle: str, font_size: float = 12, spacing: float = 5):
+    """在 PDF 文件第1页指定文本块上方添加二级标题"""
+    if not os.path.exists(pdf_path):
+        print(f"错误: PDF文件不存在: {pdf_path}")
+        return
+    _edit_pdf_file(pdf_path, add_subtitle_above_text_in_page1_in_doc, target_text=target_text, subtitle=subtitle,
+                   font_size=font_size, spacing=spacing)
+
+
+def replace_text_starting_with(pdf_path: str, target_prefix: str, new_text: str, font_size: float = 12):
+    """在 PDF 文件第1页替换以指定前缀开头的文本块"""
+    if not os.path.exists(pdf_path):
+        print(f"错误: PDF文件不存在: {pdf_path}")
+        return
+    _edit_pdf_file(pdf_path, replace_text_starting_with_in_doc, target_prefix=target_prefix, new_text=new_text,
+                   font_size=font_size)
+
+
+def replace_top_left_logo(pdf_path: str, logo_path: str, max_x: float = 100, max_y: float = 100):
+    """将 PDF 文件每页左上角区域内的图片替换为指定的 logo 图片"""
+    if not os.path.exists(pdf_path):
+        print(f"错误: PDF文件不存在: {pdf_path}")
+        return
+    _edit_pdf_file(pdf_path, replace_top_left_logo_in_doc, logo_path=logo_path, max_x=max_x, max_y=max_y)
+
+
+def add_top_right_logo(pdf_path: str, logo_path: str, margin_x: float = 10, margin_y: float = 0, logo_width: float = 80, logo_height: float = 80):
+    """在 PDF 文件每页右上角添加指定的 logo 图片"""
+    if not os.path.exists(pdf_path):
+        print(f"错误: PDF文件不存在: {pdf_path}")
+        return
+    _edit_pdf_file(pdf_path, add_top_right_logo_in_doc, logo_path=logo_path, margin_x=margin_x, margin_y=margin_y,
+                   logo_width=logo_width, logo_height=logo_height)
+
+
+def add_header_document_code(pdf_path: str, region_code: str):
+    """在 PDF 文件每页的页眉右侧位置添加文档编码"""
+    try:
+        _edit_pdf_file(pdf_path, add_header_document_code_in_doc, region_code=region_code)
+    except Exception as e:
+        print(f"添加页眉文档编码时出错: {e}")
+        import traceback
+        print(traceback.format_exc())
@@ -0,0 +1,602 @@
+"""
+声明式编辑规则
+原先写死在流水线中的编辑规则（"联系电话" 前缀、"企查查"/"企查分" 关键词及第1页例外、
+左上角 logo 区域、二级标题锚点等）改为保存在规则文件 pdf_edit_rules.json 中
+（与 pdf_processor_config.json 放在同一目录）。
+
+规则文件在每个批次中只编译一次，生成一个执行计划（RulePlan）：
+执行时每页只遍历一次，该页上适用的所有规则依次作用在这一次遍历中，
+因此增加一条规则不会增加一次整份文档的遍历。文本块来自共享的文档文本索引（见 pdf_text_index），
+只有插入了文字的规则才会让该页的索引失效。
+
+规则格式（rules 列表中的每一项，按列表顺序作用于每一页）:
+    type:    规则类型，见 RULE_HANDLERS
+    name:    规则名称（用于日志）
+    pages:   只作用于这些页（删除首尾页后的页码索引，从0开始），省略表示所有页
+    message: 规则执行完成后发出的状态信息
+    enabled: 为 false 时忽略该规则
+    其余字段为各规则类型的参数，见 DEFAULT_RULES。
+
+cover_blocks 规则的匹配方式:
+    match:    "prefix"（文本块以 patterns 中任一文本开头）或 "contains"（包含任一关键词）
+    patterns: 文本列表
+    regex:    正则表达式列表（可选，例如手机号、身份证号等个人信息）
+    keep:     例外列表，[{"pages": [...], "keywords": [...]}]，在这些页中包含这些关键词的文本块不覆盖
+所有 cover_blocks 规则的文本和正则会编译进同一个多模式匹配器（见 text_matcher），
+每个文本块只扫描一次即可得到所有规则的命中结果（正则表达式每条单独编译和搜索，
+含有无效正则的规则会被跳过并报告）。
+
+叠加层模式（规则文件顶层 "stamp": true）:
+    每页都相同的装饰（add_logo 右上角 logo、document_code 页眉文档编码）不再逐页绘制，
+    而是每份文档（每种页面尺寸）先在一个叠加页上绘制一次，再用 show_pdf_page 以 Form XObject
+    的形式引用到每一页：整份文档只有一份装饰内容，而不是每页一份文字和图片绘制指令。
+    旋转过的页面仍逐页直接绘制。
+
+删除模式（规则文件顶层 "redact": true）:
+    覆盖规则（cover_blocks、replace_text 的原标题、replace_logo 的原 logo 区域）不再用白色矩形盖住原文字，
+    而是用涂黑注释标记，每页一次 apply_redactions 真正删除矩形下方的原文字（见 pdf_text_writer），
+    输出更小，被覆盖的文字也不会再被复制或搜索到。删除后该页的文本索引失效。
+
+本模块不依赖 PyQt5。
+"""
+import os
+import json
+import fitz  # PyMuPDF
+from text_matcher import TextMatcher
+from pdf_text_index import DocumentTextIndex
+from pdf_image_resources import ImageResource, DEFAULT_DPI
+from pdf_text_writer import DocumentTextWriter
+from pdf_cache import content_key
+from pdf_pipeline import (
+    get_resource_path,
+    get_base_dir,
+    make_document_code,
+    _load_font_to_doc,
+    _insert_font_to_page,
+    cover_text_blocks_in_page,
+    replace_text_starting_with_in_page,
+    add_subtitle_after_text_in_page,
+    replace_top_left_logo_in_page,
+    add_top_right_logo_in_page,
+    add_header_document_code_in_page,
+)
+
+# 规则文件路径（与配置文件放在同一目录）
+RULES_FILE = os.path.join(get_base_dir(), "pdf_edit_rules.json")
+
+# 默认规则（与原先写死在流水线中的编辑步骤一致）
+DEFAULT_RULES = {
+    # 叠加层模式：右上角 logo 和页眉文档编码每份文档只绘制一次，以 Form XObject 引用到每页
+    "stamp": False,
+    # 删除模式：被覆盖的原文字从内容流中真正删除，而不是只用白色矩形盖住
+    "redact": False,
+    "rules": [
+        {
+            "type": "replace_text",
+            "name": "替换第1页标题",
+            "pages": [0],
+            "prefix": "1.1 企查分",
+            "text": "BOSS来单指数评估",
+            "font_file": "HYQiHeiClassic-55S.ttf",
+            "font_name": "HYQiHeiClassic55S",
+            "font_size": 12,
+            "block_adjust": [21, 2, -400, 2],
+            "message": "  - 已替换第1页的1.1 企查分为1.1 BOSS来单指数评估"
+        },
+        {
+            "type": "cover_blocks",
+            "name": "移除联系电话",
+            "match": "prefix",
+            "patterns": ["联系电话"],
+            "message": "  - 已移除以联系电话开头的文本块（如存在）"
+        },
+        {
+            "type": "cover_blocks",
+            "name": "删除企查查/企查分",
+            "match": "contains",
+            "patterns": ["企查查", "企查分"],
+            "keep": [{"pages": [0], "keywords": ["企查分"]}],
+            "message": "  - 已删除包含企查查或企查分的文本块（如存在）"
+        },
+        {
+            "type": "replace_logo",
+            "name": "左上角 logo 替换",
+            "image": "newlogo.png",
+            "max_x": 100,
+            "max_y": 100,
+            "scale": 1.2,
+            "message": "  - 已替换左上角 logo 为 newlogo.png（如存在）"
+        },
+        {
+            "type": "add_logo",
+            "name": "右上角 logo 添加",
+            "image": "newlogo2.jpeg",
+            "margin_x": 10,
+            "margin_y": 0,
+            "width": 80,
+            "height": 80,
+            "scale": 0.8,
+            "message": "  - 已在右上角添加 newlogo2.jpeg"
+        },
+        {
+            "type": "document_code",
+            "name": "页眉文档编码添加",
+            "font_size": 8,
+            "margin_top": 20,
+            "margin_right": 75,
+            "color": [0.7, 0.7, 0.7],
+            "message": "  - 已在每页页眉添加文档编码: {region_code}-XXXXXX"
+        },
+        {
+            "type": "subtitle_after",
+            "name": "添加二级标题",
+            "pages": [1],
+            "anchor": "1 基本信息",
+            "text": "1.1 BOSS来单指数评估",
+            "font_file": "HYQiHeiClassic-70S.ttf",
+            "font_name": "HYQiHeiClassic",
+            "font_size": 12,
+            "spacing": 5,
+            "message": "  - 已在1 基本信息下方添加二级标题"
+        }
+    ]
+}
+
+
+def load_rules():
+    """加载规则文件，文件不存在时写入默认规则，读取失败时使用默认规则"""
+    if os.path.exists(RULES_FILE):
+        try:
+            with open(RULES_FILE, 'r', encoding='utf-8') as f:
+                rules = json.load(f)
+            if isinstance(rules.get("rules"), list):
+                return rules
+            print(f"规则文件格式错误（缺少 rules 列表），使用默认规则: {RULES_FILE}")
+        except Exception as e:
+            print(f"加载规则文件失败: {e}，使用默认规则")
+        return DEFAULT_RULES
+    # 如果规则文件不存在，创建默认规则文件，方便用户修改
+    try:
+        with open(RULES_FILE, 'w', encoding='utf-8') as f:
+            json.dump(DEFAULT_RULES, f, ensure_ascii=False, indent=2)
+    except:
+        pass
+    return DEFAULT_RULES
+
+
+# ======================== 规则处理函数 ========================
+# 签名: handler(page, page_index, rule, context) -> changed
+# context 为本次文档执行的上下文: text_index（文档文本索引）、matcher（覆盖规则的多模式匹配器）、
+# fonts（已加载到文档的字体，字体文件 -> 字体名称）、images（已插入文档的图片，资源 -> xref）、
+# writer（pdf_text_writer.DocumentTextWriter，插入的文字先收集，每页一次写入）、document_code。
+
+def _font_for_page(page, page_index, rule, context):
+    """
+    自定义字体在整份文档中只嵌入一次（直接嵌入到第一个使用它的页面），
+    之后使用该字体的页面只添加引用；字体数据来自进程级字体缓存，保存时再做子集化
+    """
+    font_file = rule.get("font_file")
+    if not font_file:
+        return "china-s"
+    fonts = context["fonts"]
+    if font_file not in fonts:
+        fonts[font_file] = _load_font_to_doc(page.parent, font_file, rule.get("font_name", "F0"), page)
+        return fonts[font_file]
+    font_name = fonts[font_file]
+    _insert_font_to_page(page, page_index, font_file, font_name)
+    return font_name
+
+
+def _apply_cover_blocks(page, page_index, rule, context):
+    text_index = context["text_index"]
+    keep_keys = [
+        keep["key"] for keep in rule["keep"]
+        if keep["pages"] is None or page_index in keep["pages"]
+    ]
+    # 同一页上的所有覆盖规则共用一次扫描结果（缓存在文本索引中）
+    count = cover_text_blocks_in_page(
+        page, page_index, text_index.blocks(page_index), context["matcher"], rule["key"], keep_keys,
+        text_index.block_hits(page_index, context["matcher"]), context["writer"].for_page(page)
+    )
+    return count > 0
+
+
+def _apply_replace_text(page, page_index, rule, context):
+    font_name = _font_for_page(page, page_index, rule, context)
+    found, changed = replace_text_starting_with_in_page(
+        page, page_index, context["text_index"].blocks(page_index), rule["prefix"], rule["text"], font_name,
+        rule.get("font_size", 12), rule.get("block_adjust", (0, 0, 0, 0)), context["writer"].for_page(page)
+    )
+    if not found:
+        print(f"[调试] 警告: 在页面 {page_index + 1} 未找到以 '{rule['prefix']}' 开头的文本块")
+    return changed
+
+
+def _apply_subtitle_after(page, page_index, rule, context):
+    font_name = _font_for_page(page, page_index, rule, context)
+    return add_subtitle_after_text_in_page(
+        page, page_index, context["text_index"].blocks(page_index), rule["anchor"], rule["text"], font_name,
+        rule.get("font_size", 12), rule.get("spacing", 5), context["writer"].for_page(page), context["text_index"]
+    )
+
+
+def _apply_replace_logo(page, page_index, rule, context):
+    # 从本页的图片空间索引（所有规则共用）中只取出左上角区域内的图片
+    return replace_top_left_logo_in_page(
+        page, page_index, rule["image"], rule.get("max_x", 100), rule.get("max_y", 100), rule.get("scale", 1.2),
+        placed=context["images"], writer=context["writer"].for_page(page), text_index=context["text_index"]
+    )
+
+
+def _apply_add_logo(page, page_index, rule, context):
+    return add_top_right_logo_in_page(
+        page, page_index, rule["image"], rule.get("margin_x", 10), rule.get("margin_y", 0),
+        rule.get("width", 80), rule.get("height", 80), rule.get("scale", 0.8), placed=context["images"]
+    )
+
+
+def _add_form_to_page(page, form_xref, name_prefix="fzStamp"):
+    """
+    在本页内容最后引用一个已经存在于文档中的 Form XObject（"q /名称 Do Q"），
+    只增加一条很短的内容流和一个资源引用，不复制 Form 的内容。
+    """
+    doc = page.parent
+    used = {item[1] for item in doc.get_page_xobjects(page.number)}
+    used.update(item[7] for item in doc.get_page_images(page.number))
+    number = 0
+    while f"{name_prefix}{number}" in used:
+        number += 1
+    name = f"{name_prefix}{number}"
+
+    # /Resources 和 /XObject 可能是间接对象（可能被多个页面共用，加入同一个引用不影响其他页面）
+    kind, value = doc.xref_get_key(page.xref, "Resources")
+    if kind == "xref":
+        owner, path = int(value.split()[0]), "XObject"
+    else:
+        owner, path = page.xref, "Resources/XObject"
+    kind, value = doc.xref_get_key(owner, path)
+    if kind == "xref":
+        owner, path = int(value.split()[0]), name
+    else:
+        path = f"{path}/{name}"
+    doc.xref_set_key(owner, path, f"{form_xref} 0 R")
+
+    # 原内容包在 q/Q 中，保证叠加内容使用初始图形状态（与 show_pdf_page 相同）
+    page.wrap_contents()
+    stream_xref = doc.get_new_xref()
+    doc.update_object(stream_xref, "<<>>")
+    doc.update_stream(stream_xref, f"q /{name} Do Q".encode())
+    contents = page.get_contents() + [stream_xref]
+    doc.xref_set_key(page.xref, "Contents", "[" + " ".join(f"{xref} 0 R" for xref in contents) + "]")
+
+
+def _apply_stamp(page, page_index, rule, context):
+    """叠加层规则：该页适用的装饰规则在叠加页上绘制一次，再引用到本页"""
+    active = tuple(
+        index for index, sub_rule in enumerate(rule["rules"])
+        if sub_rule["pages"] is None or page_index in sub_rule["pages"]
+    )
+    if not active:
+        return False
+
+    if page.rotation:
+        # 旋转页面的坐标与叠加页不一致，直接绘制
+        changed = False
+        for index in active:
+            sub_rule = rule["rules"][index]
+            if RULE_HANDLERS[sub_rule["type"]][0](page, page_index, sub_rule, context):
+                changed = True
+        context["writer"].commit(page)
+        return changed
+
+    # 同一份文档中页面尺寸、坐标变换和适用规则都相同的页面共用一个叠加层
+    key = (tuple(page.rect), tuple(page.transformation_matrix), active)
+    overlays = context["overlays"]
+    if key not in overlays:
+        overlay = fitz.open()
+        overlay_page = overlay.new_page(width=page.rect.width, height=page.rect.height)
+        # 叠加页是另一份文档，字体和图片需要单独加载
+        overlay_context = dict(context, fonts={}, images={}, writer=DocumentTextWriter())
+        changed = False
+        for index in active:
+            sub_rule = rule["rules"][index]
+            if RULE_HANDLERS[sub_rule["type"]][0](overlay_page, page_index, sub_rule, overlay_context):
+                changed = True
+        overlay_context["writer"].commit()
+        if not changed:
+            overlay.close()
+            overlay = None
+        overlays[key] = {"doc": overlay, "form": None}
+
+    entry = overlays[key]
+    if entry["doc"] is None:
+        return False
+    if entry["form"] is None:
+        # 第一页：把叠加页复制到文档中（show_pdf_page 生成 Form XObject），记下它的 xref
+        doc = page.parent
+        before = {item[0] for item in doc.get_page_xobjects(page.number)}
+        page.show_pdf_page(page.rect, entry["doc"], 0)
+        added = [item[0] for item in doc.get_page_xobjects(page.number) if item[0] not in before]
+        entry["form"] = added[0] if added else 0
+    elif entry["form"]:
+        # 其余页面只引用同一个 Form XObject
+        _add_form_to_page(page, entry["form"])
+    else:
+        page.show_pdf_page(page.rect, entry["doc"], 0)
+    return True
+
+
+def _apply_document_code(page, page_index, rule, context):
+    return add_header_document_code_in_page(
+        page, page_index, context["document_code"], rule.get("font_size", 8), rule.get("margin_top", 20),
+        rule.get("margin_right", 75), rule.get("color", (0.7, 0.7, 0.7)), context["writer"].for_page(page),
+        context["text_index"]
+    )
+
+
+# 规则类型 -> (处理函数, 命中后让文本索引失效的部分: "text"、"images" 或 "all")
+# 覆盖（画白色矩形）不改变页面可提取的文字和图片；插入文字的规则让该页的文字缓存失效，
+# 替换或插入图片的规则只让该页的图片位置缓存失效
+RULE_HANDLERS = {
+    "cover_blocks": (_apply_cover_blocks, None),
+    "replace_text": (_apply_replace_text, "text"),
+    "subtitle_after": (_apply_subtitle_after, "text"),
+    "replace_logo": (_apply_replace_logo, "images"),
+    "add_logo": (_apply_add_logo, "images"),
+    "document_code": (_apply_document_code, "text"),
+    "stamp": (_apply_stamp, "all"),
+}
+
+# 叠加层模式下合并到叠加页中的规则类型
+STAMP_RULE_TYPES = ("add_logo", "document_code")
+
+
+def _page_set(pages):
+    """pages 字段：省略或为空表示所有页"""
+    if pages is None or pages == []:
+        return None
+    if isinstance(pages, int):
+        pages = [pages]
+    return frozenset(int(p) for p in pages)
+
+
+def compile_rules(rules_config, region_code=None, status_callback=None):
+    """
+    将规则文件内容编译为执行计划（每个批次只需编译一次）
+
+    参数:
+        rules_config: load_rules() 返回的规则字典
+        region_code: 地区编码，为空时跳过文档编码规则
+        status_callback: 状态信息回调，用于报告被跳过的规则
+
+    返回:
+        RulePlan
+    """
+    emit = status_callback or print
+    compiled = []
+    matcher = TextMatcher()
+    for index, rule in enumerate(rules_config.get("rules", [])):
+        if not isinstance(rule, dict) or not rule.get("enabled", True):
+            continue
+        rule_type = rule.get("type")
+        if rule_type not in RULE_HANDLERS or rule_type == "stamp":
+            emit(f"  - 未知的规则类型 {rule_type!r}（第{index + 1}条规则），已忽略")
+            continue
+        # 单条规则的指纹（规则内容和引用的资源文件；只有文档编码规则受地区编码影响），用于按规则拆分的阶段缓存
+        fingerprint = rules_fingerprint(
+            {"rules": [rule], "redact": rules_config.get("redact"), "stamp": rules_config.get("stamp")},
+            region_code if rule_type == "document_code" else None)
+        rule = dict(rule)
+        rule.setdefault("name", rule_type)
+        rule["fingerprint"] = fingerprint
+        rule["pages"] = _page_set(rule.get("pages"))
+
+        if rule_type == "cover_blocks":
+            rule["match"] = "prefix" if rule.get("match") == "prefix" else "contains"
+            rule["patterns"] = [str(p) for p in rule.get("patterns", []) if p]
+            rule["regex"] = [str(p) for p in rule.get("regex", []) if p]
+            if not rule["patterns"] and not rule["regex"]:
+                continue
+            # 所有覆盖规则的模式编译进同一个匹配器，用规则序号区分
+            rule["key"] = f"cover{index}"
+            try:
+                matcher.add_many(rule["regex"], rule["key"], "regex")
+            except Exception as e:
+                emit(f"  - 规则 {rule['name']} 的正则表达式无效: {e}，已忽略")
+                continue
+            matcher.add_many(rule["patterns"], rule["key"], rule["match"])
+            keep_rules, rule["keep"] = rule.get("keep", []), []
+            for keep_index, keep in enumerate(keep_rules):
+                keep_key = f"keep{index}_{keep_index}"
+                matcher.add_many(keep.get("keywords", []), keep_key)
+                rule["keep"].append({"pages": _page_set(keep.get("pages")), "key": keep_key})
+        elif rule_type in ("replace_logo", "add_logo"):
+            image_path = get_resource_path(rule.get("image", ""))
+            if not rule.get("image") or not os.path.exists(image_path):
+                emit(f"  - 未找到 {rule.get('image')}，跳过{rule['name']}（查找路径: {image_path}）")
+                continue
+            # 图片每批只读取一次；右上角 logo 的显示尺寸固定，直接按该尺寸预缩放，
+            # 替换左上角 logo 的尺寸取决于原 logo 区域，插入时按实际区域预缩放（见 ImageResource.fitted）
+            if rule_type == "replace_logo":
+                box = None
+            else:
+                scale = rule.get("scale", 0.8)
+                box = (rule.get("width", 80) * scale, rule.get("height", 80) * scale)
+            try:
+                rule["image"] = ImageResource(image_path, box, rule.get("dpi", DEFAULT_DPI))
+            except Exception as e:
+                emit(f"  - 无法读取 {rule.get('image')}: {e}，跳过{rule['name']}")
+                continue
+        elif rule_type == "document_code":
+            if not region_code:
+                emit(f"  - 未设置地区编码，跳过{rule['name']}")
+                continue
+
+        if rule.get("message"):
+            rule["message"] = rule["message"].replace("{region_code}", region_code or "")
+        compiled.append(rule)
+
+    try:
+        matcher.compile()
+    except Exception as e:
+        emit(f"  - 覆盖规则的匹配器编译失败: {e}，已忽略所有覆盖规则")
+        compiled = [rule for rule in compiled if rule["type"] != "cover_blocks"]
+        matcher = TextMatcher()
+
+    if rules_config.get("stamp"):
+        compiled = _group_stamp_rules(compiled)
+    return RulePlan(compiled, region_code, matcher, bool(rules_config.get("redact")),
+                    rules_fingerprint(rules_config, region_code))
+
+
+def rules_fingerprint(rules_config, region_code=None):
+    """
+    规则执行结果的指纹：规则文件内容、地区编码，以及规则引用的图片和字体文件的内容
+    （替换了 newlogo.png 等资源文件而规则文件没有改变时，指纹也会改变）
+    """
+    parts = [json.dumps(rules_config, ensure_ascii=False, sort_keys=True, default=str), region_code or ""]
+    resources = set()
+    for rule in rules_config.get("rules", []):
+        if isinstance(rule, dict):
+            resources.update(str(rule[field]) for field in ("image", "font_file") if rule.get(field))
+    for resource in sorted(resources):
+        try:
+            with open(get_resource_path(resource), "rb") as f:
+                parts.append(resource.encode("utf-8") + b"\0" + f.read())
+        except OSError:
+            parts.append(resource)
+    return content_key(*parts)
+
+
+def _group_stamp_rules(compiled):
+    """把装饰规则合并为一个叠加层规则，放在第一条装饰规则的位置"""
+    stamp_rules = [rule for rule in compiled if rule["type"] in STAMP_RULE_TYPES]
+    if not stamp_rules:
+        return compiled
+    stamp = {
+        "type": "stamp",
+        "name": "页面装饰叠加层（" + "、".join(rule["name"] for rule in stamp_rules) + "）",
+        "pages": None,
+        "rules": stamp_rules,
+        "fingerprint": content_key(*(rule["fingerprint"] for rule in stamp_rules)),
+    }
+    grouped = []
+    for rule in compiled:
+        if rule["type"] not in STAMP_RULE_TYPES:
+            grouped.append(rule)
+        elif rule is stamp_rules[0]:
+            grouped.append(stamp)
+    return grouped
+
+
+class RulePlan:
+    """编译后的规则执行计划：每页只遍历一次，依次应用该页适用的所有规则"""
+
+    def __init__(self, rules, region_code=None, matcher=None, redact=False, fingerprint=None):
+        self.rules = rules
+        self.region_code = region_code
+        self.matcher = matcher or TextMatcher()
+        self.redact = redact
+        self.fingerprint = fingerprint  # 见 rules_fingerprint，用于阶段缓存
+
+    @property
+    def font_files(self):
+        """规则使用的字体文件（工作进程预加载用）"""
+        files = []
+        for rule in self.rules:
+            for sub_rule in rule.get("rules", [rule]):
+                font_file = sub_rule.get("font_file")
+                if font_file and font_file not in files:
+                    files.append(font_file)
+        return files
+
+    def split(self):
+        """按规则拆分为多个执行计划（每个只包含一条规则，指纹为该规则的指纹），用于按规则缓存阶段输出"""
+        return [RulePlan([rule], self.region_code, self.matcher, self.redact, rule["fingerprint"]) for rule in self.rules]
+
+    @property
+    def messages(self):
+        """所有规则执行完成后要发出的状态信息"""
+        messages = []
+        for rule in self.rules:
+            for sub_rule in rule.get("rules", [rule]):
+                if sub_rule.get("message"):
+                    messages.append(sub_rule["message"])
+        return messages
+
+    def run(self, doc, document_code=None, page_offset=0, text_index=None):
+        """
+        在文档上执行所有规则（签名与流水线阶段函数一致，可按页分片执行）
+
+        参数:
+            doc: 已打开的 fitz.Document
+            document_code: 页眉文档编码，为空时随机生成（分片执行时必须由调用方统一传入）
+            page_offset: 文档第一页在原文档中的页码索引（分片处理时使用）
+            text_index: 共享的文档文本索引，为空时新建
+
+        返回:
+            changed: 是否有规则修改了文档
+        """
+        if not document_code and self.region_code:
+            document_code = make_document_code(self.region_code)
+        if text_index is None:
+            text_index = DocumentTextIndex(doc, page_offset)
+        context = {
+            "fonts": {}, "images": {}, "overlays": {}, "writer": DocumentTextWriter(self.redact), "document_code": document_code,
+            "matcher": self.matcher, "text_index": text_index,
+        }
+        writer = context["writer"]
+        hits = {index: 0 for index in range(len(self.rules))}
+        errors = []
+
+        for page_index, page in enumerate(doc, page_offset):
+            active = [
+                (index, rule) for index, rule in enumerate(self.rules)
+                if rule["pages"] is None or page_index in rule["pages"]
+            ]
+            if not active:
+                continue
+
+            # 覆盖矩形和插入的文字先收集起来，该页的规则执行完后一次写入；
+            # 插入图片的规则之前先写入已收集的内容，保证图片位于覆盖矩形之上；
+            # 删除模式下写入时会删除原文字，写入了内容就让该页的文本索引失效
+            pending_text = False
+            for index, rule in active:
+                handler, modifies = RULE_HANDLERS[rule["type"]]
+                if modifies in ("images", "all"):
+                    if writer.commit(page) and self.redact:
+                        pending_text = True
+                    if pending_text:
+                        text_index.invalidate(page_index)
+                        pending_text = False
+                try:
+                    if handler(page, page_index, rule, context):
+                        hits[index] += 1
+                        if modifies == "text":
+                            pending_text = True
+                        if modifies == "all" or (modifies == "images" and self.redact):
+                            # 删除模式下替换 logo 时会删除原 logo 区域内的文字
+                            text_index.invalidate(page_index)
+                        if modifies in ("images", "all"):
+                            text_index.invalidate_images(page_index)
+                except Exception as e:
+                    errors.append(f"{rule['name']}（页面 {page_index + 1}）: {e}")
+            # 文字写入页面后该页的文本索引才失效
+            if writer.commit(page) and self.redact:
+                pending_text = True
+            if pending_text:
+                text_index.invalidate(page_index)
+
+        for entry in context["overlays"].values():
+            if entry["doc"] is not None:
+                entry["doc"].close()
+
+        for index, rule in enumerate(self.rules):
+            if hits[index]:
+                print(f"规则 [{rule['name']}] 已作用于 {hits[index]} 页")
+            else:
+                print(f"规则 [{rule['name']}] 未匹配任何页面")
+
+        if errors:
+            raise RuntimeError("；".join(errors))
+        return any(hits.values())
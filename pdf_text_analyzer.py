@@ -5,24 +5,28 @@ PDF文本结构分析工具
 import fitz  # PyMuPDF
 from PyPDF2 import PdfReader
 import json
+from pdf_text_index import DocumentTextIndex
 
 
-def analyze_pdf_text_structure_pymupdf(pdf_path):
+def analyze_pdf_text_structure_pymupdf(pdf_path, text_index=None):
     """
     使用PyMuPDF分析PDF文本结构
+    传入 text_index 时复用其中已提取的文本（与 extract_text_with_positions 共用，每页只提取一次）
     """
     print("=" * 60)
     print("使用 PyMuPDF (fitz) 分析PDF文本结构")
     print("=" * 60)
     
-    doc = fitz.open(pdf_path)
+    own_index = text_index is None
+    if own_index:
+        text_index = DocumentTextIndex(fitz.open(pdf_path))
+    doc = text_index.doc
     
     for page_num in range(len(doc)):
-        page = doc[page_num]
         print(f"\n--- 第 {page_num + 1} 页 ---")
         
         # 获取文本块（blocks）- 这些是文本的视觉分组
-        blocks = page.get_text("dict")["blocks"]
+        blocks = text_index.text_dict(page_num)["blocks"]
         
         text_blocks = []
         for block_idx, block in enumerate(blocks):
@@ -51,7 +55,8 @@ def analyze_pdf_text_structure_pymupdf(pdf_path):
         
         print(f"\n本页共有 {len(text_blocks)} 个文本块")
     
-    doc.close()
+    if own_index:
+        doc.close()
 
 
 def analyze_pdf_text_structure_pypdf2(pdf_path):
@@ -82,21 +87,24 @@ def analyze_pdf_text_structure_pypdf2(pdf_path):
                 pass
 
 
-def extract_text_with_positions(pdf_path):
+def extract_text_with_positions(pdf_path, text_index=None):
     """
     提取文本及其位置信息（模拟文本框）
+    传入 text_index 时复用其中已提取的文本
     """
     print("\n" + "=" * 60)
     print("提取文本及其位置信息（模拟文本框）")
     print("=" * 60)
     
-    doc = fitz.open(pdf_path)
+    own_index = text_index is None
+    if own_index:
+        text_index = DocumentTextIndex(fitz.open(pdf_path))
+    doc = text_index.doc
     
     all_text_boxes = []
     
     for page_num in range(len(doc)):
-        page = doc[page_num]
-        blocks = page.get_text("dict")["blocks"]
+        blocks = text_index.text_dict(page_num)["blocks"]
         
         for block_idx, block in enumerate(blocks):
             if "lines" in block:
@@ -129,7 +137,8 @@ def extract_text_with_positions(pdf_path):
                     print(f"  大小: {bbox[2] - bbox[0]:.1f} x {bbox[3] - bbox[1]:.1f}")
                     print(f"  内容: {full_text[:80]}..." if len(full_text) > 80 else f"  内容: {full_text}")
     
-    doc.close()
+    if own_index:
+        doc.close()
     
     return all_text_boxes
 
@@ -181,14 +190,18 @@ if __name__ == "__main__":
     pdf_path = sys.argv[1]
     
     try:
+        # 方法1和方法3共用一个文本索引，每页的文本只提取一次
+        text_index = DocumentTextIndex(fitz.open(pdf_path))
+        
         # 方法1: 使用PyMuPDF分析
-        analyze_pdf_text_structure_pymupdf(pdf_path)
+        analyze_pdf_text_structure_pymupdf(pdf_path, text_index)
         
         # 方法2: 使用PyPDF2分析
         analyze_pdf_text_structure_pypdf2(pdf_path)
         
         # 方法3: 提取文本位置信息（模拟文本框）
-        text_boxes = extract_text_with_positions(pdf_path)
+        text_boxes = extract_text_with_positions(pdf_path, text_index)
+        text_index.doc.close()
         
         # 方法4: 尝试识别段落结构
         if text_boxes:
@@ -0,0 +1,150 @@
+"""
+文档文本索引
+同一份文档的各个编辑阶段（覆盖联系电话、覆盖关键词、替换文本、添加二级标题等）
+以前各自对同一页调用 page.get_text("blocks")。文本索引按页缓存提取结果，
+所有阶段查询同一个索引；只有阶段真正修改了某页的文字内容（插入文本）时，
+才让该页的缓存失效，下一次查询时重新提取。
+
+提取标志只保留需要的部分：
+  - blocks: 与 PyMuPDF 默认值相同（不包含图片块）
+  - dict:   去掉 TEXT_PRESERVE_IMAGES，不解码和复制图片数据（只需要文字、位置和字体）
+
+索引同时记录每页的图片位置（一次 get_image_info 调用，而不是对每个图片 xref 调用 get_image_rects），
+并为文本块和图片分别建立空间索引（见 spatial_index），每页只建立一次，所有规则共用：
+区域查询（左上角 logo）和最近邻查询（二级标题、页眉文档编码与相邻文字的位置检查）只检查相关的网格单元。
+文字被修改后只重建该页的文本块索引，图片被替换或插入后只重建图片索引。
+
+本模块只依赖 PyMuPDF。
+"""
+import fitz  # PyMuPDF
+from spatial_index import GridIndex
+
+# get_text("blocks") 使用的标志（PyMuPDF 默认值，不包含图片块）
+BLOCK_FLAGS = fitz.TEXTFLAGS_BLOCKS & ~fitz.TEXT_PRESERVE_IMAGES
+# get_text("dict") 使用的标志（默认值去掉图片）
+DICT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+
+class DocumentTextIndex:
+    """
+    按页缓存文本提取结果
+
+    页码使用原文档中的页码索引：分片处理时 doc 只包含部分页面，
+    page_offset 为分片第一页在原文档中的索引。
+    """
+
+    def __init__(self, doc, page_offset=0):
+        self.doc = doc
+        self.page_offset = page_offset
+        self._blocks = {}     # 页码索引 -> get_text("blocks") 结果
+        self._dicts = {}      # 页码索引 -> get_text("dict") 结果
+        self._hits = {}       # (页码索引, id(匹配器)) -> 每个文本块的匹配结果
+        self._images = {}     # 页码索引 -> [(xref, fitz.Rect)]
+        self._text_grids = {}   # 页码索引 -> GridIndex（文本块）
+        self._image_grids = {}  # 页码索引 -> GridIndex（图片 xref）
+        self.extract_count = 0
+
+    def _page(self, page_index):
+        return self.doc[page_index - self.page_offset]
+
+    def blocks(self, page_index):
+        """返回该页的文本块列表 (x0, y0, x1, y1, text, block_no, block_type)"""
+        blocks = self._blocks.get(page_index)
+        if blocks is None:
+            blocks = self._page(page_index).get_text("blocks", flags=BLOCK_FLAGS)
+            self._blocks[page_index] = blocks
+            self.extract_count += 1
+        return blocks
+
+    def text_dict(self, page_index):
+        """返回该页的 get_text("dict") 结果（不包含图片块）"""
+        page_dict = self._dicts.get(page_index)
+        if page_dict is None:
+            page_dict = self._page(page_index).get_text("dict", flags=DICT_FLAGS)
+            self._dicts[page_index] = page_dict
+            self.extract_count += 1
+        return page_dict
+
+    def block_hits(self, page_index, matcher):
+        """返回该页每个文本块的多模式匹配结果（见 text_matcher），与 blocks() 一一对应"""
+        key = (page_index, id(matcher))
+        hits = self._hits.get(key)
+        if hits is None:
+            hits = [matcher.scan(b[4]) if len(b) >= 5 else {} for b in self.blocks(page_index)]
+            self._hits[key] = hits
+        return hits
+
+    def image_rects(self, page_index):
+        """返回该页所有图片的绘制位置 [(xref, fitz.Rect)]，按在页面内容中出现的顺序排列（不含内嵌图片）"""
+        images = self._images.get(page_index)
+        if images is None:
+            images = [
+                (info["xref"], fitz.Rect(info["bbox"]))
+                for info in self._page(page_index).get_image_info(xrefs=True)
+                if info.get("xref")
+            ]
+            self._images[page_index] = images
+        return images
+
+    def text_grid(self, page_index):
+        """返回该页文本块的空间索引，对象为文本块"""
+        grid = self._text_grids.get(page_index)
+        if grid is None:
+            grid = GridIndex()
+            for block in self.blocks(page_index):
+                grid.insert(block[:4], block)
+            self._text_grids[page_index] = grid
+        return grid
+
+    def image_grid(self, page_index):
+        """返回该页图片的空间索引，对象为图片 xref"""
+        grid = self._image_grids.get(page_index)
+        if grid is None:
+            grid = GridIndex()
+            for xref, rect in self.image_rects(page_index):
+                grid.insert(rect, xref)
+            self._image_grids[page_index] = grid
+        return grid
+
+    def query_images(self, page_index, rect):
+        """返回与 rect 相交的图片 [(xref, fitz.Rect)]，按在页面内容中出现的顺序排列"""
+        return [(xref, fitz.Rect(found_rect)) for found_rect, xref in self.image_grid(page_index).query(rect)]
+
+    def query_blocks(self, page_index, rect, exclude=None):
+        """返回与 rect 相交的文本块（exclude 为要排除的文本块，例如定位用的目标文本块）"""
+        return [
+            block for _, block in self.text_grid(page_index).query(rect)
+            if block is not exclude and block[4].strip()
+        ]
+
+    def nearest_blocks(self, page_index, point, count=1, max_distance=None, predicate=None):
+        """
+        返回距离 point 最近的 count 个文本块 [(距离, 文本块)]，从近到远排列
+        predicate: 可选的过滤函数 predicate(文本块) -> bool（例如只找目标文本块下方的文本块）
+        """
+        found = self.text_grid(page_index).nearest(
+            point, count, max_distance,
+            lambda rect, block: bool(block[4].strip()) and (predicate is None or predicate(block))
+        )
+        return [(distance, block) for distance, _, block in found]
+
+    def invalidate(self, page_index):
+        """该页的文字内容已被修改，丢弃缓存"""
+        self._blocks.pop(page_index, None)
+        self._dicts.pop(page_index, None)
+        self._text_grids.pop(page_index, None)
+        for key in [key for key in self._hits if key[0] == page_index]:
+            del self._hits[key]
+
+    def invalidate_images(self, page_index):
+        """该页的图片已被删除、替换或插入，丢弃图片位置缓存（文字缓存保留）"""
+        self._images.pop(page_index, None)
+        self._image_grids.pop(page_index, None)
+
+    def clear(self):
+        self._blocks.clear()
+        self._dicts.clear()
+        self._hits.clear()
+        self._images.clear()
+        self._text_grids.clear()
+        self._image_grids.clear()
@@ -0,0 +1,148 @@
+"""
+批量写入文字和覆盖矩形
+以前每段插入的文字（新标题、二级标题、每页的文档编码）都单独调用一次 insert_text / insert_textbox，
+每个覆盖用的白色矩形都单独调用一次 page.draw_rect，每次调用都会在页面上追加一个新的内容流。
+现在同一页上要绘制的矩形和文字先收集到一个 Shape 中，该页处理完后用一次 commit 写入，
+整页只追加一个内容流。Shape 写入时矩形在前、文字在后：覆盖矩形总是位于新插入的文字下方。
+
+使用 Shape 而不是 TextWriter：TextWriter 只能使用嵌入的 fitz.Font，
+而文档编码使用不嵌入的内置中文字体 china-s，换成 TextWriter 会改变字体和字宽。
+
+删除模式（redact=True）: 覆盖矩形不再画在原内容上方，而是作为涂黑（redaction）注释收集起来，
+commit 时每页一次 apply_redactions，真正删除矩形下方的原文字，再填充白色。
+原文字不再留在内容流中，输出更小，下游的文本搜索和索引也不会再提取到被覆盖的内容。
+矩形下方的图片和线条保留（被白色填充遮住），需要删除的图片（如被替换的 logo）由调用方单独删除。
+
+文字宽度按字体缓存每个字符的宽度后精确计算（取代按字符数估算的宽度）。
+
+本模块只依赖 PyMuPDF。
+"""
+import fitz  # PyMuPDF
+
+# 字体 -> {字符: 字号为1时的宽度}
+_CHAR_WIDTHS = {}
+
+
+def text_width(text, font_size, fontname="china-s", font=None):
+    """
+    返回文字在给定字号下的精确宽度（点）
+
+    参数:
+        fontname: 内置字体名称（如 china-s、helv）
+        font:     可选，fitz.Font（自定义字体，应来自进程级字体缓存）；传入时忽略 fontname
+    """
+    key = ("font", id(font)) if font is not None else fontname
+    widths = _CHAR_WIDTHS.setdefault(key, {})
+    total = 0.0
+    for char in text:
+        width = widths.get(char)
+        if width is None:
+            if font is not None:
+                width = font.text_length(char, fontsize=1)
+            else:
+                width = fitz.get_text_length(char, fontname=fontname, fontsize=1)
+            widths[char] = width
+        total += width
+    return total * font_size
+
+
+class PageTextWriter:
+    """
+    收集一页上要插入的文字和覆盖矩形，commit 时一次写入
+
+    insert_text / insert_textbox 的参数与 fitz.Page 的同名方法相同；
+    insert_textbox 放不下时返回负数，且不会写入任何内容（与 Page.insert_textbox 一致）。
+    redact 为 True 时 draw_rect 改为删除矩形下方的原文字（见模块说明）。
+    """
+
+    def __init__(self, page, redact=False):
+        self.page = page
+        self.redact = redact
+        self._shape = None
+        self._redactions = 0
+        self.pending = 0
+        self.removed = 0  # 已应用的删除区域数量
+
+    def _get_shape(self):
+        if self._shape is None:
+            self._shape = self.page.new_shape()
+        return self._shape
+
+    def insert_text(self, point, text, **kwargs):
+        rc = self._get_shape().insert_text(point, text, **kwargs)
+        self.pending += 1
+        return rc
+
+    def insert_textbox(self, rect, text, **kwargs):
+        rc = self._get_shape().insert_textbox(rect, text, **kwargs)
+        if rc >= 0:
+            self.pending += 1
+        return rc
+
+    def draw_rect(self, rect, color=(1, 1, 1), fill=(1, 1, 1), width=0):
+        """添加一个矩形（默认白色填充，用于覆盖原内容），参数与 Page.draw_rect 相同"""
+        if self.redact:
+            self.page.add_redact_annot(rect, fill=fill, cross_out=False)
+            self._redactions += 1
+            self.pending += 1
+            return
+        shape = self._get_shape()
+        shape.draw_rect(rect)
+        shape.finish(color=color, fill=fill, width=width)
+        self.pending += 1
+
+    def _apply_redactions(self):
+        # 先删除原内容，新插入的文字随后写入，不会被删除
+        page = self.page
+        fonts = {font[4]: font[0] for font in page.get_fonts()}
+        page.apply_redactions(images=fitz.PDF_REDACT_IMAGE_NONE, graphics=fitz.PDF_REDACT_LINE_ART_NONE)
+        # apply_redactions 会重写页面资源并去掉内容中尚未使用的字体，
+        # 而已加载到页面、等待 commit 时才使用的字体（如新标题的字体）必须保留
+        remaining = {font[4] for font in page.get_fonts()}
+        doc = page.parent
+        resources = doc.xref_get_key(page.xref, "Resources")
+        for name, xref in fonts.items():
+            if name in remaining or not xref:
+                continue
+            if resources[0] == "xref":
+                doc.xref_set_key(int(resources[1].split()[0]), f"Font/{name}", f"{xref} 0 R")
+            else:
+                doc.xref_set_key(page.xref, f"Resources/Font/{name}", f"{xref} 0 R")
+        self.removed += self._redactions
+        self._redactions = 0
+
+    def commit(self):
+        """写入收集到的矩形和文字（整页一个内容流），返回写入的数量"""
+        count = self.pending
+        if self._redactions:
+            self._apply_redactions()
+        if self._shape is not None and count:
+            self._shape.commit()
+        self._shape = None
+        self.pending = 0
+        return count
+
+
+class DocumentTextWriter:
+    """按页管理 PageTextWriter，同一份文档中的所有插入文字和覆盖矩形都经过它"""
+
+    def __init__(self, redact=False):
+        self.redact = redact
+        self._pages = {}  # 页面对象 id -> PageTextWriter
+
+    def for_page(self, page):
+        # PageTextWriter 持有页面对象，页面对象存在期间 id 不会被复用
+        writer = self._pages.get(id(page))
+        if writer is None:
+            writer = PageTextWriter(page, self.redact)
+            self._pages[id(page)] = writer
+        return writer
+
+    def commit(self, page=None):
+        """写入某一页（page 为空时为所有页）收集到的内容，返回写入的数量"""
+        if page is not None:
+            writer = self._pages.pop(id(page), None)
+            return writer.commit() if writer is not None else 0
+        count = sum(writer.commit() for writer in self._pages.values())
+        self._pages.clear()
+        return count
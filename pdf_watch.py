@@ -0,0 +1,251 @@
+"""
+热文件夹监控（常驻模式）
+持续轮询输入目录，文件完整写入后立即交给常驻的进程池处理，
+处理结果写入输出目录，原文件移动到归档目录（成功 processed/，失败 failed/）。
+
+进程池在启动时就完成预热（matplotlib、字体、logo），
+因此每个文件的延迟只包含处理时间，而不包含冷启动时间。
+本模块不依赖 PyQt5。
+"""
+import os
+import time
+import shutil
+import multiprocessing
+import concurrent.futures
+from pdf_batch import (
+    batch_fingerprint,
+    make_output_prefix,
+    run_pdf_file_job,
+    wait_for_workers,
+    warm_up_worker,
+    worker_settings,
+)
+from pdf_rules import load_rules, compile_rules
+from pdf_output import OutputWriter
+
+# 华为云Token有效期为24小时，提前一小时刷新
+TOKEN_REFRESH_SECONDS = 23 * 3600
+
+# 等待所有工作进程启动并完成预热的最长时间（秒）
+WARM_UP_TIMEOUT = 120
+
+
+def _has_pdf_trailer(pdf_path):
+    """检查文件末尾是否已有 %%EOF 标记，用来排除上游仍在写入（或写入中断）的文件"""
+    try:
+        with open(pdf_path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(0, size - 1024))
+            return b"%%EOF" in f.read()
+    except OSError:
+        return False
+
+
+class HotFolderWatcher:
+    """监控输入目录并处理新到达的PDF文件"""
+
+    def __init__(self, watch_dir, output_dir, settings, employee_id=None, employee_name=None, worker_count=0,
+                 poll_interval=2.0, settle_seconds=3.0, archive_dir=None, failed_dir=None,
+                 token_provider=None, status_callback=None):
+        """
+        参数:
+            watch_dir: 监控的输入目录
+            output_dir: 输出目录
+            settings: 批处理设置字典（见 pdf_batch）
+            employee_id / employee_name: 用于输出文件名前缀
+            worker_count: 常驻工作进程数，0 表示按CPU核数自动选择
+            poll_interval: 轮询间隔（秒）
+            settle_seconds: 文件大小和修改时间保持不变多久后才认为写入完成（秒）
+            archive_dir: 处理成功（或跳过）的原文件移动到此目录，默认 watch_dir/processed
+            failed_dir: 处理失败的原文件移动到此目录，默认 watch_dir/failed
+            token_provider: 获取华为云Token的函数，用于定期刷新Token；为空时使用 settings 中的Token
+            status_callback: 状态信息回调（默认 print）
+        """
+        self.watch_dir = os.path.normpath(watch_dir)
+        self.output_dir = os.path.normpath(output_dir)
+        self.settings = dict(settings)
+        worker_count = int(worker_count or 0)
+        # 常驻模式没有文件数量上限，0 表示按CPU核数自动选择
+        self.worker_count = worker_count if worker_count > 0 else (os.cpu_count() or 1)
+        self.poll_interval = poll_interval
+        self.settle_seconds = settle_seconds
+        self.archive_dir = archive_dir or os.path.join(self.watch_dir, "processed")
+        self.failed_dir = failed_dir or os.path.join(self.watch_dir, "failed")
+        self.token_provider = token_provider
+        self.emit = status_callback or print
+        # 编辑规则只在启动时编译一次，之后每个文件直接使用编译好的执行计划
+        self._rules_config = load_rules()
+        if self.settings.get("rule_plan") is None:
+            self.settings["rule_plan"] = compile_rules(self._rules_config, self.settings.get("region_code"), self.emit)
+
+        # 添加工号-姓名前缀
+        self.prefix = make_output_prefix(employee_id, employee_name)
+        # 设置指纹用于结果缓存（见 pdf_batch.result_cache_key），获取到Token后重新计算
+        self._update_fingerprint()
+        # 输出目录只在启动时扫描一次，之后在内存索引中预留输出文件名
+        self.writer = OutputWriter(self.output_dir, self.settings.get("fsync_outputs", False))
+
+        self._pending = {}        # 路径 -> (大小, 修改时间, 首次观察到该状态的时间)
+        self._in_flight = {}      # future -> (输入路径, 输出路径)
+        self._in_flight_paths = set()
+        self._token_time = 0
+
+    def _update_fingerprint(self):
+        self.settings["settings_fingerprint"] = batch_fingerprint(self.settings, self._rules_config, self.prefix)
+
+    def _refresh_token_if_needed(self):
+        if not self.token_provider:
+            return
+        if self._token_time and time.time() - self._token_time < TOKEN_REFRESH_SECONDS:
+            return
+        token = self.token_provider()
+        self._token_time = time.time()
+        if token:
+            ocr_enabled = bool(self.settings.get("huawei_token"))
+            self.settings["huawei_token"] = token
+            if not ocr_enabled:
+                # 之前没有Token时的结果没有执行OCR，不能再复用
+                self._update_fingerprint()
+            self.emit("✓ 华为云Token获取成功（有效期24小时）")
+        else:
+            self.emit("✗ 华为云Token获取失败，本轮跳过OCR")
+
+    def scan(self):
+        """
+        扫描输入目录，返回已经写入完成、可以处理的PDF文件列表
+        文件大小和修改时间在 settle_seconds 内保持不变，才认为上游已经写完。
+        """
+        now = time.time()
+        ready = []
+        seen = set()
+        try:
+            names = sorted(os.listdir(self.watch_dir))
+        except FileNotFoundError:
+            return ready
+
+        for name in names:
+            # 只处理PDF，忽略隐藏文件和上游写入中的临时文件
+            if not name.lower().endswith(".pdf") or name.startswith((".", "~")):
+                continue
+            path = os.path.join(self.watch_dir, name)
+            if path in self._in_flight_paths:
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if not os.path.isfile(path):
+                continue
+            seen.add(path)
+
+            state = (stat.st_size, stat.st_mtime)
+            previous = self._pending.get(path)
+            if previous is None or previous[:2] != state:
+                self._pending[path] = (state[0], state[1], now)
+                continue
+            if stat.st_size > 0 and now - previous[2] >= self.settle_seconds and _has_pdf_trailer(path):
+                ready.append(path)
+
+        # 清理已经消失的文件
+        for path in list(self._pending):
+            if path not in seen:
+                del self._pending[path]
+        return ready
+
+    def _submit(self, executor, pdf_path):
+        base_name = os.path.splitext(os.path.basename(pdf_path))[0]
+        output_path = self.writer.reserve(base_name, self.prefix)
+        future = executor.submit(run_pdf_file_job, pdf_path, output_path, worker_settings(self.settings))
+        self._in_flight[future] = (pdf_path, output_path)
+        self._in_flight_paths.add(pdf_path)
+        self._pending.pop(pdf_path, None)
+
+    def _archive(self, pdf_path, result):
+        """将处理完的原文件移出监控目录，避免重复处理"""
+        target_dir = self.failed_dir if result == "error" else self.archive_dir
+        try:
+            os.makedirs(target_dir, exist_ok=True)
+            target = os.path.join(target_dir, os.path.basename(pdf_path))
+            if os.path.exists(target):
+                stem, ext = os.path.splitext(os.path.basename(pdf_path))
+                target = os.path.join(target_dir, f"{stem}_{int(time.time())}{ext}")
+            shutil.move(pdf_path, target)
+        except Exception as e:
+            self.emit(f"✗ 移动原文件失败 {os.path.basename(pdf_path)}: {e}")
+
+    def _collect_finished(self, timeout):
+        if not self._in_flight:
+            return
+        done, _ = concurrent.futures.wait(
+            list(self._in_flight), timeout=timeout, return_when=concurrent.futures.FIRST_COMPLETED
+        )
+        written = []
+        for future in done:
+            pdf_path, output_path = self._in_flight.pop(future)
+            try:
+                result, messages, _ = future.result()
+                for message in messages:
+                    self.emit(message)
+            except Exception as e:
+                result = "error"
+                self.emit(f"✗ 错误 {os.path.basename(pdf_path)}: {str(e)}")
+            if result == "ok":
+                written.append(output_path)
+            else:
+                self.writer.release(output_path)
+            self._archive(pdf_path, result)
+            self._in_flight_paths.discard(pdf_path)
+        # 这一轮完成的输出文件统一刷到磁盘（需要时）
+        self.writer.sync(written)
+
+    def _warm_up(self, executor):
+        """
+        提前启动并预热所有工作进程，避免第一个文件承担冷启动时间
+        进程池只在没有空闲进程时才启动新进程，提交几个立即返回的任务不能保证每个进程都已启动；
+        这里提交 worker_count 个在同一个屏障处等待的任务，全部完成后才开始轮询
+        """
+        with multiprocessing.Manager() as manager:
+            barrier = manager.Barrier(self.worker_count)
+            futures = [executor.submit(wait_for_workers, barrier, WARM_UP_TIMEOUT) for _ in range(self.worker_count)]
+            concurrent.futures.wait(futures)
+        pids = set()
+        for future in futures:
+            try:
+                pids.add(future.result())
+            except Exception as e:
+                self.emit(f"工作进程预热失败: {e}")
+                return
+        self.emit(f"已预热 {len(pids)} 个工作进程")
+
+    def run_forever(self, stop_event=None):
+        """
+        常驻运行，直到 stop_event 被设置或收到 KeyboardInterrupt
+        stop_event 可以是 threading.Event 等任何带 is_set() 的对象
+        """
+        os.makedirs(self.watch_dir, exist_ok=True)
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.emit(f"开始监控目录: {self.watch_dir} -> {self.output_dir}（{self.worker_count} 个常驻进程）")
+
+        executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.worker_count, initializer=warm_up_worker, initargs=(self.settings["rule_plan"],))
+        try:
+            self._warm_up(executor)
+
+            while not (stop_event and stop_event.is_set()):
+                self._refresh_token_if_needed()
+                # 最多同时排队 2 倍进程数的文件，其余留在目录中等待下一轮
+                capacity = self.worker_count * 2 - len(self._in_flight)
+                for pdf_path in self.scan()[:max(0, capacity)]:
+                    self._submit(executor, pdf_path)
+                if self._in_flight:
+                    self._collect_finished(self.poll_interval)
+                else:
+                    time.sleep(self.poll_interval)
+        except KeyboardInterrupt:
+            self.emit("收到中断信号，等待正在处理的文件完成...")
+        finally:
+            while self._in_flight:
+                self._collect_finished(None)
+            executor.shutdown(wait=True)
+            self.emit("已停止监控")
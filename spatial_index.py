@@ -0,0 +1,129 @@
+"""
+页面空间索引
+将页面上的对象（文本块、图片位置）按矩形放入均匀网格，支持:
+  - query(rect):    返回与矩形相交的对象
+  - nearest(point): 返回距离某点最近的对象
+
+区域查询只检查矩形覆盖到的网格单元，耗时与命中数量相关，而不是与页面上的对象总数相关，
+对图片很多的页面尤其明显。本模块只依赖标准库（矩形为 (x0, y0, x1, y1) 元组或 fitz.Rect）。
+"""
+import math
+import heapq
+
+
+class GridIndex:
+    """均匀网格空间索引（页面坐标，单位为点）"""
+
+    def __init__(self, cell_size=72.0):
+        """
+        参数:
+            cell_size: 网格单元边长，默认72点（1英寸）
+        """
+        self.cell_size = float(cell_size)
+        self._cells = {}     # (列, 行) -> [对象序号]
+        self._items = []     # 序号 -> (矩形, 对象)
+        self._bounds = None  # 所有对象的外接范围（网格坐标）
+
+    def __len__(self):
+        return len(self._items)
+
+    def _cell_range(self, x0, y0, x1, y1):
+        size = self.cell_size
+        return (
+            int(math.floor(x0 / size)), int(math.floor(y0 / size)),
+            int(math.floor(x1 / size)), int(math.floor(y1 / size)),
+        )
+
+    def insert(self, rect, item):
+        """插入一个对象，rect 为对象的外接矩形"""
+        x0, y0, x1, y1 = (float(c) for c in rect[:4])
+        index = len(self._items)
+        self._items.append(((x0, y0, x1, y1), item))
+        c0, r0, c1, r1 = self._cell_range(x0, y0, x1, y1)
+        for col in range(c0, c1 + 1):
+            for row in range(r0, r1 + 1):
+                self._cells.setdefault((col, row), []).append(index)
+        if self._bounds is None:
+            self._bounds = [c0, r0, c1, r1]
+        else:
+            bounds = self._bounds
+            bounds[0], bounds[1] = min(bounds[0], c0), min(bounds[1], r0)
+            bounds[2], bounds[3] = max(bounds[2], c1), max(bounds[3], r1)
+        return index
+
+    def query(self, rect, predicate=None):
+        """
+        返回与 rect 相交（含边界接触）的对象列表 [(矩形, 对象)]，按插入顺序排列
+        rect 的坐标可以是 ±inf（例如查询 "左上角 x < 100, y < 100" 的区域）
+        predicate: 可选的过滤函数 predicate(矩形, 对象) -> bool
+        """
+        if self._bounds is None:
+            return []
+        x0, y0, x1, y1 = (float(c) for c in rect[:4])
+        # 把无限大的查询范围限制在已有对象的网格范围内
+        b0, b1, b2, b3 = self._bounds
+        size = self.cell_size
+        c0, r0, c1, r1 = self._cell_range(
+            max(x0, b0 * size), max(y0, b1 * size),
+            min(x1, (b2 + 1) * size), min(y1, (b3 + 1) * size),
+        )
+        c0, r0, c1, r1 = max(c0, b0), max(r0, b1), min(c1, b2), min(r1, b3)
+
+        found = set()
+        for col in range(c0, c1 + 1):
+            for row in range(r0, r1 + 1):
+                for index in self._cells.get((col, row), ()):
+                    if index in found:
+                        continue
+                    (ix0, iy0, ix1, iy1), item = self._items[index]
+                    if ix0 <= x1 and ix1 >= x0 and iy0 <= y1 and iy1 >= y0:
+                        if predicate is None or predicate(self._items[index][0], item):
+                            found.add(index)
+        return [self._items[index] for index in sorted(found)]
+
+    def nearest(self, point, count=1, max_distance=None, predicate=None):
+        """
+        返回距离 point 最近的 count 个对象 [(距离, 矩形, 对象)]
+        距离为点到矩形的最短距离（点在矩形内时为0），从近到远逐圈扩展网格单元搜索。
+        """
+        if self._bounds is None:
+            return []
+        px, py = float(point[0]), float(point[1])
+        size = self.cell_size
+        pc, pr = int(math.floor(px / size)), int(math.floor(py / size))
+        b0, b1, b2, b3 = self._bounds
+        max_ring = max(abs(pc - b0), abs(pc - b2), abs(pr - b1), abs(pr - b3))
+
+        heap = []
+        seen = set()
+        for ring in range(max_ring + 1):
+            # 已找到足够多的对象，且下一圈网格不可能更近时停止
+            ring_distance = (ring - 1) * size if ring > 0 else 0.0
+            if len(heap) >= count and -heap[0][0] <= ring_distance:
+                break
+            if max_distance is not None and ring_distance > max_distance:
+                break
+            for col in range(pc - ring, pc + ring + 1):
+                for row in range(pr - ring, pr + ring + 1):
+                    if max(abs(col - pc), abs(row - pr)) != ring:
+                        continue
+                    for index in self._cells.get((col, row), ()):
+                        if index in seen:
+                            continue
+                        seen.add(index)
+                        rect, item = self._items[index]
+                        if predicate is not None and not predicate(rect, item):
+                            continue
+                        dx = max(rect[0] - px, 0.0, px - rect[2])
+                        dy = max(rect[1] - py, 0.0, py - rect[3])
+                        distance = math.hypot(dx, dy)
+                        if max_distance is not None and distance > max_distance:
+                            continue
+                        entry = (-distance, -index)
+                        if len(heap) < count:
+                            heapq.heappush(heap, entry)
+                        elif entry > heap[0]:
+                            heapq.heapreplace(heap, entry)
+
+        results = sorted((-d, -i) for d, i in heap)
+        return [(distance, self._items[index][0], self._items[index][1]) for distance, index in results]
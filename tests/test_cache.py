@@ -0,0 +1,83 @@
+"""
+内容缓存（pdf_cache.ContentCache）：读写和按最近使用时间整理
+
+运行: python -m unittest discover -s tests
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_cache import ContentCache, content_key
+
+
+class ContentCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cache = ContentCache(self.tmp, max_bytes=10 ** 6)
+        self.keys = {}
+        # a 最旧、d 最新，每个条目 400 字节
+        now = time.time()
+        for age, name in enumerate("dcba"):
+            key = content_key(name)
+            self.cache.put("result", key, name.encode() * 400)
+            os.utime(self.cache._path("result", key), (now - 100 * (age + 1),) * 2)
+            self.keys[name] = key
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def remaining(self):
+        return "".join(name for name in "abcd" if self.cache.contains("result", self.keys[name]))
+
+    def test_get_and_miss(self):
+        self.assertEqual(self.cache.get("result", self.keys["a"]), b"a" * 400)
+        self.assertIsNone(self.cache.get("result", content_key("missing")))
+        self.assertIsNone(self.cache.get("stage", self.keys["a"]))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+    def test_trim_under_limit_keeps_everything(self):
+        self.assertEqual(self.cache.trim(), 0)
+        self.assertEqual(self.remaining(), "abcd")
+
+    def test_trim_removes_least_recently_used_down_to_90_percent(self):
+        self.cache.max_bytes = 1000
+        self.assertEqual(self.cache.trim(), 2)
+        self.assertEqual(self.remaining(), "cd")
+
+    def test_get_refreshes_entry(self):
+        self.cache.get("result", self.keys["a"])
+        self.cache.max_bytes = 1000
+        self.cache.trim()
+        self.assertEqual(self.remaining(), "ad")
+
+    def test_recent_temp_files_are_kept(self):
+        tmp_path = self.cache._path("result", self.keys["a"]) + ".123.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(b"x" * 400)
+        os.utime(tmp_path, (time.time() - 1000,) * 2)
+        self.cache.max_bytes = 1400
+        self.cache.trim()
+        self.assertTrue(os.path.exists(tmp_path))
+        self.assertEqual(self.remaining(), "cd")
+
+    def test_put_trims_after_writing_a_tenth_of_the_limit(self):
+        self.cache.max_bytes = 1000
+        self.cache.put("result", content_key("e"), b"e" * 100)
+        self.assertEqual(self.remaining(), "cd")
+        self.assertTrue(self.cache.contains("result", content_key("e")))
+
+    def test_oversized_data_is_not_cached(self):
+        self.cache.max_bytes = 100
+        key = content_key("big")
+        self.cache.put("result", key, b"x" * 101)
+        self.assertFalse(self.cache.contains("result", key))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+"""
+批处理日志（断点续跑）
+
+运行: python -m unittest discover -s tests
+"""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+
+import fitz
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_batch import batch_fingerprint, make_batch_settings, run_batch
+from pdf_journal import BatchJournal, JOURNAL_NAME, file_sha256
+from pdf_rules import compile_rules
+
+
+def make_pdf(path, pages=4, text="report"):
+    doc = fitz.open()
+    for index in range(pages):
+        doc.new_page().insert_text((72, 100), f"{text} {index + 1}", fontsize=12)
+    doc.save(path)
+    doc.close()
+
+
+class BatchJournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.input = os.path.join(self.tmp, "in.pdf")
+        self.output = os.path.join(self.tmp, "out.pdf")
+        make_pdf(self.input)
+        make_pdf(self.output)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def record(self, result, fingerprint="fp"):
+        journal = BatchJournal(self.tmp, fingerprint)
+        journal.record(self.input, result, self.output, sha256=file_sha256(self.input))
+        journal.close()
+
+    def reopen(self, fingerprint="fp"):
+        return BatchJournal(self.tmp, fingerprint)
+
+    def test_completed_file_is_skipped(self):
+        self.record("ok")
+        self.assertEqual(self.reopen().completed(self.input)["output"], os.path.abspath(self.output))
+
+    def test_failed_file_is_retried(self):
+        self.record("ok")
+        self.record("failed")
+        self.assertIsNone(self.reopen().completed(self.input))
+
+    def test_latest_record_wins(self):
+        self.record("failed")
+        self.record("skipped")
+        self.assertIsNotNone(self.reopen().completed(self.input))
+
+    def test_other_fingerprint_or_missing_output_is_not_done(self):
+        self.record("ok")
+        self.assertIsNone(self.reopen("other").completed(self.input))
+        os.remove(self.output)
+        self.assertIsNone(self.reopen().completed(self.input))
+
+    def test_touched_file_with_same_content_falls_back_to_sha256(self):
+        self.record("ok")
+        stat = os.stat(self.input)
+        os.utime(self.input, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5 * 10 ** 9))
+        self.assertIsNotNone(self.reopen().completed(self.input))
+
+    def test_changed_content_with_same_size_is_reprocessed(self):
+        self.record("ok")
+        stat = os.stat(self.input)
+        with open(self.input, "r+b") as f:
+            data = bytearray(f.read())
+            data[-2] ^= 0xFF
+            f.seek(0)
+            f.write(data)
+        self.assertEqual(os.stat(self.input).st_size, stat.st_size)
+        os.utime(self.input, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5 * 10 ** 9))
+        self.assertIsNone(self.reopen().completed(self.input))
+
+    def test_truncated_last_line_is_ignored(self):
+        self.record("ok")
+        with open(os.path.join(self.tmp, JOURNAL_NAME), "a", encoding="utf-8") as f:
+            f.write('{"input": "half')
+        self.assertIsNotNone(self.reopen().completed(self.input))
+
+
+class ResumeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.input = os.path.join(self.tmp, "in.pdf")
+        self.output_dir = os.path.join(self.tmp, "out")
+        os.makedirs(self.output_dir)
+        make_pdf(self.input)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def run_once(self, update_date):
+        settings = make_batch_settings({"result_cache": False}, update_date=update_date)
+        settings["rule_plan"] = compile_rules({"rules": []}, None, lambda message: None)
+        messages = []
+        results = run_batch([self.input], self.output_dir, settings, worker_count=1, status_callback=messages.append)
+        processed = any(message.startswith("正在处理") for message in messages)
+        return results[self.input], processed
+
+    def test_resume_skips_completed_file_with_same_date(self):
+        date = datetime(2026, 1, 5)
+        self.assertEqual(self.run_once(date), ("ok", True))
+        self.assertEqual(self.run_once(date), ("ok", False))
+
+    def test_resume_reprocesses_when_date_changes(self):
+        self.assertEqual(self.run_once(datetime(2026, 1, 5)), ("ok", True))
+        self.assertEqual(self.run_once(datetime(2026, 1, 6)), ("ok", True))
+
+    def test_default_date_is_today(self):
+        rules = {"rules": []}
+        today = batch_fingerprint({"update_date": datetime.now()}, rules)
+        self.assertEqual(batch_fingerprint({"update_date": None}, rules), today)
+        self.assertNotEqual(batch_fingerprint({"update_date": datetime(2000, 1, 1)}, rules), today)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+后台OCR请求（pdf_ocr_dispatch.OCRDispatcher）：结果取用和未取用结果的上限
+OCR接口替换为本地函数，不发送网络请求。
+
+运行: python -m unittest discover -s tests
+"""
+import os
+import sys
+import threading
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pdf_ocr_dispatch
+from pdf_ocr_dispatch import OCRDispatcher
+
+
+class FakeOCR:
+    """记录调用次数；gate 未打开时请求一直等待"""
+
+    def __init__(self):
+        self.calls = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self._lock = threading.Lock()
+
+    def __call__(self, image_bytes, token, project_id, region):
+        self.gate.wait(5)
+        with self._lock:
+            self.calls.append(image_bytes)
+        return {"text": image_bytes.decode()}
+
+
+class OCRDispatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.ocr = FakeOCR()
+        patcher = mock.patch.object(pdf_ocr_dispatch, "call_huawei_ocr_api", self.ocr)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.dispatcher = OCRDispatcher(max_in_flight=2)
+
+    def tearDown(self):
+        if self.dispatcher._executor is not None:
+            self.dispatcher._executor.shutdown(wait=True)
+
+    def submit_all(self, images):
+        futures = [self.dispatcher.submit(image, "token", "project") for image in images]
+        for future in futures:
+            future.result(5)
+        self.dispatcher._executor.shutdown(wait=True)  # 完成回调都已执行
+        self.dispatcher._executor = None
+
+    def test_result_uses_prefetched_request(self):
+        self.dispatcher.submit(b"a", "token", "project").result(5)
+        self.assertEqual(self.dispatcher.result(b"a", "token", "project"), {"text": "a"})
+        self.assertEqual(self.ocr.calls, [b"a"])
+        self.assertEqual(self.dispatcher._pending, {})
+
+    def test_same_image_in_flight_is_sent_once(self):
+        self.ocr.gate.clear()
+        first = self.dispatcher.submit(b"a", "token", "project")
+        second = self.dispatcher.submit(b"a", "token", "project")
+        self.ocr.gate.set()
+        self.assertIs(first, second)
+        self.assertEqual(self.dispatcher.result(b"a", "token", "project"), {"text": "a"})
+        self.assertEqual(self.ocr.calls, [b"a"])
+
+    def test_unclaimed_results_are_capped(self):
+        images = [str(index).encode() for index in range(20)]
+        self.submit_all(images)
+        self.assertEqual(self.dispatcher.max_unclaimed, 8)
+        self.assertEqual(len(self.dispatcher._pending), 8)
+        self.assertEqual(len(self.dispatcher._finished), 8)
+        kept = {key for key, _ in self.dispatcher._finished}
+        self.assertEqual(kept, set(self.dispatcher._pending))
+
+    def test_dropped_result_is_requested_again(self):
+        images = [str(index).encode() for index in range(20)]
+        self.submit_all(images)
+        dropped = [image for image in images if pdf_ocr_dispatch.content_key(image) not in self.dispatcher._pending]
+        self.assertEqual(len(dropped), 12)
+        self.assertEqual(self.dispatcher.result(dropped[0], "token", "project"), {"text": dropped[0].decode()})
+        self.assertEqual(self.ocr.calls.count(dropped[0]), 2)
+
+    def test_discard_forgets_result(self):
+        self.submit_all([b"a", b"b"])
+        self.dispatcher.discard(b"a")
+        self.assertEqual(len(self.dispatcher._pending), 1)
+        self.assertEqual(len(self.dispatcher._finished), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
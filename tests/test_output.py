@@ -0,0 +1,86 @@
+"""
+输出文件名预留（pdf_output.OutputWriter）
+
+运行: python -m unittest discover -s tests
+"""
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_output import OutputWriter
+
+
+class OutputWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def touch(self, name):
+        with open(os.path.join(self.tmp, name), "wb"):
+            pass
+
+    def reserve(self, writer, base_name="report", prefix=""):
+        return os.path.basename(writer.reserve(base_name, prefix))
+
+    def test_reserve_skips_existing_processed_files(self):
+        self.touch("report_processed.pdf")
+        self.touch("report_processed_1.pdf")
+        self.touch("report_processed_3.pdf")
+        writer = OutputWriter(self.tmp)
+        self.assertEqual(self.reserve(writer), "report_processed_2.pdf")
+        self.assertEqual(self.reserve(writer), "report_processed_4.pdf")
+
+    def test_reserved_names_are_not_handed_out_twice(self):
+        writer = OutputWriter(self.tmp)
+        names = [self.reserve(writer) for _ in range(3)]
+        self.assertEqual(names, ["report_processed.pdf", "report_processed_1.pdf", "report_processed_2.pdf"])
+        self.assertEqual(self.reserve(writer, prefix="2013-a_"), "2013-a_report_processed.pdf")
+
+    def test_release_frees_unwritten_name(self):
+        writer = OutputWriter(self.tmp)
+        first = writer.reserve("report")
+        writer.release(first)
+        self.assertEqual(writer.reserve("report"), first)
+
+    def test_release_keeps_written_name(self):
+        writer = OutputWriter(self.tmp)
+        first = writer.reserve("report")
+        self.touch(os.path.basename(first))
+        writer.release(first)
+        self.assertEqual(self.reserve(writer), "report_processed_1.pdf")
+
+    def test_file_created_after_scan_is_not_overwritten(self):
+        writer = OutputWriter(self.tmp)
+        self.assertEqual(self.reserve(writer, "other"), "other_processed.pdf")  # 扫描目录
+        self.touch("report_processed.pdf")
+        self.assertEqual(self.reserve(writer), "report_processed_1.pdf")
+
+    def test_concurrent_reservations_are_unique(self):
+        writer = OutputWriter(self.tmp)
+        names = []
+        lock = threading.Lock()
+
+        def worker():
+            for _ in range(50):
+                name = writer.reserve("report")
+                with lock:
+                    names.append(name)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(set(names)), 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
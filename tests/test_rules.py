@@ -0,0 +1,139 @@
+"""
+规则执行计划（pdf_rules.RulePlan）：叠加层模式与逐页绘制、删除模式与白色矩形覆盖的输出对比
+
+运行: python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+
+import fitz
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_pipeline import document_to_bytes
+from pdf_rules import compile_rules
+
+PAGE_COUNT = 6
+DOCUMENT_CODE = "test-123456"
+
+DECORATION_RULES = [
+    {"type": "add_logo", "name": "右上角 logo 添加", "image": "newlogo2.jpeg"},
+    {"type": "document_code", "name": "页眉文档编码添加"},
+]
+
+COVER_RULES = [
+    {"type": "cover_blocks", "name": "删除联系方式", "match": "prefix", "patterns": ["contact"]},
+    {"type": "document_code", "name": "页眉文档编码添加"},
+]
+
+
+def make_document():
+    doc = fitz.open()
+    for index in range(PAGE_COUNT):
+        page = doc.new_page()
+        page.insert_text((72, 100), f"Page {index + 1}", fontsize=12)
+        page.insert_text((72, 160), f"contact secret {index + 1}", fontsize=12)
+    return doc
+
+
+def run_rules(rules, **options):
+    """按规则处理测试文档，返回保存后的字节"""
+    plan = compile_rules(dict(options, rules=rules), "test", lambda message: None)
+    doc = make_document()
+    try:
+        plan.run(doc, DOCUMENT_CODE)
+        return document_to_bytes(doc)
+    finally:
+        doc.close()
+
+
+def page_words(page):
+    return [word[4] for word in page.get_text("words")]
+
+
+class StampTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.direct = run_rules(DECORATION_RULES, stamp=False)
+        cls.stamped = run_rules(DECORATION_RULES, stamp=True)
+
+    def test_stamped_pages_match_direct_drawing(self):
+        direct = fitz.open(stream=self.direct, filetype="pdf")
+        stamped = fitz.open(stream=self.stamped, filetype="pdf")
+        try:
+            for direct_page, stamped_page in zip(direct, stamped):
+                self.assertEqual(page_words(stamped_page), page_words(direct_page))
+                self.assertIn(DOCUMENT_CODE, page_words(stamped_page))
+                direct_images = [info["bbox"] for info in direct_page.get_image_info()]
+                stamped_images = [info["bbox"] for info in stamped_page.get_image_info()]
+                self.assertEqual(len(stamped_images), 1)
+                for a, b in zip(fitz.Rect(stamped_images[0]), fitz.Rect(direct_images[0])):
+                    self.assertAlmostEqual(a, b, places=1)
+        finally:
+            direct.close()
+            stamped.close()
+
+    def test_all_pages_reference_one_form(self):
+        doc = fitz.open(stream=self.stamped, filetype="pdf")
+        try:
+            # show_pdf_page 生成的外层 Form 和其中引用的叠加页内容，每页都相同
+            forms = {tuple(item[0] for item in doc.get_page_xobjects(page.number)) for page in doc}
+            images = {tuple(item[0] for item in doc.get_page_images(page.number, full=True)) for page in doc}
+            self.assertEqual(len(forms), 1)
+            self.assertEqual(len(images), 1)
+            self.assertEqual(len(images.pop()), 1)
+        finally:
+            doc.close()
+
+    def test_stamped_output_is_smaller(self):
+        self.assertLess(len(self.stamped), len(self.direct))
+
+
+class RedactTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.covered = run_rules(COVER_RULES, redact=False)
+        cls.redacted = run_rules(COVER_RULES, redact=True)
+
+    def test_cover_keeps_text_under_white_box(self):
+        doc = fitz.open(stream=self.covered, filetype="pdf")
+        try:
+            for page in doc:
+                self.assertIn("secret", page_words(page))
+        finally:
+            doc.close()
+
+    def test_redact_removes_covered_text_only(self):
+        doc = fitz.open(stream=self.redacted, filetype="pdf")
+        try:
+            for number, page in enumerate(doc, 1):
+                words = page_words(page)
+                self.assertNotIn("secret", words)
+                self.assertEqual(words[:2], ["Page", str(number)])
+                self.assertIn(DOCUMENT_CODE, words)
+                self.assertEqual(page.first_annot, None)
+        finally:
+            doc.close()
+
+    def test_redacted_pages_render_like_covered_pages(self):
+        # 白色矩形边缘外可能露出被覆盖文字的几个抗锯齿像素，删除模式下这些像素也消失，其余像素相同
+        covered = fitz.open(stream=self.covered, filetype="pdf")
+        redacted = fitz.open(stream=self.redacted, filetype="pdf")
+        try:
+            for covered_page, redacted_page in zip(covered, redacted):
+                before = covered_page.get_pixmap(dpi=72).samples
+                after = redacted_page.get_pixmap(dpi=72).samples
+                self.assertEqual(len(after), len(before))
+                changed = [index for index in range(len(before)) if before[index] != after[index]]
+                self.assertLessEqual(len(changed), 30)
+                self.assertTrue(all(after[index] >= before[index] for index in changed))
+        finally:
+            covered.close()
+            redacted.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
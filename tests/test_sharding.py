@@ -0,0 +1,110 @@
+"""
+分片并行处理与串行处理的输出对比
+分片输出与串行输出渲染一致：每页的文字和渲染出的画面相同，所有页面使用同一个文档编码；
+对象编号和布局不同，不要求逐字节相同。每个分片各自插入一份 logo 和字体，合并后应去重，
+输出大小和图片、字体对象数量与串行处理相当。
+
+运行: python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+
+import fitz
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_pipeline import (
+    PDFEditPipeline, add_header_document_code_in_doc, add_top_right_logo_in_doc, document_to_bytes, get_resource_path,
+    make_document_code,
+)
+
+PAGE_COUNT = 40
+SHARD_PAGES = 10
+
+
+def add_footer_text_in_doc(doc, page_offset=0):
+    """每页底部写一行中文（嵌入字体），用于检查字体是否去重"""
+    for page_index, page in enumerate(doc, page_offset):
+        page.insert_text((50, page.rect.height - 30), f"第 {page_index + 1} 页 测试页脚", fontname="china-s", fontsize=9)
+    return True
+
+
+def make_pipeline(document_code):
+    pipeline = PDFEditPipeline()
+    pipeline.add_stage("添加右上角logo", add_top_right_logo_in_doc, per_page=True,
+                       logo_path=get_resource_path("newlogo2.jpeg"))
+    pipeline.add_stage("添加页脚", add_footer_text_in_doc, per_page=True)
+    pipeline.add_stage("添加页眉文档编码", add_header_document_code_in_doc, per_page=True,
+                       region_code="test", document_code=document_code)
+    return pipeline
+
+
+def make_document():
+    doc = fitz.open()
+    for index in range(PAGE_COUNT):
+        page = doc.new_page()
+        page.insert_text((72, 100), f"Page {index + 1}", fontsize=12)
+    return doc
+
+
+def xref_counts(data):
+    """返回 (图片对象数, 字体文件对象数)"""
+    doc = fitz.open(stream=data, filetype="pdf")
+    try:
+        images = fonts = 0
+        for xref in range(1, doc.xref_length()):
+            if doc.xref_get_key(xref, "Subtype")[1] == "/Image":
+                images += 1
+            elif doc.xref_get_key(xref, "Type")[1] == "/FontDescriptor":
+                fonts += 1
+        return images, fonts
+    finally:
+        doc.close()
+
+
+def page_renderings(data):
+    """返回每页的 (文字, 渲染像素)"""
+    doc = fitz.open(stream=data, filetype="pdf")
+    try:
+        return [(page.get_text(), page.get_pixmap(dpi=72).samples) for page in doc]
+    finally:
+        doc.close()
+
+
+class ShardedOutputTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.document_code = make_document_code("test")
+        serial_doc = make_document()
+        make_pipeline(cls.document_code).run(serial_doc, status_callback=lambda message: None)
+        cls.serial = document_to_bytes(serial_doc)
+        serial_doc.close()
+
+        sharded_doc, cls.changed = make_pipeline(cls.document_code).run_sharded(
+            make_document(), SHARD_PAGES, 2, status_callback=lambda message: None)
+        cls.page_count = sharded_doc.page_count
+        cls.sharded = document_to_bytes(sharded_doc)
+        sharded_doc.close()
+
+    def test_sharded_output_renders_like_serial(self):
+        self.assertTrue(self.changed)
+        self.assertEqual(self.page_count, PAGE_COUNT)
+        serial_pages = page_renderings(self.serial)
+        sharded_pages = page_renderings(self.sharded)
+        for number, (serial_page, sharded_page) in enumerate(zip(serial_pages, sharded_pages), 1):
+            self.assertEqual(sharded_page[0], serial_page[0], f"第 {number} 页文字不同")
+            self.assertEqual(sharded_page[1], serial_page[1], f"第 {number} 页渲染结果不同")
+
+    def test_all_pages_share_one_document_code(self):
+        for text, _ in page_renderings(self.sharded):
+            self.assertIn(self.document_code, text)
+
+    def test_shared_resources_are_deduplicated(self):
+        self.assertLessEqual(xref_counts(self.sharded), xref_counts(self.serial))
+        self.assertLessEqual(len(self.sharded), len(self.serial) * 1.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+页面空间索引（spatial_index.GridIndex）和文档文本索引的区域、最近邻查询
+
+运行: python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+
+import fitz
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spatial_index import GridIndex
+from pdf_text_index import DocumentTextIndex
+
+
+class GridIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.grid = GridIndex(cell_size=50)
+        self.grid.insert((10, 10, 40, 30), "logo")
+        self.grid.insert((300, 10, 380, 30), "header")
+        self.grid.insert((10, 400, 200, 420), "body")
+        self.grid.insert((0, 0, 600, 800), "background")
+
+    def test_query_returns_intersecting_items_in_insert_order(self):
+        found = [item for _, item in self.grid.query((float("-inf"), float("-inf"), 100, 100))]
+        self.assertEqual(found, ["logo", "background"])
+
+    def test_query_with_predicate(self):
+        found = self.grid.query((0, 0, 600, 800), lambda rect, item: item != "background")
+        self.assertEqual([item for _, item in found], ["logo", "header", "body"])
+
+    def test_nearest_orders_by_distance(self):
+        found = self.grid.nearest((320, 100), 2, predicate=lambda rect, item: item != "background")
+        self.assertEqual([item for _, _, item in found], ["header", "logo"])
+        self.assertAlmostEqual(found[0][0], 70.0)
+
+    def test_nearest_respects_max_distance(self):
+        found = self.grid.nearest((100, 300), 3, max_distance=50, predicate=lambda rect, item: item != "background")
+        self.assertEqual(found, [])
+
+    def test_empty_grid(self):
+        self.assertEqual(GridIndex().query((0, 0, 10, 10)), [])
+        self.assertEqual(GridIndex().nearest((0, 0)), [])
+
+
+class DocumentTextIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.doc = fitz.open()
+        page = self.doc.new_page()
+        page.insert_text((72, 100), "Anchor heading", fontsize=12)
+        page.insert_text((72, 160), "Following paragraph", fontsize=12)
+        page.insert_text((400, 30), "Header text", fontsize=8)
+        pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 10, 10), False)
+        page.insert_image(fitz.Rect(20, 20, 80, 60), pixmap=pix)
+        self.index = DocumentTextIndex(self.doc)
+
+    def tearDown(self):
+        self.doc.close()
+
+    def test_query_images_in_corner(self):
+        images = self.index.query_images(0, (float("-inf"), float("-inf"), 100, 100))
+        self.assertEqual(len(images), 1)
+        self.assertEqual(images[0][1], fitz.Rect(20, 20, 80, 60))
+        self.assertEqual(self.index.query_images(0, (200, 200, 300, 300)), [])
+
+    def test_query_and_nearest_blocks(self):
+        header = self.index.query_blocks(0, (350, 0, 600, 40))
+        self.assertEqual([block[4].strip() for block in header], ["Header text"])
+
+        anchor = next(b for b in self.index.blocks(0) if "Anchor" in b[4])
+        below = self.index.nearest_blocks(
+            0, (anchor[0], anchor[3]), predicate=lambda b: b is not anchor and b[1] >= anchor[3])
+        self.assertEqual(below[0][1][4].strip(), "Following paragraph")
+
+    def test_grids_are_reused_until_invalidated(self):
+        text_grid, image_grid = self.index.text_grid(0), self.index.image_grid(0)
+        self.assertIs(self.index.text_grid(0), text_grid)
+        self.index.invalidate(0)
+        self.assertIsNot(self.index.text_grid(0), text_grid)
+        self.assertIs(self.index.image_grid(0), image_grid)
+        self.index.invalidate_images(0)
+        self.assertIsNot(self.index.image_grid(0), image_grid)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+多模式文本匹配（text_matcher）：Aho-Corasick 命中位置、重叠关键词、前缀和正则
+
+运行: python -m unittest discover -s tests
+"""
+import os
+import re
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_matcher import AhoCorasick, TextMatcher
+
+
+class AhoCorasickTest(unittest.TestCase):
+
+    def test_match_positions(self):
+        automaton = AhoCorasick()
+        automaton.add("信用", "credit")
+        automaton.add("报告", "report")
+        text = "企业信用报告，个人信用"
+        self.assertEqual(sorted(automaton.iter_matches(text)), [(2, "credit"), (4, "report"), (9, "credit")])
+
+    def test_overlapping_patterns(self):
+        automaton = AhoCorasick()
+        for word in ("he", "she", "his", "hers"):
+            automaton.add(word, word)
+        found = sorted(automaton.iter_matches("ushers"))
+        self.assertEqual(found, [(1, "she"), (2, "he"), (2, "hers")])
+
+    def test_nested_patterns_share_end(self):
+        automaton = AhoCorasick()
+        automaton.add("aaa", "aaa")
+        automaton.add("aa", "aa")
+        found = sorted(automaton.iter_matches("aaaa"))
+        self.assertEqual(found, [(0, "aa"), (0, "aaa"), (1, "aa"), (1, "aaa"), (2, "aa")])
+
+    def test_matches_agree_with_naive_search(self):
+        words = ["ab", "bab", "abc", "c", "bca"]
+        automaton = AhoCorasick()
+        for word in words:
+            automaton.add(word, word)
+        text = "abcababcabca"
+        expected = sorted((match.start(), word) for word in words
+                          for match in re.finditer(f"(?={re.escape(word)})", text))
+        self.assertEqual(sorted(automaton.iter_matches(text)), expected)
+
+    def test_adding_after_scan_rebuilds(self):
+        automaton = AhoCorasick()
+        automaton.add("abc", 1)
+        self.assertEqual(list(automaton.iter_matches("xabc")), [(1, 1)])
+        automaton.add("bc", 2)
+        self.assertEqual(sorted(automaton.iter_matches("xabc")), [(1, 1), (2, 2)])
+
+
+class TextMatcherTest(unittest.TestCase):
+
+    def test_first_added_pattern_wins_per_key(self):
+        matcher = TextMatcher()
+        matcher.add_many(["报告", "信用报告"], "rule1")
+        matcher.add("信用", "rule2")
+        self.assertEqual(matcher.scan("企业信用报告"), {"rule1": ("报告", "contains"), "rule2": ("信用", "contains")})
+
+    def test_prefix_only_at_start_after_whitespace(self):
+        matcher = TextMatcher().add("注:", "note", "prefix")
+        self.assertEqual(matcher.scan("  注: 以下内容"), {"note": ("注:", "prefix")})
+        self.assertEqual(matcher.scan("备注: 以下内容"), {})
+
+    def test_regex_overlapping_other_rules(self):
+        matcher = TextMatcher()
+        matcher.add(r"\d{4}年", "year", "regex")
+        matcher.add(r"(?i)page \d+", "page", "regex")
+        matcher.add("2024", "number")
+        self.assertEqual(matcher.scan("2024年 PAGE 3"), {
+            "year": (r"\d{4}年", "regex"),
+            "page": (r"(?i)page \d+", "regex"),
+            "number": ("2024", "contains"),
+        })
+
+    def test_invalid_regex_adds_nothing(self):
+        matcher = TextMatcher()
+        with self.assertRaises(re.error):
+            matcher.add_many([r"ok", r"(broken"], "rule", "regex")
+        self.assertEqual(matcher.scan("ok"), {})
+
+
+if __name__ == "__main__":
+    unittest.main()